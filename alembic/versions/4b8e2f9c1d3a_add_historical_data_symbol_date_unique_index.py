@@ -0,0 +1,40 @@
+"""add historical_data (symbol, date) unique index
+
+Revision ID: 4b8e2f9c1d3a
+Revises: 75cff241748c
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b8e2f9c1d3a'
+down_revision = '75cff241748c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the most recently loaded bar (highest id) of every (symbol, date) duplicate.
+    op.execute(
+        """
+        DELETE FROM stock_analyser.historical_data
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (PARTITION BY symbol, date ORDER BY id DESC) AS position
+                FROM stock_analyser.historical_data
+            ) AS ranked
+            WHERE ranked.position > 1
+        )
+        """
+    )
+    op.create_index(
+        'uq_historical_data_symbol_date', 'historical_data', ['symbol', 'date'],
+        unique=True, schema='stock_analyser'
+    )
+
+
+def downgrade():
+    op.drop_index('uq_historical_data_symbol_date', table_name='historical_data', schema='stock_analyser')
@@ -0,0 +1,53 @@
+"""cascade stock deletes to historical_data and indicator_state
+
+Revision ID: a7d3c5e9f1b6
+Revises: f2c8d4e6a1b3
+Create Date: 2026-10-18 17:12:34.506187
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3c5e9f1b6'
+down_revision = 'f2c8d4e6a1b3'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('historical_data', 'indicator_state')
+
+
+def _replace_symbol_foreign_key(table, on_delete):
+    # The existing constraint names depend on how the table was (re)built, they are looked up.
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            constraint_name TEXT;
+        BEGIN
+            FOR constraint_name IN
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = 'stock_analyser.{table}'::regclass AND contype = 'f'
+                AND confrelid = 'stock_analyser.stocks'::regclass
+            LOOP
+                EXECUTE format('ALTER TABLE stock_analyser.{table} DROP CONSTRAINT %I', constraint_name);
+            END LOOP;
+        END $$
+        """
+    )
+    op.execute(
+        f"ALTER TABLE stock_analyser.{table} ADD CONSTRAINT {table}_symbol_fkey "
+        f"FOREIGN KEY (symbol) REFERENCES stock_analyser.stocks (symbol){on_delete}"
+    )
+
+
+def upgrade():
+    for table in TABLES:
+        _replace_symbol_foreign_key(table, " ON DELETE CASCADE")
+
+
+def downgrade():
+    for table in TABLES:
+        _replace_symbol_foreign_key(table, "")
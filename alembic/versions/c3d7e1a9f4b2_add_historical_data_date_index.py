@@ -0,0 +1,25 @@
+"""add historical_data date index
+
+Revision ID: c3d7e1a9f4b2
+Revises: 9a41c7e5b2f0
+Create Date: 2026-10-18 11:02:17.540831
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d7e1a9f4b2'
+down_revision = '9a41c7e5b2f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Cross-sectional screens filter on a date range across all symbols.
+    op.create_index('ix_historical_data_date', 'historical_data', ['date'], schema='stock_analyser')
+
+
+def downgrade():
+    op.drop_index('ix_historical_data_date', table_name='historical_data', schema='stock_analyser')
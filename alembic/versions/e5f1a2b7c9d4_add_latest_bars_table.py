@@ -0,0 +1,52 @@
+"""add latest_bars table
+
+Revision ID: e5f1a2b7c9d4
+Revises: c3d7e1a9f4b2
+Create Date: 2026-10-18 13:41:05.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f1a2b7c9d4'
+down_revision = 'c3d7e1a9f4b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('latest_bars',
+    sa.Column('symbol', sa.String(length=10), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('open', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('high', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('low', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('close', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('volume', sa.Integer(), nullable=True),
+    sa.Column('rsi', sa.DECIMAL(precision=5, scale=2), nullable=True),
+    sa.Column('macd', sa.DECIMAL(precision=5, scale=3), nullable=True),
+    sa.Column('sma_50', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('sma_200', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('bollinger_upper', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('bollinger_lower', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.ForeignKeyConstraint(['symbol'], ['stock_analyser.stocks.symbol'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('symbol'),
+    schema='stock_analyser'
+    )
+    # Backfill from the existing history, one row per symbol.
+    op.execute(
+        """
+        INSERT INTO stock_analyser.latest_bars
+        SELECT DISTINCT ON (symbol) symbol, date, open, high, low, close, volume,
+               rsi, macd, sma_50, sma_200, bollinger_upper, bollinger_lower
+        FROM stock_analyser.historical_data
+        WHERE symbol IS NOT NULL
+        ORDER BY symbol, date DESC
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('latest_bars', schema='stock_analyser')
@@ -0,0 +1,107 @@
+"""partition historical_data by year
+
+Revision ID: f2c8d4e6a1b3
+Revises: e5f1a2b7c9d4
+Create Date: 2026-10-18 15:26:48.902213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8d4e6a1b3'
+down_revision = 'e5f1a2b7c9d4'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = (
+    "id, symbol, date, open, high, low, close, volume, "
+    "rsi, macd, sma_50, sma_200, bollinger_upper, bollinger_lower"
+)
+
+COLUMN_DEFINITIONS = """
+    symbol VARCHAR(10) REFERENCES stock_analyser.stocks (symbol),
+    date DATE NOT NULL,
+    open NUMERIC(10, 2),
+    high NUMERIC(10, 2),
+    low NUMERIC(10, 2),
+    close NUMERIC(10, 2),
+    volume INTEGER,
+    rsi NUMERIC(5, 2),
+    macd NUMERIC(5, 3),
+    sma_50 NUMERIC(10, 2),
+    sma_200 NUMERIC(10, 2),
+    bollinger_upper NUMERIC(10, 2),
+    bollinger_lower NUMERIC(10, 2)
+"""
+
+
+def _move_aside():
+    op.execute("ALTER TABLE stock_analyser.historical_data RENAME TO historical_data_previous")
+    op.execute("ALTER INDEX stock_analyser.historical_data_pkey RENAME TO historical_data_previous_pkey")
+    op.execute("DROP INDEX stock_analyser.uq_historical_data_symbol_date")
+    op.execute("DROP INDEX stock_analyser.ix_historical_data_date")
+
+
+def _copy_and_drop_previous():
+    op.execute(
+        f"INSERT INTO stock_analyser.historical_data ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM stock_analyser.historical_data_previous"
+    )
+    # The id sequence follows the new table, so it survives the drop.
+    op.execute("ALTER SEQUENCE stock_analyser.historical_data_id_seq OWNED BY stock_analyser.historical_data.id")
+    op.execute("DROP TABLE stock_analyser.historical_data_previous")
+    op.execute("CREATE UNIQUE INDEX uq_historical_data_symbol_date ON stock_analyser.historical_data (symbol, date)")
+    op.execute("CREATE INDEX ix_historical_data_date ON stock_analyser.historical_data (date)")
+
+
+def upgrade():
+    _move_aside()
+    # The primary key of a partitioned table must contain the partition key.
+    op.execute(
+        f"""
+        CREATE TABLE stock_analyser.historical_data (
+            id INTEGER NOT NULL DEFAULT nextval('stock_analyser.historical_data_id_seq'),
+            {COLUMN_DEFINITIONS},
+            PRIMARY KEY (id, date)
+        ) PARTITION BY RANGE (date)
+        """
+    )
+    # One partition per year from the oldest bar to next year; later years are created by
+    # HistoricalDataRepository.ensure_partitions and land in the DEFAULT partition meanwhile.
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            first_year INTEGER;
+            year INTEGER;
+        BEGIN
+            SELECT COALESCE(EXTRACT(YEAR FROM min(date))::INTEGER, EXTRACT(YEAR FROM now())::INTEGER)
+            INTO first_year FROM stock_analyser.historical_data_previous;
+            FOR year IN first_year .. EXTRACT(YEAR FROM now())::INTEGER + 1 LOOP
+                EXECUTE format(
+                    'CREATE TABLE stock_analyser.%I PARTITION OF stock_analyser.historical_data FOR VALUES FROM (%L) TO (%L)',
+                    'historical_data_y' || year, make_date(year, 1, 1), make_date(year + 1, 1, 1)
+                );
+            END LOOP;
+        END $$
+        """
+    )
+    op.execute("CREATE TABLE stock_analyser.historical_data_default PARTITION OF stock_analyser.historical_data DEFAULT")
+    _copy_and_drop_previous()
+
+
+def downgrade():
+    _move_aside()
+    op.execute(
+        f"""
+        CREATE TABLE stock_analyser.historical_data (
+            id INTEGER NOT NULL DEFAULT nextval('stock_analyser.historical_data_id_seq') PRIMARY KEY,
+            {COLUMN_DEFINITIONS}
+        )
+        """
+    )
+    # Dropping the partitioned parent drops its partitions, detached ones excepted.
+    _copy_and_drop_previous()
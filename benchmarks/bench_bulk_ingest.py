@@ -0,0 +1,77 @@
+"""Compares the INSERT ... ON CONFLICT bulk upsert with the COPY based ingest.
+
+Usage:
+    FINANCIAL_DATA_DB=postgresql://... FINANCIAL_DATA_DB_SCHEMA=stock_analyser \\
+        python benchmarks/bench_bulk_ingest.py --symbols 50 --days 2000
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from stock_analyser_lib.models import Base
+from stock_analyser_lib.models.base import engine
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+from stock_analyser_lib.repositories.stock_repo import StockRepository
+
+
+def generate_bars(symbols, days):
+    start = date(2000, 1, 1)
+    for index, symbol in enumerate(symbols):
+        for offset in range(days):
+            close = 50.0 + index + (offset % 100) / 10
+            yield {
+                "symbol": symbol, "date": start + timedelta(days=offset),
+                "open": close, "high": close + 1, "low": close - 1, "close": close,
+                "volume": 1000000 + offset, "rsi": 50.0, "macd": 0.5, "sma_50": close,
+                "sma_200": close, "bollinger_upper": close + 2, "bollinger_lower": close - 2,
+            }
+
+
+def run_insert(symbols, days):
+    HistoricalDataRepository.bulk_upsert_historical_data(list(generate_bars(symbols, days)))
+
+
+def run_copy(symbols, days):
+    HistoricalDataRepository.copy_upsert_historical_data(generate_bars(symbols, days))
+
+
+def measure(label, func, symbols, days, trace_memory):
+    with engine.begin() as connection:
+        connection.exec_driver_sql(f"TRUNCATE {Base.metadata.tables[_table_key()].fullname}")
+    # tracemalloc slows both paths down considerably, only enable it to compare memory.
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    func(symbols, days)
+    elapsed = time.perf_counter() - started
+    rows = len(symbols) * days
+    summary = f"{label:>8}: {rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)"
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        summary += f", peak {peak / 2**20:.1f} MiB"
+    print(summary)
+
+
+def _table_key():
+    return next(key for key in Base.metadata.tables if key.endswith("historical_data"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--days", type=int, default=2000)
+    parser.add_argument("--trace-memory", action="store_true")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    symbols = [f"S{index:04d}" for index in range(args.symbols)]
+    StockRepository.bulk_upsert_historical_data([{"symbol": symbol, "name": symbol} for symbol in symbols])
+
+    measure("insert", run_insert, symbols, args.days, args.trace_memory)
+    measure("copy", run_copy, symbols, args.days, args.trace_memory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compares ORM reads converted to float arrays with the columnar get_historical_arrays.
+
+Usage:
+    FINANCIAL_DATA_DB=postgresql://... FINANCIAL_DATA_DB_SCHEMA=stock_analyser \\
+        python benchmarks/bench_historical_arrays.py --days 5040 --repeat 20
+"""
+import argparse
+import time
+
+import numpy as np
+
+from bench_bulk_ingest import generate_bars
+from stock_analyser_lib.models import Base
+from stock_analyser_lib.models.base import engine
+from stock_analyser_lib.repositories.columnar import ARRAY_COLUMNS
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+from stock_analyser_lib.repositories.stock_repo import StockRepository
+
+SYMBOL = "BENCH"
+
+
+def read_orm():
+    data = HistoricalDataRepository.get_historical_data(SYMBOL)
+    arrays = {"date": np.array([row.date for row in data], dtype="datetime64[D]")}
+    for column in ARRAY_COLUMNS:
+        arrays[column] = np.array([float(getattr(row, column)) for row in data], dtype=np.float64)
+    return arrays
+
+
+def read_arrays():
+    return HistoricalDataRepository.get_historical_arrays(SYMBOL)
+
+
+def measure(label, func, repeat):
+    func()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label:>8}: {elapsed * 1000:.1f} ms per read")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=5040, help="Bars loaded for the symbol (20 years by default).")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    StockRepository.bulk_upsert_historical_data([{"symbol": SYMBOL, "name": SYMBOL}])
+    HistoricalDataRepository.bulk_upsert_historical_data(list(generate_bars([SYMBOL], args.days)))
+
+    measure("orm", read_orm, args.repeat)
+    measure("arrays", read_arrays, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Benchmarks the hot repository paths on synthetic data and writes a JSON report.
+
+Measures the bulk upsert (insert and update), range reads, point lookups and stock queries,
+on every database given with --db (FINANCIAL_DATA_DB by default). Only the synthetic SYN*
+symbols are written and deleted, so a development database can be used as is.
+
+Usage:
+    FINANCIAL_DATA_DB_SCHEMA=stock_analyser python benchmarks/bench_suite.py \\
+        --db sqlite:////tmp/bench.db --db postgresql://postgres@localhost/bench \\
+        --symbols 50 --years 10 --output report.json [--baseline previous.json]
+
+With --baseline, the run fails (exit code 1) when a benchmark's median latency regressed by
+more than --tolerance against the same benchmark and database in the previous report.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy
+import sqlalchemy
+from sqlalchemy import create_engine, delete, text
+
+from stock_analyser_lib.models import Base, HistoricalData, LatestBar, Stock
+from stock_analyser_lib.models.engines import PRIMARY, engine_registry
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+from stock_analyser_lib.repositories.stock_repo import StockRepository
+from synthetic import generate_bars, generate_stocks, symbol_names, trading_days
+
+UPSERT_BATCH_SIZE = 10000
+
+# Bars in a one-year range read.
+YEAR_OF_BARS = 252
+
+
+def connect(url: str) -> sqlalchemy.engine.Engine:
+    """Creates the engine of `url`, with the benchmark tables, and routes the repositories to it."""
+    schema = Base.metadata.schema
+    options: Dict[str, Any] = {}
+    if url.startswith("sqlite") and schema and schema != "main":
+        # SQLite has no schemas: the tables are created unqualified.
+        options["execution_options"] = {"schema_translate_map": {schema: None}}
+    engine = create_engine(url, **options)
+    with engine.begin() as connection:
+        if schema and engine.dialect.name == "postgresql":
+            connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+        Base.metadata.create_all(bind=connection)
+    engine_registry.set_engine(PRIMARY, engine)
+    return engine
+
+
+def clean(engine: sqlalchemy.engine.Engine, symbols: List[str]):
+    with engine.begin() as connection:
+        for table in (LatestBar.__table__, HistoricalData.__table__, Stock.__table__):
+            connection.execute(delete(table).where(table.c.symbol.in_(symbols)))
+
+
+def summarize(name: str, latencies: List[float], rows: Optional[int] = None) -> Dict[str, Any]:
+    """Latency percentiles in milliseconds, plus operation and row throughput."""
+    ordered = sorted(latencies)
+    total = sum(ordered)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))] * 1000
+
+    result = {
+        "benchmark": name,
+        "operations": len(ordered),
+        "total_s": round(total, 6),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(percentile(0.50), 3),
+        "p95_ms": round(percentile(0.95), 3),
+        "p99_ms": round(percentile(0.99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "ops_per_s": round(len(ordered) / total, 1) if total else None,
+    }
+    if rows is not None:
+        result["rows"] = rows
+        result["rows_per_s"] = round(rows / total, 1) if total else None
+    return result
+
+
+def timed(operations: List[Callable[[], Any]], warmup: int = 1) -> List[float]:
+    for operation in operations[:warmup]:
+        operation()
+    latencies = []
+    for operation in operations:
+        started = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def run(url: str, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    engine = connect(url)
+    symbols = symbol_names(args.symbols)
+    days = trading_days(args.years)
+    stocks = generate_stocks(symbols, args.seed)
+    rng = random.Random(args.seed)
+    HistoricalDataRepository.disable_cache()
+    clean(engine, symbols)
+    results = []
+
+    try:
+        StockRepository.bulk_upsert_historical_data(stocks)
+
+        def upsert_batches() -> List[List[Dict[str, Any]]]:
+            bars = list(generate_bars(symbols, args.years, args.seed))
+            return [bars[start:start + UPSERT_BATCH_SIZE] for start in range(0, len(bars), UPSERT_BATCH_SIZE)]
+
+        batches = upsert_batches()
+        rows = sum(len(batch) for batch in batches)
+        for name in ("bulk_upsert_insert", "bulk_upsert_update"):
+            latencies = timed([lambda batch=batch: HistoricalDataRepository.bulk_upsert_historical_data(batch) for batch in batches], warmup=0)
+            results.append(summarize(name, latencies, rows))
+
+        def window(length: int):
+            start = rng.randrange(len(days) - length)
+            return days[start], days[start + length - 1]
+
+        year = min(YEAR_OF_BARS, len(days) - 1)
+        windows = [(rng.choice(symbols), *window(year)) for _ in range(args.repeat)]
+        results.append(summarize("get_historical_data_1y", timed(
+            [lambda w=w: HistoricalDataRepository.get_historical_data(*w) for w in windows]
+        ), rows=args.repeat * year))
+        results.append(summarize("get_historical_arrays_1y", timed(
+            [lambda w=w: HistoricalDataRepository.get_historical_arrays(*w) for w in windows]
+        ), rows=args.repeat * year))
+        results.append(summarize("get_historical_arrays_full", timed(
+            [lambda symbol=symbol: HistoricalDataRepository.get_historical_arrays(symbol) for symbol, _, _ in windows]
+        ), rows=args.repeat * len(days)))
+
+        month_windows = [window(21) for _ in range(max(1, args.repeat // 10))]
+        results.append(summarize("get_historical_data_by_date_range_1m_all_symbols", timed(
+            [lambda w=w: HistoricalDataRepository.get_historical_data_by_date_range(*w) for w in month_windows]
+        ), rows=len(month_windows) * 21 * len(symbols)))
+
+        lookups = [(rng.choice(symbols), rng.choice(days)) for _ in range(args.repeat)]
+        results.append(summarize("get_historical_data_by_symbol_and_date", timed(
+            [lambda key=key: HistoricalDataRepository.get_historical_data_by_symbol_and_date(*key) for key in lookups]
+        )))
+        results.append(summarize("get_latest_bars", timed(
+            [lambda: HistoricalDataRepository.get_latest_bars(symbols) for _ in range(max(1, args.repeat // 10))]
+        ), rows=max(1, args.repeat // 10) * len(symbols)))
+
+        results.append(summarize("get_stock_by_symbol", timed(
+            [lambda symbol=rng.choice(symbols): StockRepository.get_stock_by_symbol(symbol) for _ in range(args.repeat)]
+        )))
+        results.append(summarize("get_stock_by_sector", timed(
+            [lambda stock=rng.choice(stocks): StockRepository.get_stock_by_sector(stock["sector"]) for _ in range(args.repeat)]
+        )))
+        results.append(summarize("get_all_stocks", timed(
+            [StockRepository.get_all_stocks for _ in range(max(1, args.repeat // 10))]
+        )))
+    finally:
+        clean(engine, symbols)
+        engine_registry.dispose()
+
+    database = engine.url.render_as_string(hide_password=True)
+    for result in results:
+        result["database"] = database
+        result["dialect"] = engine.dialect.name
+        print(f"{engine.dialect.name:>10} {result['benchmark']:<50} p50 {result['p50_ms']:>9.3f} ms"
+              f"  p95 {result['p95_ms']:>9.3f} ms" + (f"  {result['rows_per_s']:>12,.0f} rows/s" if "rows_per_s" in result else ""))
+    return results
+
+
+def regressions(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Lists the benchmarks whose median latency exceeds the baseline's by more than `tolerance`."""
+    previous = {(result["database"], result["benchmark"]): result for result in baseline["results"]}
+    failures = []
+    for result in results:
+        before = previous.get((result["database"], result["benchmark"]))
+        if before and result["p50_ms"] > before["p50_ms"] * (1 + tolerance):
+            failures.append(
+                f"{result['dialect']} {result['benchmark']}: p50 {before['p50_ms']} ms -> {result['p50_ms']} ms"
+            )
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", action="append", help="Database URL to benchmark, repeatable. Defaults to FINANCIAL_DATA_DB.")
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=200, help="Operations timed per read benchmark.")
+    parser.add_argument("--output", default="benchmark-report.json")
+    parser.add_argument("--baseline", help="Previous report to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed median slowdown, 0.25 = 25%%.")
+    args = parser.parse_args()
+
+    urls = args.db or [engine_registry.settings(PRIMARY).url]
+    results = []
+    for url in urls:
+        results.extend(run(url, args))
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "numpy": numpy.__version__,
+        },
+        "parameters": {"symbols": args.symbols, "years": args.years, "seed": args.seed, "repeat": args.repeat},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = regressions(results, json.load(f), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,96 @@
+"""Deterministic synthetic market data: N symbols x M years of daily OHLCV bars plus indicators.
+
+The same (symbols, years, seed) always yields the same rows, so benchmark runs are comparable
+across commits and databases. Values are rounded to the precision of the historical_data columns.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Sequence
+
+import numpy as np
+
+from stock_analyser_lib.indicators.vectorized import compute_indicators
+
+SECTORS = {
+    "Technology": ("Software", "Semiconductors", "Internet Services"),
+    "Healthcare": ("Biotechnology", "Medical Devices"),
+    "Financials": ("Banks", "Insurance"),
+    "Energy": ("Oil & Gas", "Renewables"),
+    "Consumer": ("Retail", "Beverages"),
+}
+
+START_DATE = date(2000, 1, 3)
+TRADING_DAYS_PER_YEAR = 252
+
+
+def symbol_names(count: int) -> List[str]:
+    """Returns `count` synthetic symbols, SYN00000, SYN00001, ..."""
+    return [f"SYN{index:05d}" for index in range(count)]
+
+
+def trading_days(years: int, start: date = START_DATE) -> List[date]:
+    """Returns the weekdays of `years` years of trading, starting on `start`."""
+    days = []
+    day = start
+    while len(days) < years * TRADING_DAYS_PER_YEAR:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def generate_stocks(symbols: Sequence[str], seed: int = 0) -> List[Dict[str, Any]]:
+    """Returns one stocks row per symbol, with a sector, an industry and a market cap."""
+    rng = np.random.default_rng(seed)
+    sectors = sorted(SECTORS)
+    stocks = []
+    for symbol in symbols:
+        sector = sectors[rng.integers(len(sectors))]
+        industries = SECTORS[sector]
+        stocks.append({
+            "symbol": symbol,
+            "name": f"{symbol} Corp.",
+            "sector": sector,
+            "industry": industries[rng.integers(len(industries))],
+            "market_cap": int(rng.lognormal(mean=23, sigma=1.5)),
+        })
+    return stocks
+
+
+def _series(rng: np.random.Generator, days: int) -> Dict[str, np.ndarray]:
+    # Geometric random walk of the close, OHLC consistent with it.
+    close = rng.uniform(20, 300) * np.exp(np.cumsum(rng.normal(0.0003, 0.02, days)))
+    close = np.clip(close, 1, 99_999)
+    open_ = close * np.exp(rng.normal(0, 0.005, days))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, days))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, days))
+    series = {"open": open_, "high": high, "low": low, "close": close}
+    series.update(compute_indicators(close))
+    # NUMERIC(5, 3) column.
+    series["macd"] = np.clip(series["macd"], -99.999, 99.999)
+    series["volume"] = rng.integers(10_000, 50_000_000, days)
+    return series
+
+
+def generate_bars(symbols: Sequence[str], years: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yields the historical_data rows of every symbol, ordered by symbol and date.
+
+    Args:
+        symbols (Sequence[str]): Symbols, e.g. symbol_names(500).
+        years (int): Years of daily bars per symbol (252 trading days each).
+        seed (int): Seed of the generator; each symbol derives its own stream from it.
+    """
+    days = trading_days(years)
+    for index, symbol in enumerate(symbols):
+        series = _series(np.random.default_rng([seed, index]), len(days))
+        columns = {}
+        for name, values in series.items():
+            if name == "volume":
+                columns[name] = values.tolist()
+            else:
+                rounded = np.round(values, 3 if name == "macd" else 2)
+                columns[name] = np.where(np.isnan(rounded), None, rounded).tolist()
+        for position, day in enumerate(days):
+            row = {"symbol": symbol, "date": day}
+            for name, values in columns.items():
+                row[name] = values[position]
+            yield row
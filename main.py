@@ -2,14 +2,16 @@ from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataR
 from stock_analyser_lib.repositories.stock_repo import StockRepository
 from stock_analyser_lib.models.stock import Stock
 from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.models.base import BaseModel
 
 
-# Test add_stock() method
-StockRepository.add_stock(symbol="AMZN", name="Amazon.com Inc.", sector="Technology", industry="E-commerce", market_cap=2000000000000)
-StockRepository.add_stock(symbol="AAPL", name="Apple Inc.", sector="Technology", industry="Consumer Electronics", market_cap=2000000000000)
-StockRepository.add_stock(symbol="MSFT", name="Microsoft Corporation", sector="Technology", industry="Software", market_cap=2000000000000)
-StockRepository.add_stock(symbol="GOOGL", name="Alphabet Inc.", sector="Technology", industry="Internet Services", market_cap=2000000000000)
-StockRepository.add_stock(symbol="TSLA", name="Tesla Inc.", sector="Automotive", industry="Electric Vehicles", market_cap=2000000000000)
+# Test add_stock() method, in a unit of work: one transaction and one commit for all calls
+with BaseModel.unit_of_work():
+    StockRepository.add_stock(symbol="AMZN", name="Amazon.com Inc.", sector="Technology", industry="E-commerce", market_cap=2000000000000)
+    StockRepository.add_stock(symbol="AAPL", name="Apple Inc.", sector="Technology", industry="Consumer Electronics", market_cap=2000000000000)
+    StockRepository.add_stock(symbol="MSFT", name="Microsoft Corporation", sector="Technology", industry="Software", market_cap=2000000000000)
+    StockRepository.add_stock(symbol="GOOGL", name="Alphabet Inc.", sector="Technology", industry="Internet Services", market_cap=2000000000000)
+    StockRepository.add_stock(symbol="TSLA", name="Tesla Inc.", sector="Automotive", industry="Electric Vehicles", market_cap=2000000000000)
 
 # Test bulk_upsert_historical_data() method
 StockRepository.bulk_upsert_historical_data([
@@ -25,12 +27,12 @@ stock = StockRepository.get_stock_by_symbol("AAPL")
 print(stock)    # Output: <Stock(symbol=AAPL, name=Apple Inc.)> (or similar)
 
 # Test get_stock_by_sector() method
-stock = StockRepository.get_stock_by_sector("Technology")
-print(stock)    # Output: <Stock(symbol=AAPL, name=Apple Inc.)> (or similar)
+stocks = StockRepository.get_stock_by_sector("Technology")
+print(stocks)    # Output: [<Stock(symbol=AAPL, name=Apple Inc.)>, <Stock(symbol=AMZN, name=Amazon.com Inc.)>, ...] (or similar)
 
 # Test get_stock_by_industry() method
-stock = StockRepository.get_stock_by_industry("Consumer Electronics")
-print(stock)    # Output: <Stock(symbol=AAPL, name=Apple Inc.)> (or similar)
+stocks = StockRepository.get_stock_by_industry("Consumer Electronics")
+print(stocks)    # Output: [<Stock(symbol=AAPL, name=Apple Inc.)>] (or similar)
 
 # Test get_all_stocks() method
 stocks = StockRepository.get_all_stocks()
@@ -141,13 +143,8 @@ stock = StockRepository.get_stock_by_symbol("AAPL")
 print(stock)    # Output: None
 
 # Delete all stocks and historical data
-StockRepository.delete_stock("AMZN")
-StockRepository.delete_stock("MSFT")
-StockRepository.delete_stock("GOOGL")
-StockRepository.delete_stock("TSLA")    # noqa: E501
-historical_data = HistoricalDataRepository.get_historical_data_by_symbol("AAPL")
-for data in historical_data:
-    HistoricalDataRepository.delete_historical_data(data)
+StockRepository.delete_stocks(["AMZN", "MSFT", "GOOGL", "TSLA"])
+HistoricalDataRepository.bulk_delete_historical_data(symbols=["AAPL"])
 historical_data = HistoricalDataRepository.get_historical_data_by_symbol("AAPL")
 print(historical_data)    # Output: [] (or similar)
 
@@ -20,6 +20,7 @@ setup (
     author_email="your-email@example.com",
     url= "https://github.com/zakaria08abouchi/stock-analyser-lib",
     install_requires=read("requirements.txt").splitlines(),
+    extras_require={"parquet": ["pyarrow"]},
     packages=find_packages(where="src"),
     package_dir={"": "src"},
     include_package_data=True,
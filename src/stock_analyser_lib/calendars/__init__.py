@@ -0,0 +1 @@
+from stock_analyser_lib.calendars.trading_calendar import NYSE, TradingCalendar, easter_sunday, nyse_holidays
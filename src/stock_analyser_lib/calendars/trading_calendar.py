@@ -0,0 +1,143 @@
+"""Exchange trading calendars, used to tell which days a symbol should have a bar for.
+
+Holiday rules are computed with pendulum, then handed to a numpy busdaycalendar so that
+trading days can be counted, listed and rolled over whole arrays of dates at once.
+"""
+
+from datetime import date, timedelta
+from functools import cached_property
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pendulum
+
+
+# Days the NYSE closed outside of its regular holidays.
+NYSE_SPECIAL_CLOSURES = (
+    date(1994, 4, 27),  # National day of mourning, Richard Nixon
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),  # September 11 attacks
+    date(2004, 6, 11),  # National day of mourning, Ronald Reagan
+    date(2007, 1, 2),  # National day of mourning, Gerald Ford
+    date(2012, 10, 29), date(2012, 10, 30),  # Hurricane Sandy
+    date(2018, 12, 5),  # National day of mourning, George H. W. Bush
+    date(2025, 1, 9),  # National day of mourning, Jimmy Carter
+)
+
+# Years covered by the holiday tables of a calendar.
+FIRST_YEAR = 1990
+LAST_YEAR = 2100
+
+
+def easter_sunday(year: int) -> date:
+    """Returns Easter Sunday of the Gregorian calendar (anonymous Gregorian computus)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    w = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * w) // 451
+    month, day = divmod(h + w - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(day: pendulum.Date) -> pendulum.Date:
+    # Saturday holidays are observed on the Friday before, Sunday holidays on the Monday after.
+    if day.day_of_week == pendulum.SATURDAY:
+        return day.subtract(days=1)
+    if day.day_of_week == pendulum.SUNDAY:
+        return day.add(days=1)
+    return day
+
+
+def nyse_holidays(year: int) -> List[date]:
+    """Returns the weekdays the NYSE is closed in `year`, special closures included.
+
+    Follows the rules in force since FIRST_YEAR: New Year's Day (not observed on the Friday before
+    when it falls on a Saturday), Martin Luther King Jr. Day (since 1998), Washington's Birthday, Good
+    Friday, Memorial Day, Juneteenth (since 2022), Independence Day, Labor Day, Thanksgiving and Christmas.
+    """
+    january, february, may = pendulum.date(year, 1, 1), pendulum.date(year, 2, 1), pendulum.date(year, 5, 1)
+    holidays = [
+        february.nth_of("month", 3, pendulum.MONDAY),
+        pendulum.instance(easter_sunday(year)).subtract(days=2),
+        may.last_of("month", pendulum.MONDAY),
+        _observed(pendulum.date(year, 7, 4)),
+        pendulum.date(year, 9, 1).first_of("month", pendulum.MONDAY),
+        pendulum.date(year, 11, 1).nth_of("month", 4, pendulum.THURSDAY),
+        _observed(pendulum.date(year, 12, 25)),
+    ]
+    if january.day_of_week != pendulum.SATURDAY:
+        holidays.append(_observed(january))
+    if year >= 1998:
+        holidays.append(january.nth_of("month", 3, pendulum.MONDAY))
+    if year >= 2022:
+        holidays.append(_observed(pendulum.date(year, 6, 19)))
+    holidays.extend(pendulum.instance(day) for day in NYSE_SPECIAL_CLOSURES if day.year == year)
+    return sorted(date(day.year, day.month, day.day) for day in holidays if day.day_of_week < pendulum.SATURDAY)
+
+
+class TradingCalendar:
+    """Trading days of an exchange: weekdays that are not holidays.
+
+    Args:
+        holidays (Callable[[int], Iterable[date]]): Holidays of a year.
+        timezone (str): Timezone of the exchange.
+        close (Tuple[int, int]): Hour and minute the session closes, in the exchange timezone.
+    """
+
+    def __init__(
+            self,
+            holidays: Callable[[int], Iterable[date]],
+            timezone: str,
+            close: Tuple[int, int] = (16, 0)):
+        self._holidays = holidays
+        self.timezone = timezone
+        self.close = pendulum.time(*close)
+
+    @cached_property
+    def busdaycalendar(self) -> np.busdaycalendar:
+        """numpy calendar of the trading days from FIRST_YEAR to LAST_YEAR."""
+        holidays = [day for year in range(FIRST_YEAR, LAST_YEAR + 1) for day in self._holidays(year)]
+        return np.busdaycalendar(weekmask="1111100", holidays=np.array(holidays, dtype="datetime64[D]"))
+
+    def holidays(self, year: int) -> List[date]:
+        """Returns the weekdays the exchange is closed in `year`."""
+        return list(self._holidays(year))
+
+    def is_trading_day(self, day: date) -> bool:
+        return bool(np.is_busday(np.datetime64(day, "D"), busdaycal=self.busdaycalendar))
+
+    def trading_days(self, start_date: date, end_date: date) -> np.ndarray:
+        """Returns the trading days within [start_date, end_date] as datetime64[D]."""
+        days = np.arange(np.datetime64(start_date, "D"), np.datetime64(end_date, "D") + 1)
+        return days[np.is_busday(days, busdaycal=self.busdaycalendar)]
+
+    def count(self, start_date: np.ndarray, end_date: np.ndarray) -> np.ndarray:
+        """Counts the trading days within [start_date, end_date], element-wise over arrays of dates."""
+        start_date = np.asarray(start_date, dtype="datetime64[D]")
+        end_date = np.asarray(end_date, dtype="datetime64[D]")
+        return np.maximum(np.busday_count(start_date, end_date + 1, busdaycal=self.busdaycalendar), 0)
+
+    def next_trading_day(self, day: np.ndarray) -> np.ndarray:
+        """Returns the first trading day on or after each day."""
+        return np.busday_offset(np.asarray(day, dtype="datetime64[D]"), 0, roll="forward", busdaycal=self.busdaycalendar)
+
+    def previous_trading_day(self, day: np.ndarray) -> np.ndarray:
+        """Returns the last trading day on or before each day."""
+        return np.busday_offset(np.asarray(day, dtype="datetime64[D]"), 0, roll="backward", busdaycal=self.busdaycalendar)
+
+    def last_closed_session(self, now: Optional[pendulum.DateTime] = None) -> date:
+        """Returns the latest trading day whose session has closed, i.e. the last day a bar can exist for.
+
+        Args:
+            now (pendulum.DateTime, optional): Current time, in any timezone. Defaults to now.
+        """
+        now = (now or pendulum.now()).in_timezone(self.timezone)
+        day = now.date() if now.time() >= self.close else now.date() - timedelta(days=1)
+        return self.previous_trading_day(date(day.year, day.month, day.day)).item()
+
+
+NYSE = TradingCalendar(nyse_holidays, "America/New_York")
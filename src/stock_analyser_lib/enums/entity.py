@@ -4,3 +4,5 @@ from enum import Enum
 class Entity(Enum):
     HISTORICAL_DATA = "historical_data"
     STOCK = "stocks"
+    INDICATOR_STATE = "indicator_state"
+    LATEST_BARS = "latest_bars"
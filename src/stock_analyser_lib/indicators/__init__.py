@@ -0,0 +1,4 @@
+from stock_analyser_lib.indicators.vectorized import (
+    INDICATOR_COLUMNS, bollinger_bands, compute_indicators, ema, indicator_rows, macd, rsi, sma,
+)
+from stock_analyser_lib.indicators.incremental import advance_state, empty_state, seed_states
@@ -0,0 +1,117 @@
+"""Indicator updates one bar at a time from a persisted rolling state.
+
+A state is a dict shaped like an indicator_state row. Appending a close updates it
+in O(1) and yields the same indicator values the vectorized engine computes over
+the full history.
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from stock_analyser_lib.indicators.vectorized import (
+    BOLLINGER_PERIOD, BOLLINGER_STD, MACD_FAST_PERIOD, MACD_SLOW_PERIOD, RSI_PERIOD,
+    SMA_LONG_PERIOD, SMA_SHORT_PERIOD, ema, group_series, rsi_from_averages, wilder_averages,
+)
+
+
+def empty_state(symbol: str) -> Dict[str, Any]:
+    """State of a symbol without any bar yet."""
+    return {
+        "symbol": symbol, "last_date": None, "closes": [], "observations": 0,
+        "ema_fast": None, "ema_slow": None, "avg_gain": 0.0, "avg_loss": 0.0,
+    }
+
+
+def _ema_step(previous: Optional[float], close: float, period: int) -> float:
+    if previous is None:
+        return close
+    return previous + 2.0 / (period + 1) * (close - previous)
+
+
+def advance_state(state: Dict[str, Any], bar_date: date, close: float) -> Dict[str, Optional[float]]:
+    """Appends a close to `state` (in place) and returns the indicators of that bar."""
+    closes: List[float] = state["closes"]
+    observations = state["observations"] + 1
+
+    state["ema_fast"] = _ema_step(state["ema_fast"], close, MACD_FAST_PERIOD)
+    state["ema_slow"] = _ema_step(state["ema_slow"], close, MACD_SLOW_PERIOD)
+
+    changes = observations - 1
+    if closes:
+        change = close - closes[-1]
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if changes <= RSI_PERIOD:
+            state["avg_gain"] += gain
+            state["avg_loss"] += loss
+            if changes == RSI_PERIOD:
+                state["avg_gain"] /= RSI_PERIOD
+                state["avg_loss"] /= RSI_PERIOD
+        else:
+            state["avg_gain"] = (state["avg_gain"] * (RSI_PERIOD - 1) + gain) / RSI_PERIOD
+            state["avg_loss"] = (state["avg_loss"] * (RSI_PERIOD - 1) + loss) / RSI_PERIOD
+
+    closes.append(close)
+    del closes[:-SMA_LONG_PERIOD]
+    state["observations"] = observations
+    state["last_date"] = bar_date
+
+    window = np.asarray(closes)
+    indicators: Dict[str, Optional[float]] = dict.fromkeys(
+        ("rsi", "macd", "sma_50", "sma_200", "bollinger_upper", "bollinger_lower")
+    )
+    if changes >= RSI_PERIOD:
+        indicators["rsi"] = float(rsi_from_averages(np.float64(state["avg_gain"]), np.float64(state["avg_loss"])))
+    if observations >= MACD_SLOW_PERIOD:
+        indicators["macd"] = state["ema_fast"] - state["ema_slow"]
+    if observations >= SMA_SHORT_PERIOD:
+        indicators["sma_50"] = float(window[-SMA_SHORT_PERIOD:].mean())
+    if observations >= SMA_LONG_PERIOD:
+        indicators["sma_200"] = float(window[-SMA_LONG_PERIOD:].mean())
+    if observations >= BOLLINGER_PERIOD:
+        band = window[-BOLLINGER_PERIOD:]
+        middle, width = float(band.mean()), BOLLINGER_STD * float(band.std())
+        indicators["bollinger_upper"] = middle + width
+        indicators["bollinger_lower"] = middle - width
+    return indicators
+
+
+def seed_states(symbols: np.ndarray, dates: np.ndarray, closes: np.ndarray) -> List[Dict[str, Any]]:
+    """Builds the states of every symbol from flat rows sorted by symbol and date.
+
+    The accumulators are computed with the vectorized engine for the whole batch at once.
+    NULL closes (NaN) are skipped, like the vectorized engine does.
+    """
+    valid = ~np.isnan(closes)
+    symbols, dates, closes = symbols[valid], dates[valid], closes[valid]
+    matrix, rows, columns = group_series(symbols, closes)
+    if not len(matrix):
+        return []
+    counts = np.bincount(rows, minlength=len(matrix))
+    last = counts - 1
+    index = np.arange(len(matrix))
+
+    ema_fast = ema(matrix, MACD_FAST_PERIOD)[index, last]
+    ema_slow = ema(matrix, MACD_SLOW_PERIOD)[index, last]
+    avg_gain, avg_loss = (values[index, last] for values in wilder_averages(matrix, RSI_PERIOD))
+    # Symbols with fewer than RSI_PERIOD changes keep the running sums instead.
+    changes = np.diff(matrix, axis=-1)
+    gain_sums = np.nansum(np.maximum(changes, 0.0), axis=-1)
+    loss_sums = np.nansum(np.maximum(-changes, 0.0), axis=-1)
+    seeding = counts - 1 < RSI_PERIOD
+
+    ends = np.cumsum(counts)
+    states = []
+    for row in range(len(matrix)):
+        states.append({
+            "symbol": str(symbols[ends[row] - 1]),
+            "last_date": dates[ends[row] - 1].item(),
+            "closes": matrix[row, max(0, counts[row] - SMA_LONG_PERIOD):counts[row]].tolist(),
+            "observations": int(counts[row]),
+            "ema_fast": float(ema_fast[row]),
+            "ema_slow": float(ema_slow[row]),
+            "avg_gain": float(gain_sums[row] if seeding[row] else avg_gain[row]),
+            "avg_loss": float(loss_sums[row] if seeding[row] else avg_loss[row]),
+        })
+    return states
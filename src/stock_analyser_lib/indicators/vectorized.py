@@ -0,0 +1,204 @@
+"""Technical indicators computed with NumPy over whole price histories.
+
+Every function takes closes shaped (n_dates,) or (n_symbols, n_dates), with time
+along the last axis, and computes all symbols at once. NaN marks a missing close
+(e.g. before a symbol was listed, or padding after its last bar). Outputs are NaN
+until enough observations are available.
+"""
+
+from typing import Any, Dict, Iterator, Tuple
+
+import numpy as np
+
+
+SMA_SHORT_PERIOD = 50
+SMA_LONG_PERIOD = 200
+RSI_PERIOD = 14
+MACD_FAST_PERIOD = 12
+MACD_SLOW_PERIOD = 26
+BOLLINGER_PERIOD = 20
+BOLLINGER_STD = 2.0
+
+# historical_data columns filled by compute_indicators.
+INDICATOR_COLUMNS = ("rsi", "macd", "sma_50", "sma_200", "bollinger_upper", "bollinger_lower")
+
+
+def _as_2d(values: np.ndarray) -> np.ndarray:
+    return np.atleast_2d(np.asarray(values, dtype=np.float64))
+
+
+def _shape_like(result: np.ndarray, values: np.ndarray) -> np.ndarray:
+    return result.reshape(np.shape(values))
+
+
+def _window_sums(values: np.ndarray, period: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling sums of the valid values and of the valid count over `period` dates."""
+    valid = ~np.isnan(values)
+    padding = np.zeros(values.shape[:-1] + (1,))
+    cumulative = np.concatenate([padding, np.cumsum(np.where(valid, values, 0.0), axis=-1)], axis=-1)
+    counts = np.concatenate([padding, np.cumsum(valid, axis=-1)], axis=-1)
+    sums = np.full(values.shape, np.nan)
+    window_counts = np.zeros(values.shape)
+    if values.shape[-1] >= period:
+        sums[..., period - 1:] = cumulative[..., period:] - cumulative[..., :-period]
+        window_counts[..., period - 1:] = counts[..., period:] - counts[..., :-period]
+    return sums, window_counts
+
+
+def sma(close: np.ndarray, period: int) -> np.ndarray:
+    """Simple moving average, NaN unless the last `period` closes are all present."""
+    values = _as_2d(close)
+    sums, counts = _window_sums(values, period)
+    result = np.where(counts == period, sums / period, np.nan)
+    result[np.isnan(values)] = np.nan
+    return _shape_like(result, close)
+
+
+def rolling_std(close: np.ndarray, period: int) -> np.ndarray:
+    """Population standard deviation over the last `period` closes."""
+    values = _as_2d(close)
+    # Centre each series on its first close before squaring to limit cancellation in E[x²] - E[x]².
+    first = np.argmax(~np.isnan(values), axis=-1)[..., np.newaxis]
+    offset = np.nan_to_num(np.take_along_axis(values, first, axis=-1)) if values.size else 0.0
+    centred = values - offset
+    sums, counts = _window_sums(centred, period)
+    squares, _ = _window_sums(centred ** 2, period)
+    mean = sums / period
+    variance = np.maximum(squares / period - mean ** 2, 0.0)
+    result = np.where(counts == period, np.sqrt(variance), np.nan)
+    result[np.isnan(values)] = np.nan
+    return _shape_like(result, close)
+
+
+def ema(close: np.ndarray, period: int) -> np.ndarray:
+    """Exponential moving average with alpha = 2 / (period + 1), seeded with the first close.
+
+    Missing closes carry the previous average forward and are NaN in the output.
+    """
+    values = _as_2d(close)
+    alpha = 2.0 / (period + 1)
+    result = np.full(values.shape, np.nan)
+    current = np.full(values.shape[:-1], np.nan)
+    for t in range(values.shape[-1]):
+        column = values[..., t]
+        present = ~np.isnan(column)
+        current = np.where(
+            present,
+            np.where(np.isnan(current), column, current + alpha * (column - current)),
+            current,
+        )
+        result[..., t] = np.where(present, current, np.nan)
+    return _shape_like(result, close)
+
+
+def wilder_averages(close: np.ndarray, period: int = RSI_PERIOD) -> Tuple[np.ndarray, np.ndarray]:
+    """Wilder's smoothed average gain and loss.
+
+    Seeded with the simple average of the first `period` close-to-close changes, then
+    avg = (avg * (period - 1) + change) / period. NaN before `period` changes are seen.
+    """
+    values = _as_2d(close)
+    shape = values.shape[:-1]
+    avg_gain = np.full(values.shape, np.nan)
+    avg_loss = np.full(values.shape, np.nan)
+    previous = np.full(shape, np.nan)
+    gain = np.zeros(shape)
+    loss = np.zeros(shape)
+    seen = np.zeros(shape, dtype=np.int64)
+    for t in range(values.shape[-1]):
+        column = values[..., t]
+        changed = ~np.isnan(column) & ~np.isnan(previous)
+        change = np.where(changed, column - previous, 0.0)
+        seen = seen + changed
+        seeding = changed & (seen <= period)
+        smoothing = changed & (seen > period)
+        gain = np.where(seeding, gain + np.maximum(change, 0.0), gain)
+        loss = np.where(seeding, loss - np.minimum(change, 0.0), loss)
+        gain = np.where(seeding & (seen == period), gain / period, gain)
+        loss = np.where(seeding & (seen == period), loss / period, loss)
+        gain = np.where(smoothing, (gain * (period - 1) + np.maximum(change, 0.0)) / period, gain)
+        loss = np.where(smoothing, (loss * (period - 1) - np.minimum(change, 0.0)) / period, loss)
+        ready = ~np.isnan(column) & (seen >= period)
+        avg_gain[..., t] = np.where(ready, gain, np.nan)
+        avg_loss[..., t] = np.where(ready, loss, np.nan)
+        previous = np.where(np.isnan(column), previous, column)
+    return _shape_like(avg_gain, close), _shape_like(avg_loss, close)
+
+
+def rsi_from_averages(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    """Relative strength index from Wilder's average gain and loss."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    # No losses over the period: RSI is 100 (50 when the price did not move at all).
+    flat = (avg_loss == 0) & ~np.isnan(avg_gain)
+    return np.where(flat, np.where(avg_gain == 0, 50.0, 100.0), result)
+
+
+def rsi(close: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+    """Wilder's relative strength index."""
+    return rsi_from_averages(*wilder_averages(close, period))
+
+
+def macd(close: np.ndarray, fast: int = MACD_FAST_PERIOD, slow: int = MACD_SLOW_PERIOD) -> np.ndarray:
+    """MACD line (fast EMA - slow EMA), NaN until `slow` closes are available."""
+    values = _as_2d(close)
+    line = _as_2d(ema(values, fast) - ema(values, slow))
+    observations = np.cumsum(~np.isnan(values), axis=-1)
+    return _shape_like(np.where(observations >= slow, line, np.nan), close)
+
+
+def bollinger_bands(
+        close: np.ndarray, period: int = BOLLINGER_PERIOD, num_std: float = BOLLINGER_STD) -> Tuple[np.ndarray, np.ndarray]:
+    """Upper and lower Bollinger bands: SMA ± `num_std` population standard deviations."""
+    middle = sma(close, period)
+    width = num_std * rolling_std(close, period)
+    return middle + width, middle - width
+
+
+def compute_indicators(close: np.ndarray) -> Dict[str, np.ndarray]:
+    """Computes every indicator stored in historical_data, keyed by column name."""
+    upper, lower = bollinger_bands(close)
+    return {
+        "rsi": rsi(close),
+        "macd": macd(close),
+        "sma_50": sma(close, SMA_SHORT_PERIOD),
+        "sma_200": sma(close, SMA_LONG_PERIOD),
+        "bollinger_upper": upper,
+        "bollinger_lower": lower,
+    }
+
+
+def group_series(symbols: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Packs flat rows sorted by symbol (then date) into a NaN padded (n_symbols, max_length) matrix.
+
+    Returns:
+        Tuple: The matrix, plus the row and column index of every input row in it.
+    """
+    if len(symbols) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return np.empty((0, 0)), empty, empty
+    _, starts, counts = np.unique(symbols, return_index=True, return_counts=True)
+    order = np.argsort(starts)
+    starts, counts = starts[order], counts[order]
+    rows = np.repeat(np.arange(len(starts)), counts)
+    columns = np.arange(len(symbols)) - np.repeat(starts, counts)
+    matrix = np.full((len(starts), counts.max()), np.nan)
+    matrix[rows, columns] = values
+    return matrix, rows, columns
+
+
+def indicator_rows(symbols: np.ndarray, dates: np.ndarray, close: np.ndarray) -> Iterator[Dict[str, Any]]:
+    """Computes the indicators for flat rows sorted by symbol and date and yields upsert rows.
+
+    The rows hold symbol, date and the indicator columns only, so an upsert leaves
+    the OHLCV columns untouched. Indicators that are not available yet are None.
+    """
+    matrix, rows, columns = group_series(symbols, close)
+    indicators = compute_indicators(matrix)
+    keys = ("symbol", "date") + INDICATOR_COLUMNS
+    values = [np.asarray(symbols).tolist(), np.asarray(dates, dtype="datetime64[D]").tolist()]
+    for name in INDICATOR_COLUMNS:
+        flat = indicators[name][rows, columns]
+        values.append(np.where(np.isnan(flat), None, flat).tolist())
+    for row in zip(*values):
+        yield dict(zip(keys, row))
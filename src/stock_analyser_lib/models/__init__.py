@@ -1,4 +1,6 @@
 from stock_analyser_lib.models.historical_data import HistoricalData
 from stock_analyser_lib.models.stock import Stock
+from stock_analyser_lib.models.indicator_state import IndicatorState
+from stock_analyser_lib.models.latest_bar import LatestBar
 from stock_analyser_lib.models.base import Base, BaseModel
 
@@ -1,20 +1,80 @@
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 import logging
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
+import os
+from typing import Callable, List, Optional
 
-from stock_analyser_lib.models.settings import FINANCIAL_DATA_DB, FINANCIAL_DATA_DB_SCHEMA
+from sqlalchemy import MetaData
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker, scoped_session, declarative_base
 
+from stock_analyser_lib.models.engines import PRIMARY, REPLICA, engine_registry
+from stock_analyser_lib.models.settings import FINANCIAL_DATA_DB_SCHEMA
 
-engine = create_engine(FINANCIAL_DATA_DB, pool_pre_ping=True)
 
-SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False))
+class RoutingSession(Session):
+    """Session bound to the primary engine, or to the replica engine once flagged read-only."""
+
+    def get_bind(self, *args, **kwargs):
+        return engine_registry.get(REPLICA if self.info.get("read_only") else PRIMARY)
+
+
+class AsyncRoutingSession(Session):
+    """Session driven by AsyncSession, routed like RoutingSession to the async engine of its role."""
+
+    def get_bind(self, *args, **kwargs):
+        return engine_registry.get_async(REPLICA if self.info.get("read_only") else PRIMARY).sync_engine
+
+
+SessionLocal = scoped_session(sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, expire_on_commit=False))
+
+# Not bound to an engine: every session asks the registry, so reconfigured or forked engines are
+# picked up, and sync-only callers never load an async driver.
+AsyncSessionLocal = async_sessionmaker(sync_session_class=AsyncRoutingSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base(metadata=MetaData(schema=FINANCIAL_DATA_DB_SCHEMA))
 
 logging.basicConfig(level=logging.INFO)
 
 
+@dataclass
+class _UnitOfWork:
+    session: Session
+    on_commit: List[Callable[[], None]] = field(default_factory=list)
+
+
+# Unit of work joined by get_session in the current thread or task, see BaseModel.unit_of_work.
+_current_unit_of_work: ContextVar[Optional[_UnitOfWork]] = ContextVar("unit_of_work", default=None)
+
+
+def __getattr__(name: str) -> Engine:
+    # `engine` used to be created at import time, it is now the lazily created primary engine.
+    if name == "engine":
+        return engine_registry.get(PRIMARY)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    """Returns the AsyncSession factory."""
+    return AsyncSessionLocal
+
+
+def reset_engine_after_fork():
+    """Drops the pooled connections and sessions inherited from the parent process.
+
+    The parent keeps using them, so they are forgotten rather than closed: the child
+    opens its own connections on first use.
+    """
+    engine_registry.reset_after_fork()
+    SessionLocal.registry.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_engine_after_fork)
+
+
 class BaseModel(Base):
     """Base model class that includes session management."""
     __abstract__ = True
@@ -23,9 +83,22 @@ class BaseModel(Base):
 
     @classmethod
     @contextmanager
-    def get_session(cls):
-        """Context manager for database session handling."""
+    def get_session(cls, read_only: bool = False):
+        """Context manager for database session handling.
+
+        Args:
+            read_only (bool): Routes the session to the read replica, when one is configured.
+        """
+        unit_of_work = _current_unit_of_work.get()
+        if unit_of_work is not None:
+            # Joined calls share the transaction, each under its own SAVEPOINT: a failing call only
+            # undoes its own changes, and releasing the savepoint flushes them for the next call.
+            with unit_of_work.session.begin_nested():
+                yield unit_of_work.session
+            return
+
         session = SessionLocal()
+        session.info["read_only"] = read_only
         try:
             yield session
             session.commit()
@@ -36,3 +109,74 @@ class BaseModel(Base):
         finally:
             session.close()
             SessionLocal.remove()
+
+    @classmethod
+    @contextmanager
+    def unit_of_work(cls):
+        """Context manager grouping repository calls in one session and one transaction.
+
+        Every get_session opened inside the block joins it, and the block commits once on
+        exit (or rolls everything back on error). Nested blocks join the outermost one.
+
+        Example:
+            with BaseModel.unit_of_work():
+                StockRepository.add_stock("AAPL", "Apple Inc.")
+                HistoricalDataRepository.add_historical_data("AAPL", ...)
+        """
+        if _current_unit_of_work.get() is not None:
+            yield _current_unit_of_work.get().session
+            return
+
+        unit_of_work = _UnitOfWork(session=SessionLocal())
+        unit_of_work.session.info["read_only"] = False
+        token = _current_unit_of_work.set(unit_of_work)
+        try:
+            yield unit_of_work.session
+            unit_of_work.session.commit()
+        except Exception as e:
+            unit_of_work.session.rollback()
+            cls.logger.error(f"Unit of work failed: {e}")
+            raise
+        finally:
+            _current_unit_of_work.reset(token)
+            unit_of_work.session.close()
+            SessionLocal.remove()
+        for callback in unit_of_work.on_commit:
+            callback()
+
+    @staticmethod
+    def in_unit_of_work() -> bool:
+        """Tells whether get_session currently joins a unit of work, whose writes are not committed yet."""
+        return _current_unit_of_work.get() is not None
+
+    @staticmethod
+    def on_commit(callback: Callable[[], None]):
+        """Runs `callback` once the current unit of work commits, or right away outside of one.
+
+        Used to invalidate caches only when the written data becomes visible to other sessions.
+        """
+        unit_of_work = _current_unit_of_work.get()
+        if unit_of_work is None:
+            callback()
+        else:
+            unit_of_work.on_commit.append(callback)
+
+    @classmethod
+    @asynccontextmanager
+    async def get_async_session(cls, read_only: bool = False):
+        """Async context manager for AsyncSession handling, committing on success.
+
+        Args:
+            read_only (bool): Routes the session to the read replica, when one is configured.
+        """
+        session: AsyncSession = get_async_sessionmaker()()
+        session.sync_session.info["read_only"] = read_only
+        try:
+            yield session
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            cls.logger.error(f"Database transaction failed: {e}")
+            raise
+        finally:
+            await session.close()
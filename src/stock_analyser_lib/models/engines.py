@@ -0,0 +1,185 @@
+"""Lazily created database engines, one per role.
+
+Nothing connects, nor imports a DBAPI driver, until an engine is first requested.
+The "primary" engine serves writes, the "replica" engine serves read-only sessions
+and falls back to the primary when no replica DSN is configured.
+"""
+
+import dataclasses
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from stock_analyser_lib.models.instrumentation import instrumentation
+from stock_analyser_lib.models.settings import (
+    FINANCIAL_DATA_ASYNC_DB, FINANCIAL_DATA_DB, FINANCIAL_DATA_DB_MAX_OVERFLOW, FINANCIAL_DATA_DB_POOL_RECYCLE,
+    FINANCIAL_DATA_DB_POOL_SIZE, FINANCIAL_DATA_DB_REPLICA, FINANCIAL_DATA_DB_STATEMENT_TIMEOUT,
+)
+
+
+PRIMARY = "primary"
+REPLICA = "replica"
+
+# asyncio drivers used for the async engines, by backend.
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    """Swaps the driver of a sync DSN for its asyncio counterpart (asyncpg, aiosqlite)."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def _optional_int(value: Optional[str]) -> Optional[int]:
+    return None if value in (None, "") else int(value)
+
+
+def enable_sqlite_savepoints(engine: Engine) -> Engine:
+    """Makes pysqlite emit BEGIN itself, so SAVEPOINTs nest inside the session transaction.
+
+    Left to its defaults, the driver only opens a transaction before DML: a SAVEPOINT issued
+    first starts one of its own, and releasing it commits the outer transaction's work.
+    """
+    @event.listens_for(engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+@dataclass
+class EngineSettings:
+    """Connection settings of one engine. None keeps the SQLAlchemy default."""
+    url: Optional[str]
+    async_url: Optional[str] = None
+    pool_size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    pool_recycle: Optional[int] = None
+    statement_timeout: Optional[int] = None
+    pool_pre_ping: bool = True
+
+    def engine_options(self, url: str) -> Dict[str, Any]:
+        """Keyword arguments of create_engine / create_async_engine for `url`."""
+        options: Dict[str, Any] = {"pool_pre_ping": self.pool_pre_ping}
+        parsed = make_url(url)
+        # SQLite uses single connection pools that take no sizing arguments.
+        if parsed.get_backend_name() != "sqlite":
+            pool = {"pool_size": self.pool_size, "max_overflow": self.max_overflow, "pool_recycle": self.pool_recycle}
+            options.update({key: value for key, value in pool.items() if value is not None})
+        if self.statement_timeout is not None and parsed.get_backend_name() == "postgresql":
+            if parsed.get_driver_name() == "asyncpg":
+                options["connect_args"] = {"server_settings": {"statement_timeout": str(self.statement_timeout)}}
+            else:
+                options["connect_args"] = {"options": f"-c statement_timeout={self.statement_timeout}"}
+        return options
+
+
+def settings_from_config() -> Dict[str, EngineSettings]:
+    """Builds the primary and replica settings from models.settings."""
+    primary = EngineSettings(
+        url=FINANCIAL_DATA_DB,
+        async_url=FINANCIAL_DATA_ASYNC_DB,
+        pool_size=_optional_int(FINANCIAL_DATA_DB_POOL_SIZE),
+        max_overflow=_optional_int(FINANCIAL_DATA_DB_MAX_OVERFLOW),
+        pool_recycle=_optional_int(FINANCIAL_DATA_DB_POOL_RECYCLE),
+        statement_timeout=_optional_int(FINANCIAL_DATA_DB_STATEMENT_TIMEOUT),
+    )
+    replica = dataclasses.replace(primary, url=FINANCIAL_DATA_DB_REPLICA, async_url=None)
+    return {PRIMARY: primary, REPLICA: replica}
+
+
+class EngineRegistry:
+    """Creates engines on first use and keeps one sync and one async engine per role."""
+
+    def __init__(self, settings: Optional[Dict[str, EngineSettings]] = None):
+        self._settings = settings if settings is not None else settings_from_config()
+        self._engines: Dict[str, Engine] = {}
+        self._async_engines: Dict[str, AsyncEngine] = {}
+        self._lock = threading.Lock()
+
+    def _role(self, role: str) -> str:
+        if role not in self._settings:
+            raise ValueError(f"Unknown engine role {role!r}, expected one of {sorted(self._settings)}.")
+        return role if self._settings[role].url else PRIMARY
+
+    def settings(self, role: str = PRIMARY) -> EngineSettings:
+        """Returns the settings used by the engines of `role`."""
+        return self._settings[self._role(role)]
+
+    def configure(self, role: str = PRIMARY, **options: Any) -> None:
+        """Overrides settings of `role` (e.g. url, pool_size, statement_timeout), disposing its engines."""
+        with self._lock:
+            self._settings[role] = dataclasses.replace(self._settings[role], **options)
+            self._dispose_role(role)
+
+    def set_engine(self, role: str, engine: Engine) -> None:
+        """Registers an existing engine for `role`, e.g. a test database."""
+        with self._lock:
+            self._engines[role] = instrumentation.instrument_engine(engine, role)
+            if not self._settings[role].url:
+                self._settings[role] = dataclasses.replace(self._settings[role], url=engine.url.render_as_string(False))
+
+    def get(self, role: str = PRIMARY) -> Engine:
+        """Returns the engine of `role`, creating it on first call."""
+        role = self._role(role)
+        engine = self._engines.get(role)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(role)
+                if engine is None:
+                    settings = self._settings[role]
+                    engine = create_engine(settings.url, **settings.engine_options(settings.url))
+                    if engine.dialect.name == "sqlite":
+                        enable_sqlite_savepoints(engine)
+                    self._engines[role] = instrumentation.instrument_engine(engine, role)
+        return engine
+
+    def get_async(self, role: str = PRIMARY) -> AsyncEngine:
+        """Returns the asyncio engine of `role`, creating it on first call."""
+        role = self._role(role)
+        engine = self._async_engines.get(role)
+        if engine is None:
+            with self._lock:
+                engine = self._async_engines.get(role)
+                if engine is None:
+                    settings = self._settings[role]
+                    url = settings.async_url or async_database_url(settings.url)
+                    engine = create_async_engine(url, **settings.engine_options(url))
+                    instrumentation.instrument_engine(engine.sync_engine, role)
+                    self._async_engines[role] = engine
+        return engine
+
+    def _dispose_role(self, role: str) -> None:
+        engine = self._engines.pop(role, None)
+        if engine is not None:
+            engine.dispose()
+        async_engine = self._async_engines.pop(role, None)
+        if async_engine is not None:
+            async_engine.sync_engine.dispose()
+
+    def dispose(self) -> None:
+        """Closes every pooled connection and forgets the engines; they are recreated on next use."""
+        with self._lock:
+            for role in list(self._engines) + list(self._async_engines):
+                self._dispose_role(role)
+
+    def reset_after_fork(self) -> None:
+        """Empties the pools inherited from a parent process without closing its connections."""
+        for engine in self._engines.values():
+            engine.dispose(close=False)
+        for async_engine in self._async_engines.values():
+            async_engine.sync_engine.dispose(close=False)
+
+
+engine_registry = EngineRegistry()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DECIMAL, Date, ForeignKey, ForeignKeyConstraint
+from sqlalchemy import Column, Integer, String, DECIMAL, Date, ForeignKey, ForeignKeyConstraint, Index
 from sqlalchemy.orm import relationship
 
 from stock_analyser_lib.models.base import BaseModel  # Importing Base from base.py
@@ -6,11 +6,15 @@ from stock_analyser_lib.enums.entity import Entity  # Importing Entity from enti
 
 
 class HistoricalData(BaseModel):
-    """Represents historical stock data (OHLCV + technical indicators)."""
+    """Represents historical stock data (OHLCV + technical indicators).
+
+    On PostgreSQL the table is range partitioned by year on `date`, with a (id, date)
+    primary key, see the partition_historical_data_by_year migration.
+    """
     __tablename__ = Entity.HISTORICAL_DATA.value
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    symbol = Column(String(10), ForeignKey('stocks.symbol'))
+    symbol = Column(String(10), ForeignKey('stocks.symbol', ondelete='CASCADE'))
     date = Column(Date, nullable=False)
     open = Column(DECIMAL(10, 2))
     high = Column(DECIMAL(10, 2))
@@ -27,7 +31,11 @@ class HistoricalData(BaseModel):
     stock = relationship("Stock", back_populates="historical_data")
 
     __table_args__ = (ForeignKeyConstraint([symbol],
-                                           ['stocks.symbol']), {})
+                                           ['stocks.symbol'], ondelete='CASCADE'),
+                      # Natural key: one bar per symbol and day, used as the upsert conflict target.
+                      Index('uq_historical_data_symbol_date', symbol, date, unique=True),
+                      # Cross-sectional screens: every symbol over a date range.
+                      Index('ix_historical_data_date', date), {})
 
     def __repr__(self):
         return f"<HistoricalData(symbol={self.symbol}, date={self.date}, close={self.close})>"
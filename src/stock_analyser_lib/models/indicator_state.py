@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, JSON
+
+from stock_analyser_lib.models.base import BaseModel
+from stock_analyser_lib.enums.entity import Entity  # Importing Entity from entity.py
+
+
+class IndicatorState(BaseModel):
+    """Rolling per-symbol state used to update the indicators one bar at a time."""
+    __tablename__ = Entity.INDICATOR_STATE.value
+
+    symbol = Column(String(10), ForeignKey('stocks.symbol', ondelete='CASCADE'), primary_key=True)
+    last_date = Column(Date)
+    # Most recent closes, oldest first, as many as the longest SMA window.
+    closes = Column(JSON, nullable=False)
+    observations = Column(Integer, nullable=False)
+    ema_fast = Column(Float)
+    ema_slow = Column(Float)
+    # Sums of the gains/losses while seeding, Wilder's averages afterwards.
+    avg_gain = Column(Float)
+    avg_loss = Column(Float)
+
+    def __repr__(self):
+        return f"<IndicatorState(symbol={self.symbol}, last_date={self.last_date})>"
@@ -0,0 +1,372 @@
+"""Metrics of the repository methods and of the SQL run by the engines.
+
+Disabled by default: every hook returns after a single attribute check until
+`instrumentation.enable` installs a sink or a slow query threshold.
+
+Recorded metrics (labels in braces):
+    repository_call_duration_seconds{method}  histogram of repository calls
+    repository_errors_total{method}           calls that raised
+    repository_rows_returned_total{method}    rows, objects or array items returned
+    repository_rows_written_total{method}     rows inserted or updated by the bulk upserts
+    db_query_duration_seconds{role}           histogram of cursor executions, failed ones included
+    db_query_errors_total{role}               cursor executions that raised
+    db_rows_affected_total{role}              rows affected by INSERT / UPDATE / DELETE
+    db_pool_wait_seconds{role}                histogram of connection pool checkouts
+    db_slow_queries_total{role}               executions above the slow query threshold
+
+Example:
+    sink = instrumentation.enable(InMemorySink(), slow_query_threshold=0.5)
+    ...
+    print(prometheus_text(sink))
+"""
+
+import bisect
+import functools
+import inspect
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from stock_analyser_lib.models.settings import FINANCIAL_DATA_DB_SLOW_QUERY_MS
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the histogram buckets, the last one catching everything.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+# Characters of SQL kept in a slow query log line.
+SLOW_QUERY_SQL_LENGTH = 2000
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsSink:
+    """Receives the measurements. Subclass it to forward them to another metrics system."""
+
+    def increment(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """Adds `value` to a counter."""
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Records one sample of a histogram."""
+
+
+@dataclass
+class Histogram:
+    """Per-bucket (non-cumulative) sample counts, plus the count and sum of the samples."""
+    buckets: Sequence[float] = DEFAULT_BUCKETS
+    counts: List[int] = field(default_factory=list)
+    count: int = 0
+    sum: float = 0.0
+
+    def __post_init__(self):
+        if not self.counts:
+            self.counts = [0] * len(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class InMemorySink(MetricsSink):
+    """Keeps every counter and histogram in memory, for tests, reports or a Prometheus endpoint."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def counter(self, name: str, **labels: str) -> float:
+        """Returns the value of a counter, 0 when never incremented."""
+        return self.counters.get((name, tuple(sorted(labels.items()))), 0.0)
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        """Returns a histogram, None when it has no sample."""
+        return self.histograms.get((name, tuple(sorted(labels.items()))))
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Returns every metric as plain data, e.g. for a JSON report."""
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                "histograms": [
+                    {
+                        "name": name, "labels": dict(labels), "count": histogram.count, "sum": histogram.sum,
+                        "buckets": dict(zip(map(str, histogram.buckets), histogram.counts)),
+                    }
+                    for (name, labels), histogram in sorted(self.histograms.items())
+                ],
+            }
+
+    def reset(self) -> None:
+        """Forgets every recorded value."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs) + "}"
+
+
+def prometheus_text(sink: InMemorySink, namespace: str = "stock_analyser") -> str:
+    """Renders the metrics of `sink` in the Prometheus text exposition format."""
+    lines: List[str] = []
+    with sink._lock:
+        counters = sorted(sink.counters.items())
+        histograms = sorted((key, Histogram(h.buckets, list(h.counts), h.count, h.sum)) for key, h in sink.histograms.items())
+
+    typed = set()
+    for (name, labels), value in counters:
+        metric = f"{namespace}_{name}"
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+    for (name, labels), histogram in histograms:
+        metric = f"{namespace}_{name}"
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            le = "+Inf" if math.isinf(bound) else f"{bound:g}"
+            lines.append(f"{metric}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+        lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.sum:g}")
+        lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+def _rows_returned(result: Any) -> Optional[int]:
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, dict):
+        # Columnar reads: one array per column.
+        for values in result.values():
+            return len(values) if hasattr(values, "__len__") else None
+        return 0
+    return None
+
+
+class Instrumentation:
+    """Process-wide switch and sink of the instrumentation hooks."""
+
+    def __init__(self):
+        self.sink: Optional[MetricsSink] = None
+        self.slow_query_threshold: Optional[float] = None
+        self.active = False
+
+    def enable(self, sink: Optional[MetricsSink] = None, slow_query_threshold: Optional[float] = None) -> Optional[MetricsSink]:
+        """Starts recording into `sink` and/or logging statements slower than `slow_query_threshold` seconds."""
+        self.sink = sink
+        self.slow_query_threshold = slow_query_threshold
+        self.active = sink is not None or slow_query_threshold is not None
+        return sink
+
+    def disable(self) -> None:
+        """Stops recording; the hooks are back to a single attribute check."""
+        self.active = False
+        self.sink = None
+        self.slow_query_threshold = None
+
+    def instrument_engine(self, engine: Engine, role: str = "primary") -> Engine:
+        """Hooks the query, row and pool wait metrics and the slow query log on `engine` (sync engines,
+        or the `sync_engine` of an AsyncEngine). Engines of the engine registry are hooked on creation.
+        """
+        if getattr(engine, "_stock_analyser_instrumented", False):
+            return engine
+        engine._stock_analyser_instrumented = True
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if self.active:
+                conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            self._record_query(conn, cursor, statement, executemany, role, failed=False)
+
+        # A statement that raises never reaches after_cursor_execute: its start time is popped here,
+        # so failures neither pile up in the pooled connection's info nor escape the timings.
+        @event.listens_for(engine, "handle_error")
+        def handle_error(context):
+            if context.connection is None or context.statement is None:
+                return
+            executemany = bool(context.execution_context is not None and context.execution_context.executemany)
+            self._record_query(context.connection, None, context.statement, executemany, role, failed=True)
+
+        # There is no pool event before a checkout, so the pool wait is timed around raw_connection,
+        # which every Connection of the engine goes through.
+        raw_connection = engine.raw_connection
+
+        @functools.wraps(raw_connection)
+        def timed_raw_connection(*args, **kwargs):
+            if self.sink is None:
+                return raw_connection(*args, **kwargs)
+            started = time.perf_counter()
+            connection = raw_connection(*args, **kwargs)
+            self.sink.observe("db_pool_wait_seconds", time.perf_counter() - started, role=role)
+            return connection
+
+        engine.raw_connection = timed_raw_connection
+        return engine
+
+    def _record_query(self, conn: Any, cursor: Any, statement: str, executemany: bool, role: str, failed: bool) -> None:
+        started = conn.info.get("query_started")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        sink = self.sink
+        if sink is not None:
+            sink.observe("db_query_duration_seconds", elapsed, role=role)
+            if failed:
+                sink.increment("db_query_errors_total", role=role)
+            # Statements without a result set (INSERT / UPDATE / DELETE) report their affected rows.
+            elif cursor.description is None and cursor.rowcount > 0:
+                sink.increment("db_rows_affected_total", cursor.rowcount, role=role)
+        threshold = self.slow_query_threshold
+        if threshold is not None and elapsed >= threshold:
+            if sink is not None:
+                sink.increment("db_slow_queries_total", role=role)
+            sql = " ".join(statement.split())
+            if len(sql) > SLOW_QUERY_SQL_LENGTH:
+                sql = sql[:SLOW_QUERY_SQL_LENGTH] + "..."
+            details = (", executemany" if executemany else "") + (", failed" if failed else "")
+            logger.warning(f"Slow query on {role} ({elapsed * 1000:.1f} ms{details}): {sql}")
+
+    def _record_call(self, method: str, started: float, result: Any, failed: bool) -> None:
+        sink = self.sink
+        if sink is None:
+            return
+        sink.observe("repository_call_duration_seconds", time.perf_counter() - started, method=method)
+        if failed:
+            sink.increment("repository_errors_total", method=method)
+            return
+        written = getattr(result, "inserted", None)
+        if written is not None:
+            sink.increment("repository_rows_written_total", written + getattr(result, "updated", 0), method=method)
+            return
+        returned = _rows_returned(result)
+        if returned is not None:
+            sink.increment("repository_rows_returned_total", returned, method=method)
+
+    def instrument_function(self, func: Callable, method: str) -> Callable:
+        """Wraps a plain, generator, coroutine or async generator function so its calls are measured under `method`."""
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if self.sink is None:
+                    return await func(*args, **kwargs)
+                started, result, failed = time.perf_counter(), None, True
+                try:
+                    result = await func(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    self._record_call(method, started, result, failed)
+            return async_wrapper
+
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def async_generator_wrapper(*args, **kwargs):
+                if self.sink is None:
+                    async for item in func(*args, **kwargs):
+                        yield item
+                    return
+                # Measured over the whole iteration, like the generator wrapper below.
+                started, rows, failed = time.perf_counter(), 0, True
+                try:
+                    async for item in func(*args, **kwargs):
+                        count = _rows_returned(item)
+                        rows += 1 if count is None else count
+                        yield item
+                    failed = False
+                finally:
+                    self._record_call(method, started, None, failed)
+                    if not failed and self.sink is not None:
+                        self.sink.increment("repository_rows_returned_total", rows, method=method)
+            return async_generator_wrapper
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if self.sink is None:
+                    yield from func(*args, **kwargs)
+                    return
+                # Measured over the whole iteration; a yielded batch counts its rows, anything else one row.
+                started, rows, failed = time.perf_counter(), 0, True
+                try:
+                    for item in func(*args, **kwargs):
+                        count = _rows_returned(item)
+                        rows += 1 if count is None else count
+                        yield item
+                    failed = False
+                finally:
+                    self._record_call(method, started, None, failed)
+                    if not failed and self.sink is not None:
+                        self.sink.increment("repository_rows_returned_total", rows, method=method)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if self.sink is None:
+                return func(*args, **kwargs)
+            started, result, failed = time.perf_counter(), None, True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                self._record_call(method, started, result, failed)
+        return wrapper
+
+
+# Process-wide instrumentation, see Instrumentation.enable.
+instrumentation = Instrumentation()
+
+if FINANCIAL_DATA_DB_SLOW_QUERY_MS:
+    instrumentation.enable(slow_query_threshold=float(FINANCIAL_DATA_DB_SLOW_QUERY_MS) / 1000)
+
+
+def instrumented(cls: type) -> type:
+    """Class decorator measuring every public static method of a repository as `<Class>.<method>`."""
+    for name, attribute in list(vars(cls).items()):
+        if name.startswith("_") or not isinstance(attribute, staticmethod):
+            continue
+        setattr(cls, name, staticmethod(instrumentation.instrument_function(attribute.__func__, f"{cls.__name__}.{name}")))
+    return cls
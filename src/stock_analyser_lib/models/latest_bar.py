@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DECIMAL, Date, ForeignKey
+
+from stock_analyser_lib.models.base import BaseModel
+from stock_analyser_lib.enums.entity import Entity  # Importing Entity from entity.py
+
+
+class LatestBar(BaseModel):
+    """Most recent historical_data row of every symbol, kept current by the repository write paths."""
+    __tablename__ = Entity.LATEST_BARS.value
+
+    symbol = Column(String(10), ForeignKey('stocks.symbol', ondelete='CASCADE'), primary_key=True)
+    date = Column(Date, nullable=False)
+    open = Column(DECIMAL(10, 2))
+    high = Column(DECIMAL(10, 2))
+    low = Column(DECIMAL(10, 2))
+    close = Column(DECIMAL(10, 2))
+    volume = Column(Integer)
+    rsi = Column(DECIMAL(5, 2))
+    macd = Column(DECIMAL(5, 3))
+    sma_50 = Column(DECIMAL(10, 2))
+    sma_200 = Column(DECIMAL(10, 2))
+    bollinger_upper = Column(DECIMAL(10, 2))
+    bollinger_lower = Column(DECIMAL(10, 2))
+
+    def __repr__(self):
+        return f"<LatestBar(symbol={self.symbol}, date={self.date}, close={self.close})>"
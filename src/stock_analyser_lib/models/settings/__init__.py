@@ -39,3 +39,28 @@ if not financial_data_db or not financial_data_db_schema:
 
 FINANCIAL_DATA_DB = financial_data_db
 FINANCIAL_DATA_DB_SCHEMA = financial_data_db_schema
+
+
+def get_setting(env_name: str, config_key: str) -> Optional[str]:
+    """Reads an optional setting from the env variable `env_name`, then from the FINANCIAL_DATA_DB config section."""
+    value = os.environ.get(env_name)
+    if value is None:
+        value = CONFIG.get('FINANCIAL_DATA_DB', {}).get(config_key)
+    return value
+
+
+# Optional DSN for the asyncio engine, derived from FINANCIAL_DATA_DB when unset.
+FINANCIAL_DATA_ASYNC_DB = get_setting('FINANCIAL_DATA_ASYNC_DB', 'ASYNC_DBCON')
+
+# Optional read replica DSN, used by read-only sessions. Reads go to the primary when unset.
+FINANCIAL_DATA_DB_REPLICA = get_setting('FINANCIAL_DATA_DB_REPLICA', 'REPLICA_DBCON')
+
+# Connection pool tuning, unset values keep the SQLAlchemy defaults.
+FINANCIAL_DATA_DB_POOL_SIZE = get_setting('FINANCIAL_DATA_DB_POOL_SIZE', 'POOL_SIZE')
+FINANCIAL_DATA_DB_MAX_OVERFLOW = get_setting('FINANCIAL_DATA_DB_MAX_OVERFLOW', 'MAX_OVERFLOW')
+FINANCIAL_DATA_DB_POOL_RECYCLE = get_setting('FINANCIAL_DATA_DB_POOL_RECYCLE', 'POOL_RECYCLE')
+# Server-side statement timeout in milliseconds (PostgreSQL only).
+FINANCIAL_DATA_DB_STATEMENT_TIMEOUT = get_setting('FINANCIAL_DATA_DB_STATEMENT_TIMEOUT', 'STATEMENT_TIMEOUT')
+
+# Statements slower than this many milliseconds are logged with their SQL, see models.instrumentation.
+FINANCIAL_DATA_DB_SLOW_QUERY_MS = get_setting('FINANCIAL_DATA_DB_SLOW_QUERY_MS', 'SLOW_QUERY_MS')
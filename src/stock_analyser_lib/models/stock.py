@@ -15,7 +15,8 @@ class Stock(BaseModel):
     industry = Column(String(255))
     market_cap = Column(DECIMAL(20, 2))
 
-    historical_data = relationship("HistoricalData", back_populates="stock")
+    # Bars are removed by the ON DELETE CASCADE of their foreign key, not loaded and deleted one by one.
+    historical_data = relationship("HistoricalData", back_populates="stock", passive_deletes=True)
 
     def __repr__(self):
         return f"<Stock(symbol={self.symbol}, name={self.name})>"
@@ -0,0 +1,320 @@
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql.elements import ColumnElement
+
+from stock_analyser_lib.models.base import BaseModel
+from stock_analyser_lib.models.instrumentation import instrumented
+from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.models.latest_bar import LatestBar
+from stock_analyser_lib.repositories.bulk import UpsertReport, chunked_update, chunked_upsert
+from stock_analyser_lib.repositories.columnar import ARRAY_COLUMNS, rows_to_arrays, select_expressions, validate_columns
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+
+
+@instrumented
+class AsyncHistoricalDataRepository:
+    """Asyncio variant of HistoricalDataRepository, running on the AsyncSession of BaseModel.get_async_session.
+
+    Shares the natural key, the stream batch size and the window cache of HistoricalDataRepository,
+    so writes made through either repository invalidate the same cached windows.
+    """
+
+    @staticmethod
+    async def bulk_upsert_historical_data(data_list: List[dict], chunk_size: Optional[int] = None) -> UpsertReport:
+        """Performs bulk Upsert (Insert or Update) on historical data, keyed on (symbol, date).
+
+        Runs the chunked upsert of HistoricalDataRepository.bulk_upsert_historical_data on the
+        async connection: chunks below the bind parameter limit, failing rows isolated and rejected.
+
+        Args:
+            data_list (List[dict]): Rows keyed by column name.
+            chunk_size (int, optional): Rows per statement. Defaults to the largest size allowed.
+        """
+        written: Dict[str, List[date]] = {}
+        data_list = HistoricalDataRepository._track_spans(data_list, None, written)
+
+        def upsert(sync_session):
+            report = chunked_upsert(
+                sync_session, HistoricalData.__table__, data_list, HistoricalDataRepository.NATURAL_KEY, chunk_size
+            )
+            HistoricalDataRepository._refresh_latest_bars(sync_session, written)
+            return report
+
+        async with BaseModel.get_async_session() as session:
+            report = await session.run_sync(upsert)
+            BaseModel.logger.info(
+                f"Bulk historical_data upsert: {report.inserted} inserted, {report.updated} updated, "
+                f"{len(report.rejected)} rejected."
+            )
+        HistoricalDataRepository._invalidate_spans(written)
+        return report
+
+    @staticmethod
+    async def bulk_update_historical_data(data_list: List[dict], chunk_size: Optional[int] = None) -> UpsertReport:
+        """Updates a subset of the columns of existing bars, like HistoricalDataRepository.bulk_update_historical_data.
+
+        Args:
+            data_list (List[dict]): Rows holding symbol, date and the columns to write.
+            chunk_size (int, optional): Rows per statement. Defaults to the largest size allowed.
+        """
+        written: Dict[str, List[date]] = {}
+        data_list = HistoricalDataRepository._track_spans(data_list, None, written)
+
+        def update(sync_session):
+            report = chunked_update(
+                sync_session, HistoricalData.__table__, data_list, HistoricalDataRepository.NATURAL_KEY, chunk_size
+            )
+            HistoricalDataRepository._refresh_latest_bars(sync_session, written)
+            return report
+
+        async with BaseModel.get_async_session() as session:
+            report = await session.run_sync(update)
+            BaseModel.logger.info(
+                f"Bulk historical_data update: {report.updated} updated, {len(report.rejected)} rejected."
+            )
+        HistoricalDataRepository._invalidate_spans(written)
+        return report
+
+    @staticmethod
+    async def add_historical_data(
+            symbol: str, date: date, open: float,
+            high: float, low: float, close: float,
+            volume: int, rsi: Optional[float] = None,
+            macd: Optional[float] = None, sma_50: Optional[float] = None,
+            sma_200: Optional[float] = None, bollinger_upper: Optional[float] = None,
+            bollinger_lower: Optional[float] = None):
+        """Adds a new historical data entry, replacing the one already stored for the same symbol and date."""
+        values = dict(
+            symbol=symbol, date=date, open=open, high=high, low=low, close=close, volume=volume,
+            rsi=rsi, macd=macd, sma_50=sma_50, sma_200=sma_200,
+            bollinger_upper=bollinger_upper, bollinger_lower=bollinger_lower
+        )
+        stmt = insert(HistoricalData).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=HistoricalDataRepository.NATURAL_KEY,
+            set_={key: getattr(stmt.excluded, key) for key in values if key not in HistoricalDataRepository.NATURAL_KEY}
+        )
+        async with BaseModel.get_async_session() as session:
+            await session.execute(stmt)
+            await AsyncHistoricalDataRepository._refresh_latest_bars(session, symbol)
+            BaseModel.logger.debug(f"Historical data for {symbol} on {date} added successfully.")
+        HistoricalDataRepository._invalidate([values])
+
+    @staticmethod
+    async def update_historical_data(symbol: str, date: date, **kwargs):
+        """Updates an existing historical data record.
+
+        Args:
+            symbol (str): The stock symbol.
+            date (date): The date of the historical data to update.
+            **kwargs: Key-value pairs of fields to update (e.g., close=110.0).
+        """
+        async with BaseModel.get_async_session() as session:
+            historical_data = await AsyncHistoricalDataRepository._first(session, symbol=symbol, date=date)
+            if historical_data:
+                for key, value in kwargs.items():
+                    if hasattr(historical_data, key):
+                        setattr(historical_data, key, value)
+                await session.flush()
+                await AsyncHistoricalDataRepository._refresh_latest_bars(session, symbol)
+                BaseModel.logger.debug(f"Historical data for {symbol} on {date} updated successfully.")
+            else:
+                BaseModel.logger.warning(f"No historical data found for {symbol} on {date}.")
+        HistoricalDataRepository._invalidate([{"symbol": symbol, "date": date}])
+
+    @staticmethod
+    async def get_historical_data(
+            symbol: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[HistoricalData]:
+        """Retrieves historical data for a stock within an optional date range, through the window cache when enabled.
+
+        Like HistoricalDataRepository.get_historical_data, cached windows are read from the primary
+        and a window read while its symbol is invalidated is not cached.
+        """
+        cache = HistoricalDataRepository.cache
+        if cache is not None:
+            cached = cache.get(symbol, start_date, end_date)
+            if cached is not None:
+                return cached
+            generation = cache.generation(symbol)
+
+        stmt = select(HistoricalData).where(HistoricalData.symbol == symbol)
+        if start_date:
+            stmt = stmt.where(HistoricalData.date >= start_date)
+        if end_date:
+            stmt = stmt.where(HistoricalData.date <= end_date)
+        async with BaseModel.get_async_session(read_only=cache is None) as session:
+            data = list(await session.scalars(stmt.order_by(HistoricalData.date)))
+
+        if cache is not None:
+            cache.put(symbol, start_date, end_date, data, generation)
+        return data
+
+    @staticmethod
+    async def get_historical_arrays(
+            symbol: str,
+            start_date: Optional[date] = None,
+            end_date: Optional[date] = None,
+            columns: Sequence[str] = ARRAY_COLUMNS) -> Dict[str, np.ndarray]:
+        """Retrieves historical data for a stock as NumPy arrays, typed like HistoricalDataRepository.get_historical_arrays."""
+        columns = validate_columns(columns)
+        stmt = select(HistoricalData.date, *select_expressions(columns)).where(HistoricalData.symbol == symbol)
+        if start_date:
+            stmt = stmt.where(HistoricalData.date >= start_date)
+        if end_date:
+            stmt = stmt.where(HistoricalData.date <= end_date)
+        async with BaseModel.get_async_session(read_only=True) as session:
+            rows = (await session.execute(stmt.order_by(HistoricalData.date))).all()
+        return rows_to_arrays(rows, columns)
+
+    @staticmethod
+    async def get_latest_bars(symbols: Optional[Sequence[str]] = None) -> List[LatestBar]:
+        """Retrieves the most recent bar of every symbol (or of `symbols`) from the latest_bars snapshot."""
+        stmt = select(LatestBar).order_by(LatestBar.symbol)
+        if symbols is not None:
+            stmt = stmt.where(LatestBar.symbol.in_(list(symbols)))
+        async with BaseModel.get_async_session(read_only=True) as session:
+            return list(await session.scalars(stmt))
+
+    @staticmethod
+    async def get_historical_data_by_symbol(symbol: str) -> List[HistoricalData]:
+        """Fetch historical data by stock symbol."""
+        return await AsyncHistoricalDataRepository._all(HistoricalData.symbol == symbol)
+
+    @staticmethod
+    async def get_historical_data_by_date(date: date) -> List[HistoricalData]:
+        """Fetch historical data by specific date."""
+        return await AsyncHistoricalDataRepository._all(HistoricalData.date == date)
+
+    @staticmethod
+    async def get_historical_data_by_date_range(start_date: date, end_date: date) -> List[HistoricalData]:
+        """Fetch historical data within a date range."""
+        return await AsyncHistoricalDataRepository._all(HistoricalData.date.between(start_date, end_date))
+
+    @staticmethod
+    async def iter_historical_data_by_date_range(
+            start_date: date, end_date: date, batch_size: Optional[int] = None) -> AsyncIterator[HistoricalData]:
+        """Streams historical data within a date range, fetching `batch_size` rows per round trip."""
+        async for data in AsyncHistoricalDataRepository._stream(HistoricalData.date.between(start_date, end_date), batch_size):
+            yield data
+
+    @staticmethod
+    async def get_historical_data_by_symbol_and_date(symbol: str, date: date) -> Optional[HistoricalData]:
+        """Fetch historical data by stock symbol and date."""
+        async with BaseModel.get_async_session(read_only=True) as session:
+            return await AsyncHistoricalDataRepository._first(session, symbol=symbol, date=date)
+
+    @staticmethod
+    async def get_historical_data_by_symbol_and_date_range(symbol: str, start_date: date, end_date: date) -> List[HistoricalData]:
+        """Fetch historical data by stock symbol within a date range."""
+        return await AsyncHistoricalDataRepository._all(
+            HistoricalData.symbol == symbol, HistoricalData.date.between(start_date, end_date)
+        )
+
+    @staticmethod
+    async def delete_historical_data(symbol: str, date: date) -> int:
+        """Deletes historical data for a specific stock and date.
+
+        Returns:
+            int: Number of rows deleted (0 or 1).
+        """
+        return await AsyncHistoricalDataRepository.bulk_delete_historical_data(
+            symbols=[symbol], start_date=date, end_date=date
+        )
+
+    @staticmethod
+    async def bulk_delete_historical_data(
+            symbols: Optional[Sequence[str]] = None,
+            start_date: Optional[date] = None,
+            end_date: Optional[date] = None,
+            batch_size: Optional[int] = None) -> int:
+        """Deletes bars in bounded batches, like HistoricalDataRepository.bulk_delete_historical_data.
+
+        Returns:
+            int: Number of rows deleted.
+        """
+        size = batch_size or HistoricalDataRepository.DELETE_BATCH_SIZE
+        deleted = 0
+        affected = set()
+        for condition in HistoricalDataRepository._delete_conditions(symbols, start_date, end_date):
+            async with BaseModel.get_async_session() as session:
+                affected.update(await session.scalars(select(HistoricalData.symbol).where(condition).distinct()))
+            while True:
+                async with BaseModel.get_async_session() as session:
+                    count = (await session.execute(HistoricalDataRepository._delete_batch(condition, size))).rowcount
+                deleted += count
+                if count < size:
+                    break
+
+        async with BaseModel.get_async_session() as session:
+            await session.run_sync(lambda sync_session: HistoricalDataRepository._refresh_latest_bars(sync_session, affected))
+        HistoricalDataRepository._invalidate_deleted(affected, start_date, end_date)
+        BaseModel.logger.info(f"Deleted {deleted} historical_data rows of {len(affected)} symbols.")
+        return deleted
+
+    @staticmethod
+    async def get_historical_data_by_rsi(rsi: float) -> List[HistoricalData]:
+        return await AsyncHistoricalDataRepository._all(HistoricalData.rsi == rsi)
+
+    @staticmethod
+    async def get_historical_data_by_macd(macd: float) -> List[HistoricalData]:
+        return await AsyncHistoricalDataRepository._all(HistoricalData.macd == macd)
+
+    @staticmethod
+    async def get_historical_data_by_sma_50(sma_50: float) -> List[HistoricalData]:
+        return await AsyncHistoricalDataRepository._all(HistoricalData.sma_50 == sma_50)
+
+    @staticmethod
+    async def get_historical_data_by_sma_200(sma_200: float) -> List[HistoricalData]:
+        return await AsyncHistoricalDataRepository._all(HistoricalData.sma_200 == sma_200)
+
+    @staticmethod
+    async def get_historical_data_by_bollinger_upper(bollinger_upper: float) -> List[HistoricalData]:
+        return await AsyncHistoricalDataRepository._all(HistoricalData.bollinger_upper == bollinger_upper)
+
+    @staticmethod
+    async def get_historical_data_by_bollinger_lower(bollinger_lower: float) -> List[HistoricalData]:
+        return await AsyncHistoricalDataRepository._all(HistoricalData.bollinger_lower == bollinger_lower)
+
+    @staticmethod
+    async def get_historical_data_by_volume(volume: int) -> List[HistoricalData]:
+        return await AsyncHistoricalDataRepository._all(HistoricalData.volume == volume)
+
+    @staticmethod
+    async def get_historical_data_by_price(price: float) -> List[HistoricalData]:
+        return await AsyncHistoricalDataRepository._all(HistoricalData.close == price)
+
+    @staticmethod
+    async def get_historical_data_by_price_range(min_price: float, max_price: float) -> List[HistoricalData]:
+        return await AsyncHistoricalDataRepository._all(HistoricalData.close.between(min_price, max_price))
+
+    @staticmethod
+    async def iter_historical_data_by_price_range(
+            min_price: float, max_price: float, batch_size: Optional[int] = None) -> AsyncIterator[HistoricalData]:
+        """Streams historical data within a close price range, fetching `batch_size` rows per round trip."""
+        async for data in AsyncHistoricalDataRepository._stream(HistoricalData.close.between(min_price, max_price), batch_size):
+            yield data
+
+    @staticmethod
+    async def _refresh_latest_bars(session: Any, symbol: str):
+        await session.run_sync(lambda sync_session: HistoricalDataRepository._refresh_latest_bars(sync_session, [symbol]))
+
+    @staticmethod
+    async def _first(session: Any, **filters: Any) -> Optional[HistoricalData]:
+        return (await session.scalars(select(HistoricalData).filter_by(**filters).limit(1))).first()
+
+    @staticmethod
+    async def _all(*conditions: ColumnElement[bool]) -> List[HistoricalData]:
+        async with BaseModel.get_async_session(read_only=True) as session:
+            return list(await session.scalars(select(HistoricalData).where(*conditions)))
+
+    @staticmethod
+    async def _stream(condition: ColumnElement[bool], batch_size: Optional[int]) -> AsyncIterator[HistoricalData]:
+        batch_size = batch_size or HistoricalDataRepository.STREAM_BATCH_SIZE
+        stmt = select(HistoricalData).where(condition).execution_options(yield_per=batch_size)
+        async with BaseModel.get_async_session(read_only=True) as session:
+            async for data in await session.stream_scalars(stmt):
+                yield data
@@ -0,0 +1,112 @@
+from typing import Optional, List, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.inspection import inspect
+
+from stock_analyser_lib.models.stock import Stock
+from stock_analyser_lib.models.base import BaseModel
+from stock_analyser_lib.models.instrumentation import instrumented
+from stock_analyser_lib.repositories.async_historical_data_repo import AsyncHistoricalDataRepository
+from stock_analyser_lib.repositories.bulk import UpsertReport, chunked_upsert
+from stock_analyser_lib.repositories.stock_repo import StockRepository
+from stock_analyser_lib.repositories.stock_universe import stock_universe
+
+
+@instrumented
+class AsyncStockRepository:
+    """Asyncio variant of StockRepository, running on the AsyncSession of BaseModel.get_async_session."""
+
+    @staticmethod
+    async def bulk_upsert_historical_data(data_list: List[dict], chunk_size: Optional[int] = None) -> UpsertReport:
+        """Performs bulk Upsert (Insert or Update) on stocks, chunked like StockRepository.bulk_upsert_historical_data.
+
+        Args:
+            data_list (List[dict]): Rows keyed by column name.
+            chunk_size (int, optional): Rows per statement. Defaults to the largest size allowed.
+        """
+        primary_keys = [key.name for key in inspect(Stock).primary_key]
+        async with BaseModel.get_async_session() as session:
+            report = await session.run_sync(
+                lambda sync_session: chunked_upsert(sync_session, Stock.__table__, data_list, primary_keys, chunk_size)
+            )
+            BaseModel.logger.info(
+                f"Bulk stocks upsert: {report.inserted} inserted, {report.updated} updated, "
+                f"{len(report.rejected)} rejected."
+            )
+        stock_universe.invalidate()
+        return report
+
+    @staticmethod
+    async def add_stock(
+            symbol: str,
+            name: str,
+            sector: Optional[str] = None,
+            industry: Optional[str] = None,
+            market_cap: Optional[float] = None):
+        """Adds a new stock to the database."""
+        async with BaseModel.get_async_session() as session:
+            stock = Stock(symbol=symbol, name=name, sector=sector, industry=industry, market_cap=market_cap)
+            await session.merge(stock)
+            BaseModel.logger.debug(f"Stock {symbol} added successfully.")
+        stock_universe.invalidate()
+
+    @staticmethod
+    async def get_stock_by_symbol(symbol: str) -> Optional[Stock]:
+        """Retrieves a stock by its symbol."""
+        async with BaseModel.get_async_session(read_only=True) as session:
+            return await session.get(Stock, symbol)
+
+    @staticmethod
+    async def get_stock_by_sector(sector: str) -> Optional[Stock]:
+        """Retrieves the first stock of a sector."""
+        async with BaseModel.get_async_session(read_only=True) as session:
+            return (await session.scalars(select(Stock).filter_by(sector=sector).limit(1))).first()
+
+    @staticmethod
+    async def get_stock_by_industry(industry: str) -> Optional[Stock]:
+        """Retrieves the first stock of an industry."""
+        async with BaseModel.get_async_session(read_only=True) as session:
+            return (await session.scalars(select(Stock).filter_by(industry=industry).limit(1))).first()
+
+    @staticmethod
+    async def get_all_stocks() -> List[Stock]:
+        """Retrieves all stocks from the database."""
+        async with BaseModel.get_async_session(read_only=True) as session:
+            return list(await session.scalars(select(Stock)))
+
+    @staticmethod
+    async def update_stock(symbol: str, **kwargs):
+        """Updates an existing stock record."""
+        async with BaseModel.get_async_session() as session:
+            stock = await session.get(Stock, symbol)
+            if stock:
+                for key, value in kwargs.items():
+                    if hasattr(stock, key):
+                        setattr(stock, key, value)
+        stock_universe.invalidate()
+
+    @staticmethod
+    async def delete_stock(symbol: str) -> int:
+        """Deletes a stock from the database, with its bars, latest bar and indicator state.
+
+        Returns:
+            int: Number of stocks deleted (0 or 1).
+        """
+        return await AsyncStockRepository.delete_stocks([symbol])
+
+    @staticmethod
+    async def delete_stocks(symbols: Sequence[str], batch_size: Optional[int] = None) -> int:
+        """Deletes stocks and everything referencing them, like StockRepository.delete_stocks.
+
+        Returns:
+            int: Number of stocks deleted.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return 0
+        bars = await AsyncHistoricalDataRepository.bulk_delete_historical_data(symbols=symbols, batch_size=batch_size)
+        async with BaseModel.get_async_session() as session:
+            deleted = await session.run_sync(lambda sync_session: StockRepository._delete_rows(sync_session, symbols))
+        BaseModel.logger.info(f"Deleted {deleted} stocks and {bars} historical_data rows.")
+        stock_universe.invalidate()
+        return deleted
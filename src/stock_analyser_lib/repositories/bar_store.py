@@ -0,0 +1,198 @@
+"""Local on-disk copy of historical_data, read through memory-mapped NumPy files.
+
+Layout: `<root>/<SYMBOL>/<column>.npy`, one 1-D array per column ("date" as datetime64[D],
+prices and indicators as float64, volume as int64), ordered by date. The last stored date
+of a symbol is its watermark: `sync` only fetches the bars dated after it.
+
+Usage:
+    python -m stock_analyser_lib.repositories.bar_store /data/bars [SYMBOL ...]
+"""
+
+import argparse
+import io
+import os
+import shutil
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from stock_analyser_lib.models.base import BaseModel
+from stock_analyser_lib.repositories.columnar import ARRAY_COLUMNS, validate_columns
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+from stock_analyser_lib.repositories.stock_universe import stock_universe
+
+
+DATE_DTYPE = np.dtype("datetime64[D]")
+
+
+def _header(dtype: np.dtype, length: int) -> bytes:
+    buffer = io.BytesIO()
+    np.lib.format.write_array_header_1_0(buffer, {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (length,)})
+    return buffer.getvalue()
+
+
+def _append(path: str, values: np.ndarray, length: int):
+    """Appends `values` after the first `length` items of a 1-D .npy file, creating it if needed.
+
+    The data is written before the header, so a crash leaves the previous array readable.
+    Trailing bytes of an interrupted append are overwritten by the next one.
+    """
+    if not os.path.exists(path):
+        np.save(path, values)
+        return
+    with open(path, "r+b") as f:
+        np.lib.format.read_magic(f)
+        np.lib.format.read_array_header_1_0(f)
+        offset = f.tell()
+        header = _header(values.dtype, length + len(values))
+        if len(header) != offset:
+            # The header outgrew its padding: rewrite the whole file.
+            existing = np.load(path, mmap_mode="r")[:length]
+            temporary = path + ".tmp"
+            with open(temporary, "wb") as rewritten:
+                np.save(rewritten, np.concatenate([existing, values]))
+            os.replace(temporary, path)
+            return
+        f.seek(offset + length * values.dtype.itemsize)
+        f.write(values.tobytes())
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+        f.seek(0)
+        f.write(header)
+
+
+class LocalBarStore:
+    """Memory-mapped local store of daily bars, synced incrementally from the database.
+
+    Reads never touch the database: `load` maps the column files read-only and returns
+    views on them, so only the pages actually used are read from disk.
+
+    Example:
+        store = LocalBarStore("/data/bars")
+        store.sync()
+        bars = store.load("AAPL", columns=("close",), start_date=date(2020, 1, 1))
+    """
+
+    def __init__(self, root: str, columns: Sequence[str] = ARRAY_COLUMNS):
+        """
+        Args:
+            root (str): Directory of the store, created if needed.
+            columns (Sequence[str]): Columns stored, a subset of ARRAY_COLUMNS.
+        """
+        self.root = root
+        self.columns = validate_columns(columns)
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, symbol: str, column: str) -> str:
+        return os.path.join(self.root, symbol, f"{column}.npy")
+
+    def symbols(self) -> List[str]:
+        """Returns the symbols present in the store, sorted."""
+        return sorted(
+            entry for entry in os.listdir(self.root) if os.path.exists(self._path(entry, "date"))
+        )
+
+    def _dates(self, symbol: str) -> np.ndarray:
+        path = self._path(symbol, "date")
+        if not os.path.exists(path):
+            return np.empty(0, dtype=DATE_DTYPE)
+        return np.load(path, mmap_mode="r")
+
+    def watermark(self, symbol: str) -> Optional[date]:
+        """Returns the last stored date of `symbol`, or None when it has no bars in the store."""
+        dates = self._dates(symbol)
+        return dates[-1].item() if len(dates) else None
+
+    def load(
+            self,
+            symbol: str,
+            columns: Optional[Sequence[str]] = None,
+            start_date: Optional[date] = None,
+            end_date: Optional[date] = None) -> Dict[str, np.ndarray]:
+        """Returns the stored bars of `symbol` as read-only memory-mapped arrays (zero-copy).
+
+        Args:
+            symbol (str): The stock symbol.
+            columns (Sequence[str], optional): Columns to return. Defaults to every stored column.
+            start_date (date, optional): First date included.
+            end_date (date, optional): Last date included.
+
+        Returns:
+            Dict[str, np.ndarray]: A "date" array plus one array per column, empty when the symbol is not stored.
+        """
+        columns = self.columns if columns is None else validate_columns(columns)
+        unknown = [column for column in columns if column not in self.columns]
+        if unknown:
+            raise ValueError(f"Columns {unknown} are not kept by this store, expected a subset of {self.columns}.")
+
+        dates = self._dates(symbol)
+        # The date file is written last: other columns may hold the tail of an interrupted sync.
+        length = len(dates)
+        start = 0 if start_date is None else int(np.searchsorted(dates, np.datetime64(start_date, "D"), side="left"))
+        stop = length if end_date is None else int(np.searchsorted(dates, np.datetime64(end_date, "D"), side="right"))
+
+        arrays = {"date": dates[start:stop]}
+        for column in columns:
+            if length:
+                arrays[column] = np.load(self._path(symbol, column), mmap_mode="r")[start:stop]
+            else:
+                arrays[column] = np.empty(0, dtype=np.float64 if column != "volume" else np.int64)
+        return arrays
+
+    def load_many(self, symbols: Iterable[str], columns: Optional[Sequence[str]] = None, **kwargs) -> Dict[str, Dict[str, np.ndarray]]:
+        """Returns `load` of every symbol, keyed by symbol."""
+        return {symbol: self.load(symbol, columns, **kwargs) for symbol in symbols}
+
+    def sync(self, symbols: Optional[Iterable[str]] = None) -> int:
+        """Appends the bars dated after each symbol's watermark, fetched through HistoricalDataRepository.
+
+        Only new dates are picked up: bars corrected in the database at or before the watermark
+        need a `drop` of the symbol followed by a sync.
+
+        Args:
+            symbols (Iterable[str], optional): Symbols to sync. Defaults to the whole stock universe.
+
+        Returns:
+            int: Number of bars appended.
+        """
+        symbols = sorted(stock_universe.symbols() if symbols is None else set(symbols))
+        watermarks = {symbol: self.watermark(symbol) for symbol in symbols}
+        appended, synced = 0, 0
+        # Each batch is written before the next one is fetched.
+        for arrays in HistoricalDataRepository.iter_historical_arrays_since(watermarks, self.columns):
+            # Rows are ordered by symbol: every symbol is one contiguous slice.
+            fetched, starts = np.unique(arrays["symbol"], return_index=True)
+            stops = np.append(starts[1:], len(arrays["symbol"]))
+            for symbol, start, stop in zip(fetched, starts, stops):
+                self._append_bars(str(symbol), {name: values[start:stop] for name, values in arrays.items()})
+            appended += len(arrays["symbol"])
+            synced += len(fetched)
+
+        BaseModel.logger.info(f"Bar store {self.root}: {appended} bars appended for {synced} of {len(symbols)} symbols.")
+        return appended
+
+    def _append_bars(self, symbol: str, arrays: Dict[str, np.ndarray]):
+        os.makedirs(os.path.join(self.root, symbol), exist_ok=True)
+        length = len(self._dates(symbol))
+        for column in self.columns:
+            _append(self._path(symbol, column), np.ascontiguousarray(arrays[column]), length)
+        _append(self._path(symbol, "date"), arrays["date"].astype(DATE_DTYPE), length)
+
+    def drop(self, symbol: str):
+        """Removes `symbol` from the store; the next sync fetches all of its bars again."""
+        shutil.rmtree(os.path.join(self.root, symbol), ignore_errors=True)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Incrementally syncs a local memory-mapped bar store from historical_data.")
+    parser.add_argument("root", help="Directory of the bar store.")
+    parser.add_argument("symbols", nargs="*", help="Symbols to sync, every stock by default.")
+    args = parser.parse_args(argv)
+    LocalBarStore(args.root).sync(args.symbols or None)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
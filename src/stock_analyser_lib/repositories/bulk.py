@@ -0,0 +1,429 @@
+import csv
+import io
+import math
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple, Union
+from uuid import uuid4
+
+from sqlalchemy import Table, and_, bindparam, cast, column, func, literal_column, select, text, tuple_, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from stock_analyser_lib.repositories.validation import RejectedRow, enforces_foreign_keys, validate_rows
+
+
+Row = Union[Mapping[str, Any], Sequence[Any]]
+
+# Size of the CSV chunks handed to COPY.
+COPY_CHUNK_SIZE = 1 << 16
+
+# PostgreSQL accepts at most 65,535 bind parameters in a single statement.
+MAX_BIND_PARAMETERS = 65535
+
+
+@dataclass
+class UpsertReport:
+    """Outcome of a bulk upsert."""
+    inserted: int = 0
+    updated: int = 0
+    rejected: List[RejectedRow] = field(default_factory=list)
+    # Rows already stored that ON CONFLICT DO NOTHING left untouched (rows without update columns).
+    skipped: int = 0
+
+    def merge(self, other: "UpsertReport") -> "UpsertReport":
+        """Adds the counts of another report to this one."""
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.skipped += other.skipped
+        self.rejected.extend(other.rejected)
+        return self
+
+
+def default_columns(table: Table) -> List[str]:
+    """Returns the columns a client is expected to provide (everything but autoincrement keys)."""
+    return [column.name for column in table.columns if column.autoincrement is not True]
+
+
+class CsvRowStream(io.TextIOBase):
+    """File-like object that serialises rows to CSV lazily, as COPY reads them.
+
+    Only one encoded chunk is held in memory at a time, so the memory footprint
+    does not depend on the number of rows streamed.
+    """
+
+    def __init__(self, rows: Iterable[Row], columns: Sequence[str]):
+        self._rows = iter(rows)
+        self._columns = list(columns)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._pending = ""
+        self.row_count = 0
+
+    def _values(self, row: Row) -> List[Any]:
+        if isinstance(row, Mapping):
+            values = [row.get(column) for column in self._columns]
+        else:
+            if len(row) != len(self._columns):
+                raise ValueError(f"Expected {len(self._columns)} values per row, got {len(row)}: {row!r}")
+            values = list(row)
+        # NaN would be accepted by NUMERIC columns, store it as NULL instead.
+        return [None if isinstance(value, float) and math.isnan(value) else value for value in values]
+
+    def _fill(self, size: int) -> None:
+        for row in self._rows:
+            self._writer.writerow(self._values(row))
+            self.row_count += 1
+            if self._buffer.tell() >= size:
+                break
+        self._pending += self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: Optional[int] = -1) -> str:
+        if size is None or size < 0:
+            size = COPY_CHUNK_SIZE
+        if len(self._pending) < size:
+            self._fill(size - len(self._pending))
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+
+def _peek(rows: Iterable[Row]) -> Tuple[Optional[Row], Iterator[Row]]:
+    iterator = iter(rows)
+    for first in iterator:
+        return first, chain([first], iterator)
+    return None, iterator
+
+
+def copy_upsert(
+        session: Session,
+        table: Table,
+        rows: Iterable[Row],
+        key_columns: Sequence[str],
+        columns: Optional[Sequence[str]] = None) -> UpsertReport:
+    """Streams rows through PostgreSQL COPY into a temporary staging table and merges them into `table`.
+
+    Args:
+        session (Session): Session whose connection (and transaction) is used.
+        table (Table): Target table.
+        rows (Iterable): Dicts keyed by column name, or tuples ordered like `columns`.
+        key_columns (Sequence[str]): Columns of the unique index used as conflict target.
+        columns (Sequence[str], optional): Columns provided by the rows. Defaults to the keys
+            of the first dict, or to every non-autoincrement column for tuples.
+    """
+    first, rows = _peek(rows)
+    if first is None:
+        return UpsertReport()
+
+    if columns is None:
+        if isinstance(first, Mapping):
+            columns = [name for name in default_columns(table) if name in first]
+        else:
+            columns = default_columns(table)
+    missing_keys = [key for key in key_columns if key not in columns]
+    if missing_keys:
+        raise ValueError(f"Key columns {missing_keys} are missing from the streamed columns.")
+
+    connection = session.connection()
+    preparer = connection.dialect.identifier_preparer
+    target = preparer.format_table(table)
+    stage = preparer.quote(f"_stage_{table.name}_{uuid4().hex[:8]}")
+    quoted = {name: preparer.quote(name) for name in columns}
+    column_list = ", ".join(quoted[name] for name in columns)
+    key_list = ", ".join(quoted[name] for name in key_columns)
+    update_columns = [name for name in columns if name not in key_columns]
+
+    definitions = ", ".join(
+        f"{quoted[name]} {table.c[name].type.compile(dialect=connection.dialect)}" for name in columns
+    )
+    connection.execute(text(
+        f"CREATE TEMPORARY TABLE {stage} (_row_no BIGSERIAL, {definitions}) ON COMMIT DROP"
+    ))
+
+    stream = CsvRowStream(rows, columns)
+    copy_sql = f"COPY {stage} ({column_list}) FROM STDIN WITH (FORMAT csv)"
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):
+            cursor.copy_expert(copy_sql, stream)
+        else:
+            # psycopg 3
+            with cursor.copy(copy_sql) as copy:
+                for chunk in iter(lambda: stream.read(COPY_CHUNK_SIZE), ""):
+                    copy.write(chunk)
+    finally:
+        cursor.close()
+
+    # Last occurrence of a key within the stream wins.
+    source = (
+        f"SELECT DISTINCT ON ({key_list}) {column_list} FROM {stage} "
+        f"ORDER BY {key_list}, _row_no DESC"
+    )
+    if update_columns:
+        assignments = ", ".join(f"{quoted[name]} = EXCLUDED.{quoted[name]}" for name in update_columns)
+        conflict = f"DO UPDATE SET {assignments}"
+    else:
+        conflict = "DO NOTHING"
+    if _returns_xmax(session, table):
+        inserted, updated = connection.execute(text(
+            f"WITH merged AS ("
+            f"INSERT INTO {target} ({column_list}) {source} "
+            f"ON CONFLICT ({key_list}) {conflict} RETURNING (xmax = 0) AS inserted) "
+            f"SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged"
+        )).one()
+    else:
+        matches = " AND ".join(f"target.{quoted[name]} = staged.{quoted[name]}" for name in key_columns)
+        existing = connection.execute(text(
+            f"SELECT count(*) FROM ({source}) AS staged JOIN {target} AS target ON {matches}"
+        )).scalar_one() if update_columns else 0
+        merged = connection.execute(text(
+            f"WITH merged AS ("
+            f"INSERT INTO {target} ({column_list}) {source} "
+            f"ON CONFLICT ({key_list}) {conflict} RETURNING 1) "
+            f"SELECT count(*) FROM merged"
+        )).scalar_one()
+        inserted, updated = merged - existing, existing
+    report = UpsertReport(inserted=inserted, updated=updated)
+    connection.execute(text(f"DROP TABLE {stage}"))
+    return report
+
+
+def chunk_size_for(column_count: int, max_parameters: int = MAX_BIND_PARAMETERS) -> int:
+    """Returns how many rows of `column_count` values fit in a single statement."""
+    return max(1, max_parameters // max(1, column_count))
+
+
+def chunked(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Splits an iterable into lists of at most `size` items."""
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _dedupe(chunk: List[Mapping[str, Any]], index_elements: Sequence[str]) -> List[Mapping[str, Any]]:
+    # ON CONFLICT cannot touch the same row twice in one statement: the last occurrence wins.
+    if not all(key in chunk[0] for key in index_elements):
+        return chunk
+    unique: Dict[Tuple[Any, ...], Mapping[str, Any]] = {}
+    for row in chunk:
+        unique[tuple(row[key] for key in index_elements)] = row
+    return list(unique.values())
+
+
+def _returns_xmax(session: Session, table: Table) -> bool:
+    # xmax is 0 for freshly inserted tuples and set for the ones rewritten by DO UPDATE, but
+    # PostgreSQL cannot return system columns from a partitioned table (relkind 'p').
+    connection = session.connection()
+    if connection.dialect.name != "postgresql":
+        return False
+    cache = session.info.setdefault("returns_xmax", {})
+    if table.fullname not in cache:
+        preparer = connection.dialect.identifier_preparer
+        relkind = connection.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": preparer.format_table(table)},
+        ).scalar()
+        cache[table.fullname] = relkind != "p"
+    return cache[table.fullname]
+
+
+def _count_existing(session: Session, table: Table, chunk: List[Mapping[str, Any]], index_elements: Sequence[str]) -> int:
+    if not all(key in chunk[0] for key in index_elements):
+        return 0
+    if len(index_elements) == 1:
+        key = index_elements[0]
+        condition = table.c[key].in_([row[key] for row in chunk])
+    else:
+        condition = tuple_(*(table.c[key] for key in index_elements)).in_(
+            [tuple(row[key] for key in index_elements) for row in chunk]
+        )
+    return session.execute(select(func.count()).select_from(table).where(condition)).scalar_one()
+
+
+def _upsert_chunk(
+        session: Session,
+        table: Table,
+        chunk: List[Mapping[str, Any]],
+        index_elements: Sequence[str],
+        report: UpsertReport) -> None:
+    stmt = insert(table).values(chunk)
+    update_keys = {key: getattr(stmt.excluded, key) for key in chunk[0].keys() if key not in index_elements}
+    if update_keys:
+        stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=update_keys)
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+
+    returning = _returns_xmax(session, table)
+    if returning:
+        # The statement reports its own split, without a second query racing concurrent writers.
+        stmt = stmt.returning(literal_column("xmax = 0"))
+
+    try:
+        with session.begin_nested():
+            if returning:
+                inserted = sum(1 for fresh in session.execute(stmt).scalars() if fresh)
+                existing = len(chunk) - inserted
+            else:
+                existing = _count_existing(session, table, chunk, index_elements)
+                session.execute(stmt)
+    except (IntegrityError, DataError) as e:
+        if len(chunk) == 1:
+            report.rejected.append(RejectedRow(row=chunk[0], reason=str(e.orig)))
+            return
+        # Bisect the failing chunk: good halves are written, bad rows end up isolated.
+        middle = len(chunk) // 2
+        _upsert_chunk(session, table, chunk[:middle], index_elements, report)
+        _upsert_chunk(session, table, chunk[middle:], index_elements, report)
+        return
+    report.inserted += len(chunk) - existing
+    if update_keys:
+        report.updated += existing
+    else:
+        report.skipped += existing
+
+
+def chunked_upsert(
+        session: Session,
+        table: Table,
+        rows: Iterable[Mapping[str, Any]],
+        index_elements: Sequence[str],
+        chunk_size: Optional[int] = None,
+        validate: bool = True) -> UpsertReport:
+    """Upserts rows in chunks that stay below the bind parameter limit.
+
+    Every chunk is first checked against the column types and foreign keys of `table`
+    (see validation.validate_rows): rows the database would refuse, and rows superseded by
+    a later row with the same key, are rejected without being sent. Each chunk then runs
+    under its own SAVEPOINT. A chunk the database still refuses is bisected until the
+    offending rows are isolated and reported as rejected, while the rest of the rows are written.
+
+    Args:
+        session (Session): Session whose transaction is used.
+        table (Table): Target table.
+        rows (Iterable[dict]): Rows keyed by column name. Every row must have the keys of the first one.
+        index_elements (Sequence[str]): Columns of the unique index used as conflict target.
+        chunk_size (int, optional): Rows per statement. Defaults to the most the bind parameter limit allows.
+        validate (bool): Rejects invalid rows before sending them. Without it, duplicate keys are
+            silently collapsed to their last occurrence.
+    """
+    first, rows = _peek(rows)
+    report = UpsertReport()
+    if first is None:
+        return report
+
+    size = chunk_size or chunk_size_for(len(first))
+    check_foreign_keys = validate and enforces_foreign_keys(session)
+    known: Dict[Any, Set[Any]] = {}
+    for chunk in chunked(rows, size):
+        if validate:
+            chunk, rejected = validate_rows(session, table, chunk, index_elements, check_foreign_keys, known)
+            report.rejected.extend(rejected)
+        else:
+            chunk = _dedupe(chunk, index_elements)
+        if chunk:
+            _upsert_chunk(session, table, chunk, index_elements, report)
+    return report
+
+
+def _update_statement(session: Session, table: Table, chunk: List[Mapping[str, Any]], keys: Sequence[str], names: Sequence[str]):
+    """Returns the UPDATE of `chunk` and its parameters: one statement joined to VALUES on PostgreSQL, an executemany elsewhere."""
+    if session.get_bind().dialect.name == "postgresql":
+        # VALUES columns are typed from their literals (text for strings, NULLs alone): cast back to the column types.
+        source = values(*(column(name, table.c[name].type) for name in names), name="v").data(
+            [tuple(row[name] for name in names) for row in chunk]
+        )
+        typed = {name: cast(source.c[name], table.c[name].type) for name in names}
+        stmt = (
+            update(table)
+            .where(and_(*(table.c[key] == typed[key] for key in keys)))
+            .values({name: typed[name] for name in names if name not in keys})
+        )
+        return stmt, None
+    # Bind names must differ from the column names, which the SET clause reserves.
+    stmt = (
+        update(table)
+        .where(and_(*(table.c[key] == bindparam(f"_{key}") for key in keys)))
+        .values({name: bindparam(f"_{name}") for name in names if name not in keys})
+    )
+    return stmt, [{f"_{name}": row[name] for name in names} for row in chunk]
+
+
+def _update_chunk(
+        session: Session,
+        table: Table,
+        chunk: List[Mapping[str, Any]],
+        index_elements: Sequence[str],
+        names: Sequence[str],
+        report: UpsertReport) -> None:
+    stmt, parameters = _update_statement(session, table, chunk, index_elements, names)
+    try:
+        with session.begin_nested():
+            result = session.execute(stmt, parameters) if parameters is not None else session.execute(stmt)
+    except (IntegrityError, DataError) as e:
+        if len(chunk) == 1:
+            report.rejected.append(RejectedRow(row=chunk[0], reason=str(e.orig)))
+            return
+        middle = len(chunk) // 2
+        _update_chunk(session, table, chunk[:middle], index_elements, names, report)
+        _update_chunk(session, table, chunk[middle:], index_elements, names, report)
+        return
+    report.updated += result.rowcount
+
+
+def chunked_update(
+        session: Session,
+        table: Table,
+        rows: Iterable[Mapping[str, Any]],
+        index_elements: Sequence[str],
+        chunk_size: Optional[int] = None,
+        validate: bool = True) -> UpsertReport:
+    """Updates a subset of the columns of existing rows, matched on `index_elements`, in chunks.
+
+    Only the columns present in the rows are written; the other columns are left untouched and
+    no ORM object is loaded. On PostgreSQL every chunk is a single UPDATE ... FROM (VALUES ...),
+    elsewhere an executemany of one UPDATE per row. Validation, SAVEPOINTs and the bisection of
+    refused chunks work as in chunked_upsert. Rows matching no stored key are ignored.
+
+    Args:
+        session (Session): Session whose transaction is used.
+        table (Table): Target table.
+        rows (Iterable[dict]): Keys and new values. Every row must have the keys of the first one.
+        index_elements (Sequence[str]): Columns of the unique key the rows are matched on.
+        chunk_size (int, optional): Rows per statement. Defaults to the most the bind parameter limit allows.
+        validate (bool): Rejects invalid rows before sending them.
+
+    Returns:
+        UpsertReport: Number of rows updated, and the rejected rows. `inserted` is always 0.
+    """
+    first, rows = _peek(rows)
+    report = UpsertReport()
+    if first is None:
+        return report
+    missing = [key for key in index_elements if key not in first]
+    if missing:
+        raise ValueError(f"Rows to update must hold the key columns {', '.join(missing)}.")
+    names = list(first)
+    unknown = [name for name in names if name not in table.c]
+    if unknown:
+        raise ValueError(f"Unknown columns of {table.name}: {', '.join(unknown)}.")
+    if all(name in index_elements for name in names):
+        return report
+
+    size = chunk_size or chunk_size_for(len(names))
+    for chunk in chunked(rows, size):
+        if validate:
+            chunk, rejected = validate_rows(session, table, chunk, index_elements, check_foreign_keys=False)
+            report.rejected.extend(rejected)
+        else:
+            chunk = _dedupe(chunk, index_elements)
+        if chunk:
+            _update_chunk(session, table, chunk, index_elements, names, report)
+    return report
@@ -0,0 +1,125 @@
+from datetime import date
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Sequence
+
+import numpy as np
+from sqlalchemy import Float, cast, func
+from sqlalchemy.sql.elements import ColumnElement
+
+from stock_analyser_lib.models.historical_data import HistoricalData
+
+
+# Columns returned as float64 arrays, NULL becomes NaN.
+FLOAT_COLUMNS = (
+    "open", "high", "low", "close", "rsi", "macd",
+    "sma_50", "sma_200", "bollinger_upper", "bollinger_lower",
+)
+# Columns returned as int64 arrays, NULL becomes 0.
+INT_COLUMNS = ("volume",)
+ARRAY_COLUMNS = FLOAT_COLUMNS + INT_COLUMNS
+
+# Ordinal of 1970-01-01, the epoch of datetime64.
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def validate_columns(columns: Sequence[str]) -> List[str]:
+    """Checks that every requested column can be returned as an array."""
+    unknown = [column for column in columns if column not in ARRAY_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unsupported historical_data columns {unknown}, expected a subset of {ARRAY_COLUMNS}.")
+    return list(columns)
+
+
+def select_expressions(columns: Sequence[str]) -> List[ColumnElement[Any]]:
+    """Builds the select list for `columns`, cast in SQL so the driver returns floats rather than Decimals."""
+    expressions: List[ColumnElement[Any]] = []
+    for column in columns:
+        attribute = getattr(HistoricalData, column)
+        if column in FLOAT_COLUMNS:
+            expressions.append(cast(attribute, Float).label(column))
+        else:
+            expressions.append(func.coalesce(attribute, 0).label(column))
+    return expressions
+
+
+def _dtype(column: str) -> Any:
+    if column == "date":
+        return "datetime64[D]"
+    if column == "symbol":
+        return np.str_
+    return np.float64 if column in FLOAT_COLUMNS else np.int64
+
+
+def _column_array(rows: List[Sequence[Any]], position: int, name: str) -> np.ndarray:
+    dtype = _dtype(name)
+    values = map(itemgetter(position), rows)
+    try:
+        if name == "date":
+            # Converting date objects one by one in NumPy is slow, their ordinals are plain integers.
+            ordinals = np.fromiter(map(date.toordinal, values), np.int64, len(rows))
+            return (ordinals - UNIX_EPOCH_ORDINAL).astype(dtype)
+        if name == "symbol":
+            return np.array(list(values), dtype=dtype)
+        return np.fromiter(values, dtype, len(rows))
+    except TypeError:
+        # NULLs (None becomes NaN) or dates given as strings.
+        return np.array([row[position] for row in rows], dtype=dtype)
+
+
+def rows_to_arrays(rows: Iterable[Sequence[Any]], columns: Sequence[str], leading: Sequence[str] = ("date",)) -> Dict[str, np.ndarray]:
+    """Transposes raw result rows into one contiguous array per column.
+
+    Every array is filled straight from the rows (np.fromiter with a known count), without
+    building an intermediate tuple per column.
+
+    Args:
+        rows (Iterable[Sequence]): Rows holding the `leading` columns followed by `columns`.
+        columns (Sequence[str]): Value columns, typed according to FLOAT_COLUMNS / INT_COLUMNS.
+        leading (Sequence[str]): Key columns preceding the values, e.g. ("date",) or ("symbol", "date").
+    """
+    names = list(leading) + list(columns)
+    rows = rows if isinstance(rows, list) else list(rows)
+    return {name: _column_array(rows, position, name) for position, name in enumerate(names)}
+
+
+# Missing value policies of rows_to_panel.
+PANEL_FILL_POLICIES = ("nan", "ffill")
+
+
+def forward_fill(matrix: np.ndarray) -> np.ndarray:
+    """Replaces NaN with the last value above it in the same column; leading NaN are kept."""
+    rows = np.arange(matrix.shape[0])[:, np.newaxis]
+    last_valid = np.maximum.accumulate(np.where(np.isnan(matrix), 0, rows), axis=0)
+    return matrix[last_valid, np.arange(matrix.shape[1])]
+
+
+def rows_to_panel(
+        arrays: Dict[str, np.ndarray],
+        symbols: Sequence[str],
+        columns: Sequence[str],
+        fill: str = "nan") -> Dict[str, np.ndarray]:
+    """Pivots flat symbol/date arrays into date-aligned (n_dates, n_symbols) matrices.
+
+    Args:
+        arrays (Dict[str, np.ndarray]): "symbol" and "date" arrays plus one array per column, in any order.
+        symbols (Sequence[str]): Symbols in matrix column order, without duplicates.
+        columns (Sequence[str]): Columns to pivot.
+        fill (str): "nan" leaves missing bars as NaN, "ffill" carries the previous date's value forward.
+
+    Returns:
+        Dict[str, np.ndarray]: Sorted "date" array (every date at least one symbol has a bar on), the
+        "symbol" array, and one float64 matrix per column (volume included, so it can hold NaN).
+    """
+    if fill not in PANEL_FILL_POLICIES:
+        raise ValueError(f"Unsupported fill policy {fill!r}, expected one of {PANEL_FILL_POLICIES}.")
+    symbol_axis = np.array(symbols, dtype=np.str_)
+    dates, date_positions = np.unique(arrays["date"], return_inverse=True)
+    order = np.argsort(symbol_axis)
+    symbol_positions = order[np.searchsorted(symbol_axis[order], arrays["symbol"])]
+
+    panel = {"date": dates, "symbol": symbol_axis}
+    for column in columns:
+        matrix = np.full((len(dates), len(symbol_axis)), np.nan)
+        matrix[date_positions, symbol_positions] = arrays[column]
+        panel[column] = forward_fill(matrix) if fill == "ffill" else matrix
+    return panel
@@ -0,0 +1,187 @@
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+from stock_analyser_lib.models.historical_data import HistoricalData
+
+
+DateLike = Union[date, str]
+WindowKey = Tuple[str, Optional[date], Optional[date]]
+
+# Approximate footprint of a cached HistoricalData instance (ORM state, Decimals, date).
+ESTIMATED_ROW_BYTES = 1200
+ESTIMATED_WINDOW_BYTES = 200
+
+
+def as_date(value: Optional[DateLike]) -> Optional[date]:
+    """Normalises ISO strings to dates, so "2021-01-01" and date(2021, 1, 1) share cache entries."""
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+@dataclass
+class _Window:
+    rows: List[HistoricalData]
+    size: int
+
+
+class HistoricalWindowCache:
+    """Read-through LRU cache of (symbol, start_date, end_date) windows, bounded in bytes.
+
+    A request is served from an exact entry or from any cached window of the same symbol
+    that covers it. Writes invalidate only the windows that contain a written date.
+    Cached rows are shared between callers and must be treated as read-only.
+
+    Every invalidation bumps the generation of its symbol (clear bumps them all). A reader
+    takes the generation before querying and hands it to put, which drops the rows if an
+    invalidation happened meanwhile: a read racing a write never caches the old window.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+        self._windows: "OrderedDict[WindowKey, _Window]" = OrderedDict()
+        self._by_symbol: Dict[str, Set[WindowKey]] = {}
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _covers(key: WindowKey, start: Optional[date], end: Optional[date]) -> bool:
+        _, cached_start, cached_end = key
+        starts_before = cached_start is None or (start is not None and cached_start <= start)
+        ends_after = cached_end is None or (end is not None and cached_end >= end)
+        return starts_before and ends_after
+
+    def get(self, symbol: str, start_date: Optional[DateLike] = None, end_date: Optional[DateLike] = None) -> Optional[List[HistoricalData]]:
+        """Returns the cached rows of a window, or None on a miss."""
+        start, end = as_date(start_date), as_date(end_date)
+        key = (symbol, start, end)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                superset = next((k for k in self._by_symbol.get(symbol, ()) if self._covers(k, start, end)), None)
+                if superset is None:
+                    self.misses += 1
+                    return None
+                key, window = superset, self._windows[superset]
+                rows = [
+                    row for row in window.rows
+                    if (start is None or row.date >= start) and (end is None or row.date <= end)
+                ]
+            else:
+                rows = list(window.rows)
+            self._windows.move_to_end(key)
+            self.hits += 1
+            return rows
+
+    def generation(self, symbol: str) -> Tuple[int, int]:
+        """Returns the generation of `symbol`, to take before reading the rows handed to put."""
+        with self._lock:
+            return self._epoch, self._generations.get(symbol, 0)
+
+    def put(
+            self,
+            symbol: str,
+            start_date: Optional[DateLike],
+            end_date: Optional[DateLike],
+            rows: List[HistoricalData],
+            generation: Optional[Tuple[int, int]] = None) -> None:
+        """Caches a window, evicting least recently used windows to stay within `max_bytes`.
+
+        Args:
+            generation (Tuple[int, int], optional): Generation of `symbol` taken before the rows were read.
+                The rows are not cached if `symbol` was invalidated since.
+        """
+        key = (symbol, as_date(start_date), as_date(end_date))
+        size = ESTIMATED_WINDOW_BYTES + ESTIMATED_ROW_BYTES * len(rows)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(symbol, 0)):
+                self.stale_puts += 1
+                return
+            self._drop(key)
+            while self._windows and self.current_bytes + size > self.max_bytes:
+                self._drop(next(iter(self._windows)))
+                self.evictions += 1
+            self._windows[key] = _Window(rows=list(rows), size=size)
+            self._by_symbol.setdefault(symbol, set()).add(key)
+            self.current_bytes += size
+
+    def _drop(self, key: WindowKey) -> None:
+        window = self._windows.pop(key, None)
+        if window is None:
+            return
+        self.current_bytes -= window.size
+        keys = self._by_symbol[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._by_symbol[key[0]]
+
+    def invalidate(self, symbol: str, dates: Iterable[DateLike]) -> None:
+        """Drops the windows of `symbol` containing any of `dates`."""
+        written = sorted({as_date(value) for value in dates})
+        if not written:
+            return
+        with self._lock:
+            self._bump(symbol)
+            for key in list(self._by_symbol.get(symbol, ())):
+                _, start, end = key
+                position = 0 if start is None else bisect_left(written, start)
+                if position < len(written) and (end is None or written[position] <= end):
+                    self._drop(key)
+                    self.invalidations += 1
+
+    def invalidate_range(self, symbol: str, start_date: Optional[DateLike], end_date: Optional[DateLike]) -> None:
+        """Drops the windows of `symbol` overlapping [start_date, end_date] (None means unbounded)."""
+        start, end = as_date(start_date), as_date(end_date)
+        with self._lock:
+            self._bump(symbol)
+            for key in list(self._by_symbol.get(symbol, ())):
+                _, cached_start, cached_end = key
+                if (end is None or cached_start is None or cached_start <= end) and \
+                        (start is None or cached_end is None or cached_end >= start):
+                    self._drop(key)
+                    self.invalidations += 1
+
+    def invalidate_rows(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        """Drops the windows touched by rows keyed by historical_data column name."""
+        dates: Dict[str, List[DateLike]] = {}
+        for row in rows:
+            dates.setdefault(row["symbol"], []).append(row["date"])
+        for symbol, symbol_dates in dates.items():
+            self.invalidate(symbol, symbol_dates)
+
+    def clear(self) -> None:
+        """Drops every window."""
+        with self._lock:
+            self._windows.clear()
+            self._by_symbol.clear()
+            self._generations.clear()
+            self._epoch += 1
+            self.current_bytes = 0
+
+    def _bump(self, symbol: str) -> None:
+        self._generations[symbol] = self._generations.get(symbol, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit, miss, eviction and invalidation counters and the current footprint."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_puts": self.stale_puts,
+            "entries": len(self._windows),
+            "bytes": self.current_bytes,
+        }
@@ -1,42 +1,204 @@
-from typing import Optional, List
-from datetime import date
+import re
+from typing import Dict, Iterable, Iterator, Mapping, Optional, List, Sequence, Tuple, Union
+from datetime import date, timedelta
 
+import numpy as np
+from sqlalchemy import Date, and_, delete, func, or_, select, text, type_coerce
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.inspection import inspect
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.sql.elements import ColumnElement
 
+from stock_analyser_lib.calendars import NYSE, TradingCalendar
+from stock_analyser_lib.indicators.vectorized import indicator_rows
 from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.models.latest_bar import LatestBar
+from stock_analyser_lib.models.stock import Stock
 from stock_analyser_lib.models.base import BaseModel
+from stock_analyser_lib.models.instrumentation import instrumented
+from stock_analyser_lib.repositories.bulk import (
+    UpsertReport, chunked, chunked_update, chunked_upsert, copy_upsert, default_columns,
+)
+from stock_analyser_lib.repositories.historical_cache import HistoricalWindowCache, as_date
+from stock_analyser_lib.repositories.columnar import (
+    ARRAY_COLUMNS, PANEL_FILL_POLICIES, rows_to_arrays, rows_to_panel, select_expressions, validate_columns,
+)
 
 
+@instrumented
 class HistoricalDataRepository:
     """Repository class for HistoricalData model to handle database operations."""
 
+    # Columns of the unique index used as conflict target by the upserts.
+    NATURAL_KEY = ("symbol", "date")
+
+    # Rows fetched per round trip by the streaming readers.
+    STREAM_BATCH_SIZE = 10000
+
+    # Symbols bound in the IN list of a single query (panel reads, latest bar refreshes).
+    SYMBOLS_PER_QUERY = 1000
+
+    # Rows removed per DELETE statement, and per transaction, by bulk_delete_historical_data.
+    DELETE_BATCH_SIZE = 10000
+
+    # Partition receiving the bars of years without a partition of their own (PostgreSQL).
+    DEFAULT_PARTITION = "historical_data_default"
+
+    # Optional read-through cache of get_historical_data windows, see enable_cache.
+    cache: Optional[HistoricalWindowCache] = None
+
+    @staticmethod
+    def enable_cache(max_bytes: int = 256 * 2**20) -> HistoricalWindowCache:
+        """Serves get_historical_data through an LRU cache bounded to roughly `max_bytes`.
+
+        Writes made through the repositories invalidate the windows they touch.
+        """
+        HistoricalDataRepository.cache = HistoricalWindowCache(max_bytes)
+        return HistoricalDataRepository.cache
+
+    @staticmethod
+    def disable_cache():
+        """Stops caching get_historical_data windows."""
+        HistoricalDataRepository.cache = None
+
     @staticmethod
-    def bulk_upsert_historical_data(data_list: List[dict]):
-        """Performs bulk Upsert (Insert or Update) on historical data."""
+    def _invalidate(rows: Iterable[Mapping]):
+        cache = HistoricalDataRepository.cache
+        if cache is not None:
+            BaseModel.on_commit(lambda: cache.invalidate_rows(rows))
+
+    @staticmethod
+    def _invalidate_spans(spans: Dict[str, List[date]]):
+        cache = HistoricalDataRepository.cache
+        if cache is None or not spans:
+            return
+
+        def invalidate():
+            for symbol, (first, last) in spans.items():
+                cache.invalidate_range(symbol, first, last)
+        BaseModel.on_commit(invalidate)
+
+    @staticmethod
+    def bulk_upsert_historical_data(data_list: List[dict], chunk_size: Optional[int] = None) -> UpsertReport:
+        """Performs bulk Upsert (Insert or Update) on historical data.
+
+        Rows are sent in chunks sized to stay below the bind parameter limit, each under
+        its own SAVEPOINT. Rows refused by the database are isolated and returned as rejected.
+
+        Args:
+            data_list (List[dict]): Rows keyed by column name.
+            chunk_size (int, optional): Rows per statement. Defaults to the largest size allowed.
+        """
+        # Rows may be streamed: only the date span of every symbol is kept, for the snapshot and the cache.
+        written: Dict[str, List[date]] = {}
+        data_list = HistoricalDataRepository._track_spans(data_list, None, written)
+
         with BaseModel.get_session() as session:
-            try:
-                stmt = insert(HistoricalData).values(data_list)
+            report = chunked_upsert(
+                session, HistoricalData.__table__, data_list, HistoricalDataRepository.NATURAL_KEY, chunk_size
+            )
+            HistoricalDataRepository._refresh_latest_bars(session, written)
+            BaseModel.logger.info(
+                f"Bulk historical_data upsert: {report.inserted} inserted, {report.updated} updated, "
+                f"{len(report.rejected)} rejected."
+            )
+        HistoricalDataRepository._invalidate_spans(written)
+        return report
 
-                primary_keys = [key.name for key in inspect(HistoricalData).primary_key]
+    @staticmethod
+    def copy_upsert_historical_data(
+            rows: Iterable[Union[dict, tuple]],
+            columns: Optional[Sequence[str]] = None) -> UpsertReport:
+        """Bulk loads historical data through PostgreSQL COPY and a set-based merge.
 
-                update_keys = {key: getattr(stmt.excluded, key) for key in data_list[0].keys() if key not in primary_keys}
+        Rows are streamed into a temporary staging table, so memory stays flat
+        whatever the number of rows, then merged into historical_data on (symbol, date).
 
-                stmt = stmt.on_conflict_do_update(
-                    index_elements=primary_keys,  # Conflict condition
-                    set_=update_keys
-                )
+        Args:
+            rows (Iterable[dict | tuple]): Dicts keyed by column name, or tuples ordered like `columns`.
+            columns (Sequence[str], optional): Columns provided by the rows. Defaults to the keys of
+                the first dict, or to every column except `id` for tuples.
+        """
+        # Only the date span of every symbol is kept, for the snapshot and the cache, without buffering the rows.
+        written: Dict[str, List[date]] = {}
+        rows = HistoricalDataRepository._track_spans(rows, columns, written)
+
+        with BaseModel.get_session() as session:
+            report = copy_upsert(session, HistoricalData.__table__, rows, HistoricalDataRepository.NATURAL_KEY, columns)
+            HistoricalDataRepository._refresh_latest_bars(session, written)
+            BaseModel.logger.info(
+                f"COPY historical_data load successful: {report.inserted} inserted, {report.updated} updated."
+            )
+        HistoricalDataRepository._invalidate_spans(written)
+        return report
 
-                session.execute(stmt)
-                BaseModel.logger.info("Bulk historical_data insert successful.")
-            except IntegrityError:
-                BaseModel.logger.error("Bulk historical_data insert failed. Falling back to individual inserts.")
-                session.rollback()
-                # If bulk insert fails, fall back to inserting records one by one using merge()
-                for data in data_list:
-                    HistoricalDataRepository.add_historical_data(**data)
+    @staticmethod
+    def _track_spans(
+            rows: Iterable[Union[dict, tuple]],
+            columns: Optional[Sequence[str]],
+            spans: Dict[str, List[date]]) -> Iterator[Union[dict, tuple]]:
+        names = list(columns or default_columns(HistoricalData.__table__))
+        for row in rows:
+            if isinstance(row, Mapping):
+                symbol, row_date = row["symbol"], as_date(row["date"])
+            else:
+                symbol, row_date = row[names.index("symbol")], as_date(row[names.index("date")])
+            span = spans.setdefault(symbol, [row_date, row_date])
+            span[0], span[1] = min(span[0], row_date), max(span[1], row_date)
+            yield row
+
+    @staticmethod
+    def bulk_update_historical_data(data_list: Iterable[dict], chunk_size: Optional[int] = None) -> UpsertReport:
+        """Updates a subset of the columns of existing bars, e.g. only rsi and macd of an indicator backfill.
+
+        Rows hold symbol, date and the columns to write; the other columns are left untouched.
+        Each chunk is applied by one UPDATE ... FROM (VALUES ...) on PostgreSQL (see bulk.chunked_update),
+        without loading ORM objects. Bars that are not stored are ignored.
+
+        Args:
+            data_list (Iterable[dict]): Rows keyed by column name. Every row must have the keys of the first one.
+            chunk_size (int, optional): Rows per statement. Defaults to the largest size allowed.
+
+        Returns:
+            UpsertReport: Number of bars updated and the rejected rows.
+        """
+        written: Dict[str, List[date]] = {}
+        data_list = HistoricalDataRepository._track_spans(data_list, None, written)
+
+        with BaseModel.get_session() as session:
+            report = chunked_update(
+                session, HistoricalData.__table__, data_list, HistoricalDataRepository.NATURAL_KEY, chunk_size
+            )
+            HistoricalDataRepository._refresh_latest_bars(session, written)
+            BaseModel.logger.info(
+                f"Bulk historical_data update: {report.updated} updated, {len(report.rejected)} rejected."
+            )
+        HistoricalDataRepository._invalidate_spans(written)
+        return report
+
+    @staticmethod
+    def recompute_indicators(symbols: Optional[Sequence[str]] = None, symbols_per_batch: int = 200) -> UpsertReport:
+        """Recomputes the indicator columns from the stored closes and writes them back.
+
+        Symbols are processed in batches: one query reads the closes of the whole batch, the
+        indicators are computed for all of its symbols at once, and the results go through the
+        bulk update, which only touches the indicator columns.
+
+        Args:
+            symbols (Sequence[str], optional): Symbols to recompute. Defaults to every stock.
+            symbols_per_batch (int): Symbols read and computed together.
+        """
+        if symbols is None:
+            with BaseModel.get_session() as session:
+                symbols = session.execute(select(Stock.symbol).order_by(Stock.symbol)).scalars().all()
+
+        report = UpsertReport()
+        for batch in chunked(symbols, symbols_per_batch):
+            arrays = HistoricalDataRepository._fetch_arrays(HistoricalData.symbol.in_(batch), ("close",))
+            rows = list(indicator_rows(arrays["symbol"], arrays["date"], arrays["close"]))
+            if rows:
+                report.merge(HistoricalDataRepository.bulk_update_historical_data(rows))
+        return report
 
     @staticmethod
     def add_historical_data(
@@ -49,13 +211,20 @@ class HistoricalDataRepository:
 
         """Adds a new historical data entry."""
         with BaseModel.get_session() as session:
-            historical_data = HistoricalData(
+            values = dict(
                 symbol=symbol, date=date, open=open, high=high, low=low, close=close, volume=volume,
                 rsi=rsi, macd=macd, sma_50=sma_50, sma_200=sma_200,
                 bollinger_upper=bollinger_upper, bollinger_lower=bollinger_lower
             )
-            session.merge(historical_data)
-            BaseModel.logger.info(f"Historical data for {symbol} on {date} added successfully.")
+            stmt = insert(HistoricalData).values(values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=HistoricalDataRepository.NATURAL_KEY,
+                set_={key: getattr(stmt.excluded, key) for key in values if key not in HistoricalDataRepository.NATURAL_KEY}
+            )
+            session.execute(stmt)
+            HistoricalDataRepository._refresh_latest_bars(session, [symbol])
+            BaseModel.logger.debug(f"Historical data for {symbol} on {date} added successfully.")
+        HistoricalDataRepository._invalidate([values])
 
     @staticmethod
     def update_historical_data(symbol: str, date: str, **kwargs):
@@ -68,131 +237,668 @@ class HistoricalDataRepository:
         """
         with BaseModel.get_session() as session:
             try:
-                # Find the record to update
-                historical_data = session.query(HistoricalData).filter_by(symbol=symbol, date=date).first()
-
-                if historical_data:
-                    # Update the fields dynamically
-                    for key, value in kwargs.items():
-                        if hasattr(historical_data, key):
-                            setattr(historical_data, key, value)
-                    BaseModel.logger.info(f"Historical data for {symbol} on {date} updated successfully.")
-                else:
-                    BaseModel.logger.warning(f"No historical data found for {symbol} on {date}.")
+                # The SAVEPOINT undoes only this update, not the rest of a joined unit of work.
+                with session.begin_nested():
+                    # Find the record to update
+                    historical_data = session.query(HistoricalData).filter_by(symbol=symbol, date=date).first()
+
+                    if historical_data:
+                        # Update the fields dynamically
+                        for key, value in kwargs.items():
+                            if hasattr(historical_data, key):
+                                setattr(historical_data, key, value)
+                        session.flush()
+                        HistoricalDataRepository._refresh_latest_bars(session, [symbol])
+                        BaseModel.logger.debug(f"Historical data for {symbol} on {date} updated successfully.")
+                    else:
+                        BaseModel.logger.warning(f"No historical data found for {symbol} on {date}.")
             except IntegrityError as e:
-                session.rollback()
                 BaseModel.logger.error(f"Failed to update historical data for {symbol} on {date}: {e}")
+        HistoricalDataRepository._invalidate([{"symbol": symbol, "date": date}])
 
     @staticmethod
     def get_historical_data(symbol: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[HistoricalData]:
-        """Retrieves historical data for a stock within an optional date range."""
-        with BaseModel.get_session() as session:
+        """Retrieves historical data for a stock within an optional date range.
+
+        Served from the window cache when it is enabled. Windows are then read from the
+        primary, so a lagging replica is never cached, and the cache is bypassed inside a
+        unit of work, whose uncommitted writes may still be rolled back.
+        """
+        cache = None if BaseModel.in_unit_of_work() else HistoricalDataRepository.cache
+        if cache is not None:
+            cached = cache.get(symbol, start_date, end_date)
+            if cached is not None:
+                return cached
+            generation = cache.generation(symbol)
+
+        with BaseModel.get_session(read_only=cache is None) as session:
             query = session.query(HistoricalData).filter_by(symbol=symbol)
             if start_date:
                 query = query.filter(HistoricalData.date >= start_date)
             if end_date:
                 query = query.filter(HistoricalData.date <= end_date)
-            return query.all()
+            data = query.order_by(HistoricalData.date).all()
+
+        if cache is not None:
+            cache.put(symbol, start_date, end_date, data, generation)
+        return data
+
+    @staticmethod
+    def get_historical_arrays(
+            symbol: str,
+            start_date: Optional[date] = None,
+            end_date: Optional[date] = None,
+            columns: Sequence[str] = ARRAY_COLUMNS) -> Dict[str, np.ndarray]:
+        """Retrieves historical data for a stock as contiguous NumPy arrays, ordered by date.
+
+        Runs a Core select and builds the arrays straight from the result rows, skipping
+        ORM objects and Decimals. Prices and indicators are float64 (NULL as NaN), volume is int64.
+
+        Args:
+            symbol (str): The stock symbol.
+            start_date (date, optional): First date included.
+            end_date (date, optional): Last date included.
+            columns (Sequence[str]): Columns to return, a subset of ARRAY_COLUMNS.
+
+        Returns:
+            Dict[str, np.ndarray]: A "date" datetime64[D] array plus one array per requested column.
+        """
+        columns = validate_columns(columns)
+        stmt = select(HistoricalData.date, *select_expressions(columns)).where(HistoricalData.symbol == symbol)
+        if start_date:
+            stmt = stmt.where(HistoricalData.date >= start_date)
+        if end_date:
+            stmt = stmt.where(HistoricalData.date <= end_date)
+        with BaseModel.get_session(read_only=True) as session:
+            rows = session.connection().execute(stmt.order_by(HistoricalData.date)).all()
+        return rows_to_arrays(rows, columns)
+
+    @staticmethod
+    def get_historical_panel(
+            symbols: Sequence[str],
+            start_date: date,
+            end_date: date,
+            columns: Sequence[str] = ("close",),
+            fill: str = "nan") -> Dict[str, np.ndarray]:
+        """Retrieves several stocks over a date range as date-aligned (n_dates, n_symbols) matrices.
+
+        Replaces one query per symbol with a single scan (one query per SYMBOLS_PER_QUERY
+        symbols), pivoted into matrices with NumPy.
+
+        Args:
+            symbols (Sequence[str]): Symbols, in matrix column order. Duplicates are dropped.
+            start_date (date): First date included.
+            end_date (date): Last date included.
+            columns (Sequence[str]): Columns to return, a subset of ARRAY_COLUMNS.
+            fill (str): "nan" leaves missing bars as NaN, "ffill" carries the last known value forward.
+
+        Returns:
+            Dict[str, np.ndarray]: "date" and "symbol" axes plus one float64 matrix per column.
+        """
+        columns = validate_columns(columns)
+        if fill not in PANEL_FILL_POLICIES:
+            raise ValueError(f"Unsupported fill policy {fill!r}, expected one of {PANEL_FILL_POLICIES}.")
+        symbols = list(dict.fromkeys(symbols))
+        rows = []
+        with BaseModel.get_session(read_only=True) as session:
+            connection = session.connection()
+            for batch in chunked(symbols, HistoricalDataRepository.SYMBOLS_PER_QUERY):
+                stmt = select(HistoricalData.symbol, HistoricalData.date, *select_expressions(columns)).where(
+                    HistoricalData.symbol.in_(batch), HistoricalData.date.between(start_date, end_date)
+                )
+                rows.extend(connection.execute(stmt).all())
+        return rows_to_panel(rows_to_arrays(rows, columns, leading=("symbol", "date")), symbols, columns, fill)
+
+    @staticmethod
+    def iter_historical_arrays_since(
+            watermarks: Mapping[str, Optional[date]],
+            columns: Sequence[str] = ARRAY_COLUMNS) -> Iterator[Dict[str, np.ndarray]]:
+        """Streams the bars of several stocks dated after a per-symbol watermark, as flat NumPy arrays.
+
+        Symbols sharing a watermark (the common case after a previous sync) are fetched together,
+        SYMBOLS_PER_QUERY at a time, and every batch is yielded as soon as it is read: memory is
+        bounded by one batch, not by the whole history of every symbol.
+
+        Args:
+            watermarks (Mapping[str, Optional[date]]): Last date already known per symbol, None for all bars.
+            columns (Sequence[str]): Columns to return, a subset of ARRAY_COLUMNS.
+
+        Yields:
+            Dict[str, np.ndarray]: "symbol" and "date" arrays plus one array per column, ordered by symbol
+                and date. Batches without any new bar are skipped.
+        """
+        columns = validate_columns(columns)
+        by_watermark: Dict[Optional[date], List[str]] = {}
+        for symbol, watermark in watermarks.items():
+            by_watermark.setdefault(watermark, []).append(symbol)
+
+        with BaseModel.get_session(read_only=True) as session:
+            connection = session.connection()
+            for watermark, symbols in by_watermark.items():
+                for batch in chunked(symbols, HistoricalDataRepository.SYMBOLS_PER_QUERY):
+                    stmt = select(HistoricalData.symbol, HistoricalData.date, *select_expressions(columns)).where(
+                        HistoricalData.symbol.in_(batch)
+                    )
+                    if watermark is not None:
+                        stmt = stmt.where(HistoricalData.date > watermark)
+                    rows = connection.execute(stmt.order_by(HistoricalData.symbol, HistoricalData.date)).all()
+                    if rows:
+                        yield rows_to_arrays(rows, columns, leading=("symbol", "date"))
+
+    @staticmethod
+    def find_gaps(
+            symbols: Optional[Sequence[str]] = None,
+            start_date: Optional[date] = None,
+            end_date: Optional[date] = None,
+            calendar: TradingCalendar = NYSE) -> Dict[str, List[Tuple[date, date]]]:
+        """Finds the trading days missing from historical_data, as ranges to fetch per symbol.
+
+        One windowed query per SYMBOLS_PER_QUERY symbols returns only the first and last bar of every
+        symbol and the bars following a hole of more than one calendar day. Those candidates are
+        then checked against `calendar` with vectorized day counts, so weekends and holidays are not gaps.
+
+        Args:
+            symbols (Sequence[str], optional): Symbols to check. Defaults to every stock.
+            start_date (date, optional): First day expected. Defaults to the first stored bar of each symbol;
+                symbols without any bar are only reported when both bounds are given.
+            end_date (date, optional): Last day expected. Defaults to the last stored bar of each symbol;
+                pass calendar.last_closed_session() to look for gaps up to today.
+            calendar (TradingCalendar): Calendar of the exchange.
+
+        Returns:
+            Dict[str, List[Tuple[date, date]]]: First and last missing trading day of every gap, by symbol.
+                Symbols without gaps are left out.
+        """
+        if symbols is None:
+            with BaseModel.get_session(read_only=True) as session:
+                symbols = session.execute(select(Stock.symbol).order_by(Stock.symbol)).scalars().all()
+
+        window = dict(partition_by=HistoricalData.symbol, order_by=HistoricalData.date)
+        rows = []
+        with BaseModel.get_session(read_only=True) as session:
+            postgresql = session.get_bind().dialect.name == "postgresql"
+            for batch in chunked(dict.fromkeys(symbols), HistoricalDataRepository.SYMBOLS_PER_QUERY):
+                stmt = select(
+                    HistoricalData.symbol,
+                    HistoricalData.date,
+                    type_coerce(func.lag(HistoricalData.date).over(**window), Date).label("previous"),
+                    type_coerce(func.lead(HistoricalData.date).over(**window), Date).label("following"),
+                ).where(HistoricalData.symbol.in_(batch))
+                if start_date is not None:
+                    stmt = stmt.where(HistoricalData.date >= start_date)
+                if end_date is not None:
+                    stmt = stmt.where(HistoricalData.date <= end_date)
+                bars = stmt.subquery()
+                if postgresql:
+                    elapsed = bars.c.date - bars.c.previous
+                else:
+                    elapsed = func.julianday(bars.c.date) - func.julianday(bars.c.previous)
+                rows.extend(session.execute(
+                    select(bars.c.symbol, bars.c.date, bars.c.previous, bars.c.following)
+                    .where(or_(bars.c.previous.is_(None), bars.c.following.is_(None), elapsed > 1))
+                ).all())
+
+        # Every candidate hole as [first, last] calendar days, then kept if it holds a trading day.
+        starts, ends, owners = [], [], []
+        stored = set()
+        for symbol, day, previous, following in rows:
+            stored.add(symbol)
+            if previous is not None:
+                starts.append(previous + timedelta(days=1))
+                ends.append(day - timedelta(days=1))
+                owners.append(symbol)
+            elif start_date is not None and day > start_date:
+                starts.append(start_date)
+                ends.append(day - timedelta(days=1))
+                owners.append(symbol)
+            if following is None and end_date is not None and day < end_date:
+                starts.append(day + timedelta(days=1))
+                ends.append(end_date)
+                owners.append(symbol)
+        if start_date is not None and end_date is not None:
+            for symbol in dict.fromkeys(symbols):
+                if symbol not in stored:
+                    starts.append(start_date)
+                    ends.append(end_date)
+                    owners.append(symbol)
+
+        gaps: Dict[str, List[Tuple[date, date]]] = {}
+        if not owners:
+            return gaps
+        starts = np.array(starts, dtype="datetime64[D]")
+        ends = np.array(ends, dtype="datetime64[D]")
+        missing = calendar.count(starts, ends) > 0
+        firsts = calendar.next_trading_day(starts[missing]).tolist()
+        lasts = calendar.previous_trading_day(ends[missing]).tolist()
+        for symbol, first, last in zip(np.array(owners, dtype=object)[missing], firsts, lasts):
+            gaps.setdefault(symbol, []).append((first, last))
+        for ranges in gaps.values():
+            ranges.sort()
+        return gaps
+
+    @staticmethod
+    def get_latest_bars(symbols: Optional[Sequence[str]] = None) -> List[LatestBar]:
+        """Retrieves the most recent bar of every symbol (or of `symbols`) from the latest_bars snapshot.
+
+        A primary key scan of one row per symbol, instead of a group-by over historical_data.
+        """
+        stmt = select(LatestBar).order_by(LatestBar.symbol)
+        if symbols is not None:
+            stmt = stmt.where(LatestBar.symbol.in_(list(symbols)))
+        with BaseModel.get_session(read_only=True) as session:
+            return list(session.execute(stmt).scalars())
+
+    @staticmethod
+    def _refresh_latest_bars(session: Session, symbols: Iterable[str]):
+        """Recomputes the latest_bars rows of `symbols` from historical_data, in the caller's transaction.
+
+        Each symbol costs one lookup of its max date on the (symbol, date) index, so writes keep the
+        snapshot current whether they append, correct or delete bars.
+        """
+        columns = [column.name for column in LatestBar.__table__.columns]
+        symbols = sorted(symbol for symbol in symbols if symbol is not None)
+        for batch in chunked(symbols, HistoricalDataRepository.SYMBOLS_PER_QUERY):
+            latest = (
+                select(HistoricalData.symbol, func.max(HistoricalData.date).label("date"))
+                .where(HistoricalData.symbol.in_(batch))
+                .group_by(HistoricalData.symbol)
+                .subquery()
+            )
+            source = select(*(getattr(HistoricalData, column) for column in columns)).join(
+                latest, and_(HistoricalData.symbol == latest.c.symbol, HistoricalData.date == latest.c.date)
+            )
+            session.execute(delete(LatestBar).where(LatestBar.symbol.in_(batch)))
+            session.execute(LatestBar.__table__.insert().from_select(columns, source))
 
     @staticmethod
     def get_historical_data_by_symbol(symbol: str) -> List[HistoricalData]:
         """Fetch historical data by stock symbol."""
-        with BaseModel.get_session() as session:
+        with BaseModel.get_session(read_only=True) as session:
             data = session.query(HistoricalData).filter_by(symbol=symbol).all()
             return data
 
     @staticmethod
     def get_historical_data_by_date(date: date) -> List[HistoricalData]:
         """Fetch historical data by specific date."""
-        with BaseModel.get_session() as session:
+        with BaseModel.get_session(read_only=True) as session:
             data = session.query(HistoricalData).filter_by(date=date).all()
             return data
 
     @staticmethod
     def get_historical_data_by_date_range(start_date: date, end_date: date) -> List[HistoricalData]:
         """Fetch historical data within a date range."""
-        with BaseModel.get_session() as session:
+        with BaseModel.get_session(read_only=True) as session:
             data = session.query(HistoricalData).filter(HistoricalData.date.between(start_date, end_date)).all()
             return data
 
+    @staticmethod
+    def iter_historical_data_by_date_range(
+            start_date: date, end_date: date, batch_size: Optional[int] = None) -> Iterator[HistoricalData]:
+        """Streams historical data within a date range through a server-side cursor.
+
+        Rows are fetched `batch_size` at a time, so memory stays constant however many rows match.
+        """
+        yield from HistoricalDataRepository._stream(HistoricalData.date.between(start_date, end_date), batch_size)
+
+    @staticmethod
+    def iter_historical_arrays_by_date_range(
+            start_date: date,
+            end_date: date,
+            columns: Sequence[str] = ARRAY_COLUMNS,
+            batch_size: Optional[int] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """Streams historical data within a date range as columnar chunks, ordered by symbol and date.
+
+        Each chunk holds at most `batch_size` rows: "symbol" and "date" arrays plus one array per
+        requested column, typed like get_historical_arrays.
+        """
+        yield from HistoricalDataRepository._stream_arrays(
+            HistoricalData.date.between(start_date, end_date), columns, batch_size
+        )
+
     @staticmethod
     def get_historical_data_by_symbol_and_date(symbol: str, date: date) -> Optional[HistoricalData]:
         """Fetch historical data by stock symbol and date."""
-        with BaseModel.get_session() as session:
+        with BaseModel.get_session(read_only=True) as session:
             data = session.query(HistoricalData).filter_by(symbol=symbol, date=date).first()
             return data
 
     @staticmethod
     def get_historical_data_by_symbol_and_date_range(symbol: str, start_date: date, end_date: date) -> List[HistoricalData]:
         """Fetch historical data by stock symbol within a date range."""
-        with BaseModel.get_session() as session:
+        with BaseModel.get_session(read_only=True) as session:
             data = session.query(HistoricalData).filter(HistoricalData.symbol == symbol, HistoricalData.date.between(start_date, end_date)).all()
             return data
 
     @staticmethod
-    def delete_historical_data(symbol: str, date: date):
-        """Deletes historical data for a specific stock and date."""
+    def delete_historical_data(symbol: str, date: date) -> int:
+        """Deletes historical data for a specific stock and date.
+
+        Returns:
+            int: Number of rows deleted (0 or 1).
+        """
+        return HistoricalDataRepository.bulk_delete_historical_data(symbols=[symbol], start_date=date, end_date=date)
+
+    @staticmethod
+    def bulk_delete_historical_data(
+            symbols: Optional[Sequence[str]] = None,
+            start_date: Optional[date] = None,
+            end_date: Optional[date] = None,
+            batch_size: Optional[int] = None) -> int:
+        """Deletes the bars of `symbols` within [start_date, end_date] with set-based statements.
+
+        Rows are deleted at most `batch_size` per statement, each batch in its own transaction,
+        so large ranges never hold long locks nor write one huge transaction to the WAL. Inside
+        a unit of work the batches share its transaction instead.
+
+        Args:
+            symbols (Sequence[str], optional): Symbols whose bars are deleted. Defaults to every symbol.
+            start_date (date, optional): First date deleted.
+            end_date (date, optional): Last date deleted.
+            batch_size (int, optional): Rows per DELETE. Defaults to DELETE_BATCH_SIZE.
+
+        Returns:
+            int: Number of rows deleted.
+        """
+        size = batch_size or HistoricalDataRepository.DELETE_BATCH_SIZE
+        deleted = 0
+        affected = set()
+        for condition in HistoricalDataRepository._delete_conditions(symbols, start_date, end_date):
+            with BaseModel.get_session() as session:
+                affected.update(session.execute(select(HistoricalData.symbol).where(condition).distinct()).scalars())
+            while True:
+                with BaseModel.get_session() as session:
+                    count = session.execute(HistoricalDataRepository._delete_batch(condition, size)).rowcount
+                deleted += count
+                if count < size:
+                    break
+
         with BaseModel.get_session() as session:
-            data = session.query(HistoricalData).filter_by(symbol=symbol, date=date).first()
-            if data:
-                session.delete(data)
+            HistoricalDataRepository._refresh_latest_bars(session, affected)
+        HistoricalDataRepository._invalidate_deleted(affected, start_date, end_date)
+        BaseModel.logger.info(f"Deleted {deleted} historical_data rows of {len(affected)} symbols.")
+        return deleted
+
+    @staticmethod
+    def _delete_conditions(
+            symbols: Optional[Sequence[str]],
+            start_date: Optional[date],
+            end_date: Optional[date]) -> Iterator[ColumnElement[bool]]:
+        """Yields the WHERE clauses of a bulk delete, one per SYMBOLS_PER_QUERY symbols."""
+        if symbols is None and start_date is None and end_date is None:
+            raise ValueError("Refusing to delete every bar: pass symbols and/or a date range.")
+        bounds = []
+        if start_date is not None:
+            bounds.append(HistoricalData.date >= start_date)
+        if end_date is not None:
+            bounds.append(HistoricalData.date <= end_date)
+        if symbols is None:
+            yield and_(*bounds)
+            return
+        for batch in chunked(dict.fromkeys(symbols), HistoricalDataRepository.SYMBOLS_PER_QUERY):
+            yield and_(*bounds, HistoricalData.symbol.in_(batch))
+
+    @staticmethod
+    def _delete_batch(condition: ColumnElement[bool], size: int):
+        # The outer condition keeps partition pruning, the bounded id subquery keeps each statement small.
+        return delete(HistoricalData).where(
+            condition, HistoricalData.id.in_(select(HistoricalData.id).where(condition).limit(size))
+        )
+
+    @staticmethod
+    def _invalidate_deleted(symbols: Iterable[str], start_date: Optional[date], end_date: Optional[date]):
+        cache = HistoricalDataRepository.cache
+        symbols = list(symbols)
+        if cache is None or not symbols:
+            return
+
+        def invalidate():
+            for symbol in symbols:
+                cache.invalidate_range(symbol, start_date, end_date)
+        BaseModel.on_commit(invalidate)
+
+    @staticmethod
+    def apply_retention(years: int, today: Optional[date] = None, batch_size: Optional[int] = None) -> int:
+        """Deletes every bar older than `years` years (retention policy), meant to run on a schedule.
+
+        On PostgreSQL, the yearly partitions lying entirely before the cutoff are dropped
+        (see detach_partition) rather than deleted row by row; the remaining rows before the
+        cutoff go through bulk_delete_historical_data.
+
+        Args:
+            years (int): Years of history kept.
+            today (date, optional): Reference day of the cutoff. Defaults to today.
+            batch_size (int, optional): Rows per DELETE.
+
+        Returns:
+            int: Number of rows deleted, those of the dropped partitions included.
+        """
+        today = today or date.today()
+        try:
+            cutoff = today.replace(year=today.year - years)
+        except ValueError:
+            # 29 February of a leap year.
+            cutoff = today.replace(year=today.year - years, day=28)
+
+        deleted = 0
+        with BaseModel.get_session(read_only=True) as session:
+            partitioned = session.get_bind().dialect.name == "postgresql"
+        partitions = HistoricalDataRepository.list_partitions() if partitioned else []
+        partition_years = sorted(int(name.rsplit("_y", 1)[1]) for name in partitions if re.search(r"_y\d{4}$", name))
+        for year in (year for year in partition_years if year < cutoff.year):
+            name = HistoricalDataRepository.partition_name(year)
+            with BaseModel.get_session() as session:
+                deleted += session.execute(
+                    text(f"SELECT count(*) FROM {HistoricalDataRepository._qualified(session, name)}")
+                ).scalar_one()
+            HistoricalDataRepository.detach_partition(year, drop=True)
+
+        deleted += HistoricalDataRepository.bulk_delete_historical_data(end_date=cutoff - timedelta(days=1), batch_size=batch_size)
+        BaseModel.logger.info(f"Retention of {years} years: {deleted} bars before {cutoff} deleted.")
+        return deleted
+
+    # Partition management. On PostgreSQL historical_data is range partitioned by year
+    # (see the partition_historical_data_by_year migration): queries bounded on `date`
+    # only scan the partitions of the requested years.
+    @staticmethod
+    def partition_name(year: int) -> str:
+        """Returns the name of the partition holding the bars of `year`."""
+        return f"{HistoricalData.__tablename__}_y{year}"
+
+    @staticmethod
+    def list_partitions() -> List[str]:
+        """Lists the attached partitions of historical_data, the DEFAULT one included."""
+        with BaseModel.get_session(read_only=True) as session:
+            return list(session.execute(
+                text(
+                    "SELECT child.relname FROM pg_inherits "
+                    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                    "WHERE pg_inherits.inhparent = CAST(:parent AS regclass) ORDER BY child.relname"
+                ),
+                {"parent": HistoricalDataRepository._qualified(session, HistoricalData.__tablename__)},
+            ).scalars())
+
+    @staticmethod
+    def create_partition(year: int) -> bool:
+        """Creates the partition of `year`, moving its bars out of the DEFAULT partition if needed.
+
+        Returns:
+            bool: False when the partition already exists.
+        """
+        name = HistoricalDataRepository.partition_name(year)
+        if name in HistoricalDataRepository.list_partitions():
+            return False
+
+        with BaseModel.get_session() as session:
+            parent = HistoricalDataRepository._qualified(session, HistoricalData.__tablename__)
+            default = HistoricalDataRepository._qualified(session, HistoricalDataRepository.DEFAULT_PARTITION)
+            partition = HistoricalDataRepository._qualified(session, name)
+            bounds = {"start": date(year, 1, 1), "end": date(year + 1, 1, 1)}
+            in_year = "date >= :start AND date < :end"
+            create = f"CREATE TABLE {partition} PARTITION OF {parent} FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+            stray = session.execute(text(f"SELECT count(*) FROM {default} WHERE {in_year}"), bounds).scalar_one()
+            if stray:
+                # A new partition cannot overlap rows of the DEFAULT one: detach it while its rows are moved.
+                session.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {default}"))
+                session.execute(text(create))
+                session.execute(text(f"INSERT INTO {partition} SELECT * FROM {default} WHERE {in_year}"), bounds)
+                session.execute(text(f"DELETE FROM {default} WHERE {in_year}"), bounds)
+                session.execute(text(f"ALTER TABLE {parent} ATTACH PARTITION {default} DEFAULT"))
+            else:
+                session.execute(text(create))
+            BaseModel.logger.info(f"Partition {name} created, {stray} bars moved from {HistoricalDataRepository.DEFAULT_PARTITION}.")
+        return True
+
+    @staticmethod
+    def ensure_partitions(years_ahead: int = 1, today: Optional[date] = None) -> List[str]:
+        """Creates any missing partition from the current year to `years_ahead` years ahead.
+
+        Meant to run on a schedule (e.g. daily), so new bars never pile up in the DEFAULT partition.
+
+        Returns:
+            List[str]: The partitions created.
+        """
+        current_year = (today or date.today()).year
+        return [
+            HistoricalDataRepository.partition_name(year)
+            for year in range(current_year, current_year + years_ahead + 1)
+            if HistoricalDataRepository.create_partition(year)
+        ]
+
+    @staticmethod
+    def detach_partition(year: int, drop: bool = False):
+        """Detaches the partition of `year` from historical_data, an O(1) alternative to deleting its rows.
+
+        The detached table keeps the bars, ready to be archived, unless `drop` is set.
+        The latest_bars rows that pointed into that year are recomputed.
+        """
+        name = HistoricalDataRepository.partition_name(year)
+        with BaseModel.get_session() as session:
+            parent = HistoricalDataRepository._qualified(session, HistoricalData.__tablename__)
+            partition = HistoricalDataRepository._qualified(session, name)
+            session.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {partition}"))
+            if drop:
+                session.execute(text(f"DROP TABLE {partition}"))
+            affected = session.execute(
+                select(LatestBar.symbol).where(LatestBar.date.between(date(year, 1, 1), date(year, 12, 31)))
+            ).scalars().all()
+            HistoricalDataRepository._refresh_latest_bars(session, affected)
+            BaseModel.logger.info(f"Partition {name} {'dropped' if drop else 'detached'}.")
+        if HistoricalDataRepository.cache is not None:
+            BaseModel.on_commit(HistoricalDataRepository.cache.clear)
+
+    @staticmethod
+    def _qualified(session: Session, name: str) -> str:
+        preparer = session.get_bind().dialect.identifier_preparer
+        schema = HistoricalData.__table__.schema
+        return f"{preparer.quote_schema(schema)}.{preparer.quote(name)}" if schema else preparer.quote(name)
 
     # RSI-related methods
     @staticmethod
     def get_historical_data_by_rsi(rsi: float) -> List[HistoricalData]:
-        with BaseModel.get_session() as session:
+        with BaseModel.get_session(read_only=True) as session:
             data = session.query(HistoricalData).filter_by(rsi=rsi).all()
             return data
 
     # MACD-related methods
     @staticmethod
     def get_historical_data_by_macd(macd: float) -> List[HistoricalData]:
-        with BaseModel.get_session() as session:
+        with BaseModel.get_session(read_only=True) as session:
             data = session.query(HistoricalData).filter_by(macd=macd).all()
             return data
 
     # SMA-related methods
     @staticmethod
     def get_historical_data_by_sma_50(sma_50: float) -> List[HistoricalData]:
-        with BaseModel.get_session() as session:
+        with BaseModel.get_session(read_only=True) as session:
             data = session.query(HistoricalData).filter_by(sma_50=sma_50).all()
             return data
 
     @staticmethod
     def get_historical_data_by_sma_200(sma_200: float) -> List[HistoricalData]:
-        with BaseModel.get_session() as session:
+        with BaseModel.get_session(read_only=True) as session:
             data = session.query(HistoricalData).filter_by(sma_200=sma_200).all()
             return data
 
     # Bollinger Bands-related methods
     @staticmethod
     def get_historical_data_by_bollinger_upper(bollinger_upper: float) -> List[HistoricalData]:
-        with BaseModel.get_session() as session:
+        with BaseModel.get_session(read_only=True) as session:
             data = session.query(HistoricalData).filter_by(bollinger_upper=bollinger_upper).all()
             return data
 
     @staticmethod
     def get_historical_data_by_bollinger_lower(bollinger_lower: float) -> List[HistoricalData]:
-        with BaseModel.get_session() as session:
+        with BaseModel.get_session(read_only=True) as session:
             data = session.query(HistoricalData).filter_by(bollinger_lower=bollinger_lower).all()
             return data
 
     # Volume-related methods
     @staticmethod
     def get_historical_data_by_volume(volume: int) -> List[HistoricalData]:
-        with BaseModel.get_session() as session:
+        with BaseModel.get_session(read_only=True) as session:
             data = session.query(HistoricalData).filter_by(volume=volume).all()
             return data
 
     # Price-related methods
     @staticmethod
     def get_historical_data_by_price(price: float) -> List[HistoricalData]:
-        with BaseModel.get_session() as session:
+        with BaseModel.get_session(read_only=True) as session:
             data = session.query(HistoricalData).filter_by(close=price).all()
             return data
 
     @staticmethod
     def get_historical_data_by_price_range(min_price: float, max_price: float) -> List[HistoricalData]:
-        with BaseModel.get_session() as session:
+        with BaseModel.get_session(read_only=True) as session:
             data = session.query(HistoricalData).filter(HistoricalData.close.between(min_price, max_price)).all()
             return data
+
+    @staticmethod
+    def iter_historical_data_by_price_range(
+            min_price: float, max_price: float, batch_size: Optional[int] = None) -> Iterator[HistoricalData]:
+        """Streams historical data within a close price range through a server-side cursor."""
+        yield from HistoricalDataRepository._stream(HistoricalData.close.between(min_price, max_price), batch_size)
+
+    @staticmethod
+    def iter_historical_arrays_by_price_range(
+            min_price: float,
+            max_price: float,
+            columns: Sequence[str] = ARRAY_COLUMNS,
+            batch_size: Optional[int] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """Streams historical data within a close price range as columnar chunks, ordered by symbol and date."""
+        yield from HistoricalDataRepository._stream_arrays(
+            HistoricalData.close.between(min_price, max_price), columns, batch_size
+        )
+
+    @staticmethod
+    def _stream(condition: ColumnElement[bool], batch_size: Optional[int]) -> Iterator[HistoricalData]:
+        batch_size = batch_size or HistoricalDataRepository.STREAM_BATCH_SIZE
+        with BaseModel.get_session(read_only=True) as session:
+            yield from session.query(HistoricalData).filter(condition).yield_per(batch_size)
+
+    @staticmethod
+    def _stream_arrays(
+            condition: ColumnElement[bool],
+            columns: Sequence[str],
+            batch_size: Optional[int]) -> Iterator[Dict[str, np.ndarray]]:
+        columns = validate_columns(columns)
+        batch_size = batch_size or HistoricalDataRepository.STREAM_BATCH_SIZE
+        stmt = (
+            select(HistoricalData.symbol, HistoricalData.date, *select_expressions(columns))
+            .where(condition)
+            .order_by(HistoricalData.symbol, HistoricalData.date)
+        )
+        with BaseModel.get_session(read_only=True) as session:
+            connection = session.connection().execution_options(stream_results=True, yield_per=batch_size)
+            for rows in connection.execute(stmt).partitions():
+                yield rows_to_arrays(rows, columns, leading=("symbol", "date"))
+
+    @staticmethod
+    def _fetch_arrays(condition: ColumnElement[bool], columns: Sequence[str]) -> Dict[str, np.ndarray]:
+        stmt = (
+            select(HistoricalData.symbol, HistoricalData.date, *select_expressions(columns))
+            .where(condition)
+            .order_by(HistoricalData.symbol, HistoricalData.date)
+        )
+        with BaseModel.get_session() as session:
+            rows = session.connection().execute(stmt).all()
+        return rows_to_arrays(rows, columns, leading=("symbol", "date"))
@@ -0,0 +1,172 @@
+import copy
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import select
+
+from stock_analyser_lib.indicators.incremental import advance_state, empty_state, seed_states
+from stock_analyser_lib.models.base import BaseModel
+from stock_analyser_lib.models.instrumentation import instrumented
+from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.models.indicator_state import IndicatorState
+from stock_analyser_lib.models.stock import Stock
+from stock_analyser_lib.repositories.bulk import (
+    RejectedRow, UpsertReport, chunked, chunked_upsert,
+)
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+from stock_analyser_lib.repositories.validation import enforces_foreign_keys, validate_rows
+
+
+class _BarsRefused(Exception):
+    """Raised to roll back the SAVEPOINT of a bar upsert the database partly refused."""
+
+    def __init__(self, rejected: List[RejectedRow]):
+        super().__init__(f"{len(rejected)} bars refused")
+        self.rejected = rejected
+
+
+@instrumented
+class IndicatorStateRepository:
+    """Repository class for IndicatorState model, keeping indicators current one bar at a time."""
+
+    @staticmethod
+    def get_indicator_states(symbols: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Retrieves the rolling states of the given symbols, keyed by symbol."""
+        return IndicatorStateRepository._load_states(symbols, read_only=True)
+
+    @staticmethod
+    def _load_states(symbols: Sequence[str], read_only: bool) -> Dict[str, Dict[str, Any]]:
+        states = {}
+        with BaseModel.get_session(read_only=read_only) as session:
+            for batch in chunked(symbols, HistoricalDataRepository.SYMBOLS_PER_QUERY):
+                stmt = select(IndicatorState.__table__).where(IndicatorState.symbol.in_(batch))
+                for row in session.execute(stmt).mappings():
+                    states[row["symbol"]] = dict(row, closes=list(row["closes"]))
+        return states
+
+    @staticmethod
+    def rebuild_indicator_states(symbols: Optional[Sequence[str]] = None, symbols_per_batch: int = 200) -> int:
+        """Rebuilds the rolling states from the stored history.
+
+        Args:
+            symbols (Sequence[str], optional): Symbols to rebuild. Defaults to every stock.
+            symbols_per_batch (int): Symbols read and computed together.
+
+        Returns:
+            int: Number of states written.
+        """
+        if symbols is None:
+            with BaseModel.get_session() as session:
+                symbols = session.execute(select(Stock.symbol).order_by(Stock.symbol)).scalars().all()
+
+        written = 0
+        for batch in chunked(symbols, symbols_per_batch):
+            states = IndicatorStateRepository._seed(batch)
+            with BaseModel.get_session() as session:
+                chunked_upsert(session, IndicatorState.__table__, states, ["symbol"])
+            written += len(states)
+        BaseModel.logger.info(f"Rebuilt {written} indicator states.")
+        return written
+
+    @staticmethod
+    def append_bars(bars: List[dict]) -> UpsertReport:
+        """Appends new daily bars and fills their indicators from the rolling states.
+
+        Reads the states of the bars' symbols once, updates them in O(1) per bar, then writes
+        the bars and the states in a single transaction. Symbols without a state are seeded
+        from their stored history first. Bars without a close, not after the last bar of
+        their state, or refused by validation or by the database, are rejected; the states
+        are then advanced again without them, so a rejected bar never enters a state.
+
+        Args:
+            bars (List[dict]): Rows keyed by historical_data column name, with at least symbol, date and close.
+        """
+        report = UpsertReport()
+        bars = sorted(bars, key=lambda bar: (bar["symbol"], str(bar["date"])))
+        symbols = list(dict.fromkeys(bar["symbol"] for bar in bars))
+        # Read from the primary: a lagging replica would advance an outdated state.
+        states = IndicatorStateRepository._load_states(symbols, read_only=False)
+        missing = [symbol for symbol in symbols if symbol not in states]
+        if missing:
+            states.update({state["symbol"]: state for state in IndicatorStateRepository._seed(missing)})
+
+        table = HistoricalData.__table__
+        key = HistoricalDataRepository.NATURAL_KEY
+        with BaseModel.get_session() as session:
+            check_foreign_keys = enforces_foreign_keys(session)
+            known: Dict[Any, Set[Any]] = {}
+            while True:
+                rows, sources, rejected, advanced = IndicatorStateRepository._advance(bars, states)
+                refused = validate_rows(session, table, rows, key, check_foreign_keys, known)[1]
+                if not refused:
+                    try:
+                        with session.begin_nested():
+                            written = chunked_upsert(session, table, rows, key, validate=False)
+                            if written.rejected:
+                                raise _BarsRefused(written.rejected)
+                        break
+                    except _BarsRefused as e:
+                        refused = e.rejected
+                # Only the first refused bar of a symbol is known to be bad: the later ones were computed from
+                # a state that went through it. Drop it and advance the states again without it.
+                refused_by_row = {id(rejected_row.row): rejected_row for rejected_row in refused}
+                first_refused: Dict[str, Tuple[dict, RejectedRow]] = {}
+                for bar, row in zip(sources, rows):
+                    if id(row) in refused_by_row and bar["symbol"] not in first_refused:
+                        first_refused[bar["symbol"]] = (bar, refused_by_row[id(row)])
+                dropped = {id(bar) for bar, _ in first_refused.values()}
+                bars = [bar for bar in bars if id(bar) not in dropped]
+                report.rejected.extend(rejected_row for _, rejected_row in first_refused.values())
+
+            report.inserted, report.updated = written.inserted, written.updated
+            report.rejected.extend(rejected)
+            HistoricalDataRepository._refresh_latest_bars(session, {row["symbol"] for row in rows})
+            states_report = chunked_upsert(session, IndicatorState.__table__, list(advanced.values()), ["symbol"])
+            if states_report.rejected:
+                raise ValueError(
+                    f"Indicator states refused, no bar appended: "
+                    f"{'; '.join(rejected_state.reason for rejected_state in states_report.rejected)}"
+                )
+        HistoricalDataRepository._invalidate(rows)
+        BaseModel.logger.info(
+            f"Appended {report.inserted + report.updated} bars, {len(report.rejected)} rejected."
+        )
+        return report
+
+    @staticmethod
+    def _advance(
+            bars: List[dict],
+            states: Dict[str, Dict[str, Any]]) -> Tuple[List[dict], List[dict], List[RejectedRow], Dict[str, Dict[str, Any]]]:
+        """Advances copies of `states` over bars sorted by symbol and date, leaving `states` untouched.
+
+        Returns:
+            Tuple: The rows to write with their indicators, the bar each row comes from, the bars
+                rejected before any write, and the advanced states by symbol.
+        """
+        rows, sources, rejected, advanced = [], [], [], {}
+        for bar in bars:
+            symbol = bar["symbol"]
+            if symbol not in advanced:
+                advanced[symbol] = copy.deepcopy(states.get(symbol) or empty_state(symbol))
+            state = advanced[symbol]
+            bar_date = date.fromisoformat(bar["date"]) if isinstance(bar["date"], str) else bar["date"]
+            if bar.get("close") is None:
+                rejected.append(RejectedRow(row=bar, reason="close is required to update the indicators"))
+                continue
+            if state["last_date"] is not None and bar_date <= state["last_date"]:
+                rejected.append(RejectedRow(
+                    row=bar, reason=f"bar is not after the indicator state of {symbol} ({state['last_date']})"
+                ))
+                continue
+            rows.append(dict(bar, **advance_state(state, bar_date, float(bar["close"]))))
+            sources.append(bar)
+        advanced = {symbol: state for symbol, state in advanced.items() if state["last_date"] is not None}
+        return rows, sources, rejected, advanced
+
+    @staticmethod
+    def _seed(symbols: Sequence[str]) -> List[Dict[str, Any]]:
+        states = []
+        for batch in chunked(symbols, HistoricalDataRepository.SYMBOLS_PER_QUERY):
+            arrays = HistoricalDataRepository._fetch_arrays(HistoricalData.symbol.in_(batch), ("close",))
+            states.extend(seed_states(arrays["symbol"], arrays["date"], arrays["close"]))
+        return states
@@ -0,0 +1,92 @@
+"""Parallel ingestion of historical data, sharding symbols across a process pool.
+
+Every worker process writes through its own connection pool: connections inherited
+from the parent are dropped after fork (see reset_engine_after_fork), and workers
+started with "spawn" or "forkserver" build their engine on import.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from stock_analyser_lib.models.base import BaseModel
+from stock_analyser_lib.repositories.bulk import UpsertReport, chunked
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+
+
+# Loads the bars of one symbol, as rows keyed by historical_data column name. Must be picklable.
+BarLoader = Callable[[str], Iterable[Mapping[str, Any]]]
+
+
+def _init_worker():
+    # Writes made by a worker are invalidated in the parent's cache, not in a copy of it.
+    HistoricalDataRepository.disable_cache()
+
+
+def ingest_symbol_batch(load_bars: BarLoader, symbols: Sequence[str], chunk_size: Optional[int] = None) -> UpsertReport:
+    """Streams the bars of `symbols` into the bulk upsert, in a single transaction."""
+    rows = chain.from_iterable(load_bars(symbol) for symbol in symbols)
+    return HistoricalDataRepository.bulk_upsert_historical_data(rows, chunk_size)
+
+
+def ingest_historical_data(
+        symbols: Sequence[str],
+        load_bars: BarLoader,
+        workers: Optional[int] = None,
+        symbols_per_task: int = 20,
+        max_in_flight: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        mp_context: Optional[Any] = None) -> UpsertReport:
+    """Loads and upserts the bars of many symbols in parallel worker processes.
+
+    Symbols are split into tasks of `symbols_per_task`. At most `max_in_flight` tasks are
+    queued at once, so a slow database holds back the producers instead of piling up
+    results in memory. The reports of every task are merged into one.
+
+    Args:
+        symbols (Sequence[str]): Symbols to ingest.
+        load_bars (BarLoader): Module-level function returning the bars of a symbol.
+        workers (int, optional): Worker processes. Defaults to the number of CPUs.
+        symbols_per_task (int): Symbols loaded and written in one transaction.
+        max_in_flight (int, optional): Tasks queued or running at once. Defaults to twice `workers`.
+        chunk_size (int, optional): Rows per upsert statement, see bulk_upsert_historical_data.
+        mp_context (optional): multiprocessing context, e.g. multiprocessing.get_context("spawn").
+
+    Raises:
+        Exception: The first error raised by a task; the tasks not started yet are cancelled.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    tasks = iter(chunked(symbols, symbols_per_task))
+    report = UpsertReport()
+    pending: Dict[Future, List[str]] = {}
+
+    with ProcessPoolExecutor(
+            max_workers=workers, mp_context=mp_context or multiprocessing.get_context(), initializer=_init_worker) as pool:
+        try:
+            while True:
+                for batch in tasks:
+                    pending[pool.submit(ingest_symbol_batch, load_bars, batch, chunk_size)] = batch
+                    if len(pending) >= max_in_flight:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = pending.pop(future)
+                    report.merge(future.result())
+                    if HistoricalDataRepository.cache is not None:
+                        for symbol in batch:
+                            HistoricalDataRepository.cache.invalidate_range(symbol, None, None)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+    BaseModel.logger.info(
+        f"Parallel historical_data ingestion of {len(symbols)} symbols: {report.inserted} inserted, "
+        f"{report.updated} updated, {len(report.rejected)} rejected."
+    )
+    return report
@@ -0,0 +1,200 @@
+"""Parquet export and import of historical_data, streamed through Arrow record batches.
+
+Requires the optional pyarrow dependency (pip install stock-analyser-lib[parquet]).
+"""
+
+import os
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Float, cast, select
+
+from stock_analyser_lib.models.base import BaseModel
+from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.repositories.bulk import UpsertReport
+from stock_analyser_lib.repositories.columnar import FLOAT_COLUMNS
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+
+
+# Exported columns, in file order.
+PARQUET_COLUMNS = ("symbol", "date") + FLOAT_COLUMNS + ("volume",)
+
+# Layouts of export_parquet: one file, or a hive-style directory per symbol or per year.
+PARTITION_LAYOUTS = (None, "symbol", "year")
+
+
+def _pyarrow() -> Tuple[Any, Any]:
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet support requires pyarrow: pip install stock-analyser-lib[parquet]") from e
+    return pyarrow, pyarrow.parquet
+
+
+def parquet_schema() -> Any:
+    """Arrow schema of the exported files: prices and indicators as float64, NULL kept as null."""
+    pa, _ = _pyarrow()
+    return pa.schema(
+        [("symbol", pa.string()), ("date", pa.date32())]
+        + [(column, pa.float64()) for column in FLOAT_COLUMNS]
+        + [("volume", pa.int64())]
+    )
+
+
+def _record_batches(
+        symbols: Optional[Sequence[str]],
+        start_date: Optional[date],
+        end_date: Optional[date],
+        order_by_date: bool,
+        batch_size: int) -> Iterator[Any]:
+    pa, _ = _pyarrow()
+    schema = parquet_schema()
+    stmt = select(
+        HistoricalData.symbol, HistoricalData.date,
+        *(cast(getattr(HistoricalData, column), Float).label(column) for column in FLOAT_COLUMNS),
+        HistoricalData.volume,
+    )
+    if symbols is not None:
+        stmt = stmt.where(HistoricalData.symbol.in_(list(symbols)))
+    if start_date is not None:
+        stmt = stmt.where(HistoricalData.date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(HistoricalData.date <= end_date)
+    if order_by_date:
+        stmt = stmt.order_by(HistoricalData.date, HistoricalData.symbol)
+    else:
+        stmt = stmt.order_by(HistoricalData.symbol, HistoricalData.date)
+
+    with BaseModel.get_session(read_only=True) as session:
+        connection = session.connection().execution_options(stream_results=True, yield_per=batch_size)
+        for rows in connection.execute(stmt).partitions():
+            columns = list(zip(*rows))
+            yield pa.record_batch(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+            )
+
+
+def _split(batch: Any, keys: List[Any]) -> Iterator[Tuple[Any, Any]]:
+    # Rows are sorted by the partition key, so every key is one contiguous slice.
+    start = 0
+    for position in range(1, len(keys) + 1):
+        if position == len(keys) or keys[position] != keys[start]:
+            yield keys[start], batch.slice(start, position - start)
+            start = position
+
+
+def export_parquet(
+        path: str,
+        partition_by: Optional[str] = None,
+        symbols: Optional[Sequence[str]] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        batch_size: int = HistoricalDataRepository.STREAM_BATCH_SIZE,
+        compression: str = "zstd") -> int:
+    """Streams historical_data into Parquet, one record batch of `batch_size` rows at a time.
+
+    Args:
+        path (str): Output file, or output directory when partitioned.
+        partition_by (str, optional): None for a single file, "symbol" for `symbol=<SYMBOL>/data.parquet`
+            files, or "year" for `year=<YEAR>/data.parquet` files (hive layout, readable as one dataset).
+        symbols (Sequence[str], optional): Symbols to export. Defaults to every symbol.
+        start_date (date, optional): First date exported.
+        end_date (date, optional): Last date exported.
+        batch_size (int): Rows fetched and written per batch.
+        compression (str): Parquet compression codec.
+
+    Returns:
+        int: Number of rows written.
+    """
+    if partition_by not in PARTITION_LAYOUTS:
+        raise ValueError(f"Unsupported partition layout {partition_by!r}, expected one of {PARTITION_LAYOUTS}.")
+    _, pq = _pyarrow()
+    schema = parquet_schema()
+    if partition_by == "symbol":
+        # The symbol is carried by the directory name only, as in any hive layout.
+        schema = schema.remove(schema.get_field_index("symbol"))
+    writers: Dict[Any, Any] = {}
+    written = 0
+
+    def writer_for(key: Any) -> Any:
+        if key not in writers:
+            # Batches arrive sorted by the partition key: the previous file is complete.
+            for previous in writers.values():
+                previous.close()
+            writers.clear()
+            if partition_by is None:
+                file_path = path
+            else:
+                directory = os.path.join(path, f"{partition_by}={key}")
+                os.makedirs(directory, exist_ok=True)
+                file_path = os.path.join(directory, "data.parquet")
+            writers[key] = pq.ParquetWriter(file_path, schema, compression=compression)
+        return writers[key]
+
+    try:
+        for batch in _record_batches(symbols, start_date, end_date, partition_by == "year", batch_size):
+            if partition_by is None:
+                pieces = [(None, batch)]
+            elif partition_by == "symbol":
+                pieces = _split(batch.drop_columns(["symbol"]), batch.column("symbol").to_pylist())
+            else:
+                pieces = _split(batch, [day.year for day in batch.column("date").to_pylist()])
+            for key, piece in pieces:
+                writer_for(key).write_batch(piece)
+                written += piece.num_rows
+        if partition_by is None and not writers:
+            writer_for(None)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    BaseModel.logger.info(f"Exported {written} historical_data rows to {path}.")
+    return written
+
+
+def _partitioning(path: str) -> Any:
+    # The layout is read from the directory names, with explicit key types: inferred ones
+    # would turn numeric symbols into integers.
+    pa, _ = _pyarrow()
+    import pyarrow.dataset as ds
+
+    if not os.path.isdir(path):
+        return None
+    key_types = {"symbol": pa.string(), "year": pa.int32()}
+    for entry in os.listdir(path):
+        key = entry.split("=", 1)[0]
+        if "=" in entry and key in key_types:
+            return ds.partitioning(pa.schema([(key, key_types[key])]), flavor="hive")
+    return None
+
+
+def _rows(path: str, batch_size: int) -> Iterator[Dict[str, Any]]:
+    _pyarrow()
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format="parquet", partitioning=_partitioning(path))
+    # The hive "symbol" key becomes a column again; "year" is only a layout key.
+    columns = [name for name in dataset.schema.names if name in PARQUET_COLUMNS]
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        yield from batch.to_pylist()
+
+
+def import_parquet(
+        path: str,
+        use_copy: bool = False,
+        batch_size: int = HistoricalDataRepository.STREAM_BATCH_SIZE) -> UpsertReport:
+    """Loads Parquet files written by export_parquet (a file or a partitioned directory) into historical_data.
+
+    Rows are streamed batch by batch into the upsert path, keyed on (symbol, date).
+
+    Args:
+        path (str): Parquet file or directory.
+        use_copy (bool): Loads through PostgreSQL COPY (copy_upsert_historical_data) instead of
+            the chunked bulk upsert, faster but without per-row rejection.
+        batch_size (int): Rows decoded per batch.
+    """
+    rows = _rows(path, batch_size)
+    if use_copy:
+        return HistoricalDataRepository.copy_upsert_historical_data(rows)
+    return HistoricalDataRepository.bulk_upsert_historical_data(rows)
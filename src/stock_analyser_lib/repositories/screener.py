@@ -0,0 +1,149 @@
+import copy
+from datetime import date
+from typing import List, Optional, Sequence
+
+from sqlalchemy import Select, and_, func, select
+from sqlalchemy.sql.elements import ColumnElement
+
+from stock_analyser_lib.models.base import BaseModel
+from stock_analyser_lib.models.historical_data import HistoricalData
+
+
+def rsi_below(level: float) -> ColumnElement[bool]:
+    """Oversold screen, e.g. rsi_below(30)."""
+    return HistoricalData.rsi < level
+
+
+def rsi_above(level: float) -> ColumnElement[bool]:
+    """Overbought screen, e.g. rsi_above(70)."""
+    return HistoricalData.rsi > level
+
+
+def close_above(column: str) -> ColumnElement[bool]:
+    """Close above another column of the same bar, e.g. close_above("sma_200")."""
+    return HistoricalData.close > getattr(HistoricalData, column)
+
+
+def close_below(column: str) -> ColumnElement[bool]:
+    """Close below another column of the same bar, e.g. close_below("bollinger_lower")."""
+    return HistoricalData.close < getattr(HistoricalData, column)
+
+
+def min_volume(volume: int) -> ColumnElement[bool]:
+    """Liquidity screen on the bar's volume."""
+    return HistoricalData.volume >= volume
+
+
+class Screener:
+    """Composable screen over historical_data, evaluated entirely in SQL.
+
+    Predicates are SQLAlchemy expressions on HistoricalData columns, so ranges and
+    column-to-column comparisons combine freely. Every method returns a new screener.
+
+    Example:
+        oversold = (
+            Screener()
+            .where(rsi_below(30), close_below("bollinger_lower"), min_volume(1_000_000))
+            .on_latest_bar()
+        )
+        symbols = oversold.symbols()
+    """
+
+    def __init__(self):
+        self._predicates: List[ColumnElement[bool]] = []
+        self._symbols: Optional[List[str]] = None
+        self._start_date: Optional[date] = None
+        self._end_date: Optional[date] = None
+        self._latest = False
+        self._order_by: List[ColumnElement] = []
+        self._limit: Optional[int] = None
+
+    def _clone(self) -> "Screener":
+        screener = copy.copy(self)
+        screener._predicates = list(self._predicates)
+        screener._order_by = list(self._order_by)
+        return screener
+
+    def where(self, *predicates: ColumnElement[bool]) -> "Screener":
+        """Adds predicates, all of which a bar must match (e.g. HistoricalData.rsi < 30)."""
+        screener = self._clone()
+        screener._predicates.extend(predicates)
+        return screener
+
+    def for_symbols(self, symbols: Sequence[str]) -> "Screener":
+        """Restricts the screen to a universe of symbols."""
+        screener = self._clone()
+        screener._symbols = list(symbols)
+        return screener
+
+    def between(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> "Screener":
+        """Restricts the screen to bars within [start_date, end_date]."""
+        screener = self._clone()
+        screener._start_date, screener._end_date = start_date, end_date
+        return screener
+
+    def on_latest_bar(self, as_of: Optional[date] = None) -> "Screener":
+        """Screens only the latest bar of every symbol (on or before `as_of`, or the end of the date range)."""
+        screener = self._clone()
+        screener._latest = True
+        if as_of is not None:
+            screener._end_date = as_of
+        return screener
+
+    def order_by(self, *columns: ColumnElement) -> "Screener":
+        """Orders the matching rows, e.g. order_by(HistoricalData.rsi)."""
+        screener = self._clone()
+        screener._order_by.extend(columns)
+        return screener
+
+    def limit(self, limit: int) -> "Screener":
+        """Returns at most `limit` matching rows."""
+        screener = self._clone()
+        screener._limit = limit
+        return screener
+
+    def _scope(self, stmt: Select) -> Select:
+        if self._symbols is not None:
+            stmt = stmt.where(HistoricalData.symbol.in_(self._symbols))
+        if self._start_date is not None:
+            stmt = stmt.where(HistoricalData.date >= self._start_date)
+        if self._end_date is not None:
+            stmt = stmt.where(HistoricalData.date <= self._end_date)
+        return stmt
+
+    def statement(self, *entities) -> Select:
+        """Builds the SELECT of `entities` (HistoricalData by default) over the matching bars."""
+        stmt = select(*(entities or (HistoricalData,)))
+        if self._latest:
+            # Latest date of every symbol first, read from the (symbol, date) index; predicates apply to that bar only.
+            latest = self._scope(
+                select(HistoricalData.symbol, func.max(HistoricalData.date).label("date")).group_by(HistoricalData.symbol)
+            ).subquery()
+            stmt = stmt.select_from(HistoricalData).join(
+                latest, and_(HistoricalData.symbol == latest.c.symbol, HistoricalData.date == latest.c.date)
+            )
+        else:
+            stmt = self._scope(stmt)
+        stmt = stmt.where(*self._predicates)
+        if self._order_by:
+            stmt = stmt.order_by(*self._order_by)
+        if self._limit is not None:
+            stmt = stmt.limit(self._limit)
+        return stmt
+
+    def rows(self) -> List[HistoricalData]:
+        """Returns the matching bars."""
+        with BaseModel.get_session(read_only=True) as session:
+            return list(session.execute(self.statement()).scalars())
+
+    def symbols(self) -> List[str]:
+        """Returns the distinct symbols having at least one matching bar, sorted."""
+        stmt = self.statement(HistoricalData.symbol).distinct().order_by(None).order_by(HistoricalData.symbol)
+        with BaseModel.get_session(read_only=True) as session:
+            return list(session.execute(stmt).scalars())
+
+    def count(self) -> int:
+        """Returns the number of matching bars."""
+        stmt = select(func.count()).select_from(self.statement(HistoricalData.id).subquery())
+        with BaseModel.get_session(read_only=True) as session:
+            return session.execute(stmt).scalar_one()
@@ -1,40 +1,43 @@
-from typing import Optional, List
+from typing import Optional, List, Sequence
 
-from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import delete
 from sqlalchemy.inspection import inspect
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import Session, joinedload
 
+from stock_analyser_lib.models.indicator_state import IndicatorState
+from stock_analyser_lib.models.latest_bar import LatestBar
 from stock_analyser_lib.models.stock import Stock
 from stock_analyser_lib.models.base import BaseModel
+from stock_analyser_lib.models.instrumentation import instrumented
+from stock_analyser_lib.repositories.bulk import UpsertReport, chunked, chunked_upsert
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+from stock_analyser_lib.repositories.stock_universe import stock_universe
 
 
+@instrumented
 class StockRepository:
     """Repository class for Stock model to handle database operations."""
 
     @staticmethod
-    def bulk_upsert_historical_data(data_list: List[dict]):
-        """Performs bulk Upsert (Insert or Update) on historical data."""
+    def bulk_upsert_historical_data(data_list: List[dict], chunk_size: Optional[int] = None) -> UpsertReport:
+        """Performs bulk Upsert (Insert or Update) on stocks.
+
+        Rows are sent in chunks sized to stay below the bind parameter limit, each under
+        its own SAVEPOINT. Rows refused by the database are isolated and returned as rejected.
+
+        Args:
+            data_list (List[dict]): Rows keyed by column name.
+            chunk_size (int, optional): Rows per statement. Defaults to the largest size allowed.
+        """
         with BaseModel.get_session() as session:
-            try:
-                stmt = insert(Stock).values(data_list)
-
-                primary_keys = [key.name for key in inspect(Stock).primary_key]
-
-                update_keys = {key: getattr(stmt.excluded, key) for key in data_list[0].keys() if key not in primary_keys}
-
-                stmt = stmt.on_conflict_do_update(
-                    index_elements=primary_keys,  # Conflict condition
-                    set_=update_keys
-                )
-                session.execute(stmt)
-                BaseModel.logger.info("Bulk insert successful.")
-            except IntegrityError:
-                BaseModel.logger.error("Bulk insert failed. Falling back to individual inserts.")
-                session.rollback()
-                # If bulk insert fails, fall back to inserting records one by one using merge()
-                for data in data_list:
-                    StockRepository.add_stock(**data)
+            primary_keys = [key.name for key in inspect(Stock).primary_key]
+            report = chunked_upsert(session, Stock.__table__, data_list, primary_keys, chunk_size)
+            BaseModel.logger.info(
+                f"Bulk stocks upsert: {report.inserted} inserted, {report.updated} updated, "
+                f"{len(report.rejected)} rejected."
+            )
+        BaseModel.on_commit(stock_universe.invalidate)
+        return report
 
     @staticmethod
     def add_stock(
@@ -47,32 +50,48 @@ class StockRepository:
         with BaseModel.get_session() as session:
             stock = Stock(symbol=symbol, name=name, sector=sector, industry=industry, market_cap=market_cap)
             session.merge(stock)
-            BaseModel.logger.info(f"Stock {symbol} added successfully.")
+            BaseModel.logger.debug(f"Stock {symbol} added successfully.")
+        BaseModel.on_commit(stock_universe.invalidate)
 
     @staticmethod
     def get_stock_by_symbol(symbol: str) -> Optional[Stock]:
-        """Retrieves a stock by its symbol."""
-        with BaseModel.get_session() as session:
-            stock = session.query(Stock).filter_by(symbol=symbol).first()
-            return stock
+        """Retrieves a stock by its symbol.
+
+        Served from the stock universe, except inside a unit of work whose writes it cannot see yet.
+        """
+        if BaseModel.in_unit_of_work():
+            with BaseModel.get_session() as session:
+                return session.get(Stock, symbol)
+        return stock_universe.snapshot().by_symbol.get(symbol)
 
     @staticmethod
-    def get_stock_by_sector(sector: str) -> Optional[Stock]:
-        """Retrieves a stock by its symbol."""
-        with BaseModel.get_session() as session:
-            return session.query(Stock).filter_by(sector=sector).first()
+    def get_stock_by_sector(sector: str) -> List[Stock]:
+        """Retrieves every stock of a sector, ordered by symbol.
+
+        Served from the stock universe, except inside a unit of work whose writes it cannot see yet.
+        """
+        if BaseModel.in_unit_of_work():
+            with BaseModel.get_session() as session:
+                return session.query(Stock).filter_by(sector=sector).order_by(Stock.symbol).all()
+        snapshot = stock_universe.snapshot()
+        return [snapshot.by_symbol[symbol] for symbol in sorted(snapshot.by_sector.get(sector, ()))]
 
     @staticmethod
-    def get_stock_by_industry(industry: str) -> Optional[Stock]:
-        """Retrieves a stock by its symbol."""
-        with BaseModel.get_session() as session:
-            stock = session.query(Stock).filter_by(industry=industry).first()
-            return stock
+    def get_stock_by_industry(industry: str) -> List[Stock]:
+        """Retrieves every stock of an industry, ordered by symbol.
+
+        Served from the stock universe, except inside a unit of work whose writes it cannot see yet.
+        """
+        if BaseModel.in_unit_of_work():
+            with BaseModel.get_session() as session:
+                return session.query(Stock).filter_by(industry=industry).order_by(Stock.symbol).all()
+        snapshot = stock_universe.snapshot()
+        return [snapshot.by_symbol[symbol] for symbol in sorted(snapshot.by_industry.get(industry, ()))]
 
     @staticmethod
     def get_all_stocks() -> List[Stock]:
         """Retrieves all stocks from the database."""
-        with BaseModel.get_session() as session:
+        with BaseModel.get_session(read_only=True) as session:
             stocks = session.query(Stock).all()
             return stocks
 
@@ -85,11 +104,48 @@ class StockRepository:
                 for key, value in kwargs.items():
                     if hasattr(stock, key):
                         setattr(stock, key, value)
+        BaseModel.on_commit(stock_universe.invalidate)
 
     @staticmethod
-    def delete_stock(symbol: str):
-        """Deletes a stock from the database."""
+    def delete_stock(symbol: str) -> int:
+        """Deletes a stock from the database, with its bars, latest bar and indicator state.
+
+        Returns:
+            int: Number of stocks deleted (0 or 1).
+        """
+        return StockRepository.delete_stocks([symbol])
+
+    @staticmethod
+    def delete_stocks(symbols: Sequence[str], batch_size: Optional[int] = None) -> int:
+        """Deletes stocks and everything referencing them with set-based statements.
+
+        The bars go first, in bounded batches (see HistoricalDataRepository.bulk_delete_historical_data),
+        so the final DELETE on stocks only cascades over the few rows left instead of loading the
+        children into the session.
+
+        Args:
+            symbols (Sequence[str]): Symbols of the stocks to delete.
+            batch_size (int, optional): Bars per DELETE.
+
+        Returns:
+            int: Number of stocks deleted.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return 0
+        bars = HistoricalDataRepository.bulk_delete_historical_data(symbols=symbols, batch_size=batch_size)
         with BaseModel.get_session() as session:
-            stock = session.query(Stock).filter_by(symbol=symbol).first()
-            if stock:
-                session.delete(stock)
+            deleted = StockRepository._delete_rows(session, symbols)
+        BaseModel.logger.info(f"Deleted {deleted} stocks and {bars} historical_data rows.")
+        BaseModel.on_commit(stock_universe.invalidate)
+        return deleted
+
+    @staticmethod
+    def _delete_rows(session: Session, symbols: Sequence[str]) -> int:
+        """Deletes the stocks with their indicator state and latest bar, once their bars are gone."""
+        deleted = 0
+        for batch in chunked(symbols, HistoricalDataRepository.SYMBOLS_PER_QUERY):
+            session.execute(delete(IndicatorState).where(IndicatorState.symbol.in_(batch)))
+            session.execute(delete(LatestBar).where(LatestBar.symbol.in_(batch)))
+            deleted += session.execute(delete(Stock).where(Stock.symbol.in_(batch))).rowcount
+        return deleted
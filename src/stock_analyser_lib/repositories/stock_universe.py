@@ -0,0 +1,133 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from stock_analyser_lib.models.base import BaseModel
+from stock_analyser_lib.models.stock import Stock
+
+
+@dataclass(frozen=True)
+class UniverseSnapshot:
+    """One consistent view of the stocks table, as loaded by StockUniverse."""
+    loaded_at: float
+    by_symbol: Dict[str, Stock]
+    by_sector: Dict[str, FrozenSet[str]]
+    by_industry: Dict[str, FrozenSet[str]]
+    # Symbols ordered by decreasing market cap, stocks without one last.
+    ranked: Tuple[str, ...]
+
+
+class StockUniverse:
+    """In-process index of the stocks table.
+
+    The whole table is loaded in one query on first use, then symbol lookups, sector/industry
+    membership and market-cap rankings are served from memory. Writes made through
+    StockRepository invalidate the index; `ttl` bounds how long writes from other
+    processes can go unnoticed.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._snapshot: Optional[UniverseSnapshot] = None
+        # Bumped by every invalidation: a load that started before one is not kept.
+        self._generation = 0
+        # _lock serialises the loads, _state_lock guards the snapshot and the generation.
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Drops the loaded snapshot, the next read reloads the table."""
+        with self._state_lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def refresh(self) -> None:
+        """Reloads the table now."""
+        with self._lock:
+            self._reload()
+
+    def _reload(self) -> UniverseSnapshot:
+        with self._state_lock:
+            generation = self._generation
+        snapshot = self._load()
+        with self._state_lock:
+            if generation == self._generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def _current(self) -> UniverseSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - snapshot.loaded_at > self.ttl:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or time.monotonic() - snapshot.loaded_at > self.ttl:
+                    snapshot = self._reload()
+        return snapshot
+
+    @staticmethod
+    def _load() -> UniverseSnapshot:
+        with BaseModel.get_session(read_only=True) as session:
+            stocks = session.execute(select(Stock)).scalars().all()
+
+        by_sector: Dict[str, set] = {}
+        by_industry: Dict[str, set] = {}
+        for stock in stocks:
+            if stock.sector is not None:
+                by_sector.setdefault(stock.sector, set()).add(stock.symbol)
+            if stock.industry is not None:
+                by_industry.setdefault(stock.industry, set()).add(stock.symbol)
+        ranked = sorted(stocks, key=lambda stock: (stock.market_cap is None, -(stock.market_cap or 0), stock.symbol))
+        BaseModel.logger.debug(f"Stock universe loaded: {len(stocks)} stocks.")
+        return UniverseSnapshot(
+            loaded_at=time.monotonic(),
+            by_symbol={stock.symbol: stock for stock in stocks},
+            by_sector={sector: frozenset(symbols) for sector, symbols in by_sector.items()},
+            by_industry={industry: frozenset(symbols) for industry, symbols in by_industry.items()},
+            ranked=tuple(stock.symbol for stock in ranked),
+        )
+
+    def snapshot(self) -> UniverseSnapshot:
+        """Returns the loaded snapshot, reloading it when missing or older than `ttl`."""
+        return self._current()
+
+    def get(self, symbol: str) -> Optional[Stock]:
+        """Returns the stock with the given symbol, or None."""
+        return self._current().by_symbol.get(symbol)
+
+    def symbols(self) -> FrozenSet[str]:
+        """Returns every symbol of the universe."""
+        return frozenset(self._current().by_symbol)
+
+    def sector_members(self, sector: str) -> FrozenSet[str]:
+        """Returns the symbols of every stock in a sector."""
+        return self._current().by_sector.get(sector, frozenset())
+
+    def industry_members(self, industry: str) -> FrozenSet[str]:
+        """Returns the symbols of every stock in an industry."""
+        return self._current().by_industry.get(industry, frozenset())
+
+    def top_by_market_cap(
+            self, limit: Optional[int] = None, sector: Optional[str] = None, industry: Optional[str] = None) -> List[Stock]:
+        """Returns stocks ranked by decreasing market cap, optionally restricted to a sector and/or industry.
+
+        Args:
+            limit (int, optional): Maximum number of stocks returned.
+            sector (str, optional): Only rank stocks of this sector.
+            industry (str, optional): Only rank stocks of this industry.
+        """
+        snapshot = self._current()
+        members = None
+        if sector is not None:
+            members = snapshot.by_sector.get(sector, frozenset())
+        if industry is not None:
+            industry_members = snapshot.by_industry.get(industry, frozenset())
+            members = industry_members if members is None else members & industry_members
+        symbols = snapshot.ranked if members is None else [symbol for symbol in snapshot.ranked if symbol in members]
+        return [snapshot.by_symbol[symbol] for symbol in symbols[:limit]]
+
+
+# Shared universe, invalidated by the StockRepository writes.
+stock_universe = StockUniverse()
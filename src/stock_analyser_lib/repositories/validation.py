@@ -0,0 +1,168 @@
+"""Batch validation of upsert rows against the column types of the target table.
+
+Rows the database would refuse are split out with a reason before any SQL is sent, so a
+bad row no longer costs a failed statement and the bisecting fallback of chunked_upsert:
+    - NULL in a NOT NULL column,
+    - NUMERIC(p, s) values that overflow p - s integer digits once rounded to s decimals,
+    - INTEGER / SMALLINT / BIGINT values outside of the column's range,
+    - strings longer than a VARCHAR(n),
+    - foreign keys missing from the referenced table (one query per column and batch),
+    - duplicate keys within the batch, the last occurrence winning.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import BigInteger, Column, Float, Integer, Numeric, SmallInteger, String, Table, select
+from sqlalchemy.orm import Session
+
+
+# Bound values per IN list of the foreign key lookups.
+FOREIGN_KEYS_PER_QUERY = 10000
+
+# Ranges of the integer column types, the most specific type first.
+INTEGER_RANGES = (
+    (SmallInteger, np.iinfo(np.int16)),
+    (BigInteger, np.iinfo(np.int64)),
+    (Integer, np.iinfo(np.int32)),
+)
+
+
+@dataclass
+class RejectedRow:
+    """A row refused by the database, with the reason reported by the driver."""
+    row: Mapping[str, Any]
+    reason: str
+
+
+def _reject(reasons: np.ndarray, mask: np.ndarray, reason: Any) -> None:
+    # Keeps the first reason of every row; `reason` is a string or a function of the row position.
+    for position in np.flatnonzero(mask & np.equal(reasons, None)):
+        reasons[position] = reason(position) if callable(reason) else reason
+
+
+def _as_floats(values: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Converts values to float64, None as NaN. Returns the floats and the mask of unconvertible values."""
+    try:
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64), np.zeros(len(values), bool)
+    except (TypeError, ValueError):
+        floats = np.full(len(values), np.nan)
+        invalid = np.zeros(len(values), bool)
+        for position, value in enumerate(values):
+            if value is None:
+                continue
+            try:
+                floats[position] = float(value)
+            except (TypeError, ValueError):
+                invalid[position] = True
+        return floats, invalid
+
+
+def _check_column(column: Column, values: List[Any], reasons: np.ndarray) -> None:
+    name = column.name
+    nulls = np.fromiter((value is None for value in values), bool, len(values))
+    if not column.nullable and not (column.primary_key and column.autoincrement is True):
+        _reject(reasons, nulls, f"{name} is NULL")
+
+    column_type = column.type
+    if isinstance(column_type, Numeric) and not isinstance(column_type, Float) and column_type.precision is not None:
+        floats, invalid = _as_floats(values)
+        _reject(reasons, invalid, lambda position: f"{name}={values[position]!r} is not a number")
+        _reject(reasons, ~nulls & ~invalid & ~np.isfinite(floats), lambda position: f"{name}={values[position]!r} is not finite")
+        scale = column_type.scale or 0
+        limit = 10.0 ** (column_type.precision - scale)
+        with np.errstate(invalid="ignore"):
+            overflow = np.abs(np.round(floats, scale)) >= limit
+        _reject(
+            reasons, overflow,
+            lambda position: f"{name}={values[position]} overflows NUMERIC({column_type.precision}, {scale})",
+        )
+    elif isinstance(column_type, Integer):
+        bounds = next(info for integer_type, info in INTEGER_RANGES if isinstance(column_type, integer_type))
+        floats, invalid = _as_floats(values)
+        _reject(reasons, invalid, lambda position: f"{name}={values[position]!r} is not an integer")
+        with np.errstate(invalid="ignore"):
+            out_of_range = ~nulls & ~invalid & ~((floats >= bounds.min) & (floats <= bounds.max))
+        _reject(reasons, out_of_range, lambda position: f"{name}={values[position]} is out of range [{bounds.min}, {bounds.max}]")
+    elif isinstance(column_type, String) and column_type.length is not None:
+        lengths = np.fromiter((len(value) if isinstance(value, str) else 0 for value in values), np.int64, len(values))
+        _reject(reasons, lengths > column_type.length, lambda position: f"{name} is longer than {column_type.length} characters")
+
+
+def enforces_foreign_keys(session: Session) -> bool:
+    """Tells whether the database refuses dangling foreign keys (SQLite only does with PRAGMA foreign_keys)."""
+    connection = session.connection()
+    if connection.dialect.name != "sqlite":
+        return True
+    return bool(connection.exec_driver_sql("PRAGMA foreign_keys").scalar())
+
+
+def _check_foreign_keys(
+        session: Session,
+        column: Column,
+        values: List[Any],
+        reasons: np.ndarray,
+        known: Dict[Column, Set[Any]]) -> None:
+    for foreign_key in column.foreign_keys:
+        referenced = foreign_key.column
+        found = known.setdefault(referenced, set())
+        candidates = np.fromiter((value is not None for value in values), bool, len(values)) & np.equal(reasons, None)
+        unknown = sorted({values[position] for position in np.flatnonzero(candidates)} - found)
+        for start in range(0, len(unknown), FOREIGN_KEYS_PER_QUERY):
+            batch = unknown[start:start + FOREIGN_KEYS_PER_QUERY]
+            found.update(session.execute(select(referenced).where(referenced.in_(batch))).scalars())
+        missing = candidates & np.fromiter((value not in found for value in values), bool, len(values))
+        _reject(
+            reasons, missing,
+            lambda position: f"{column.name}={values[position]!r} not found in {referenced.table.name}.{referenced.name}",
+        )
+
+
+def validate_rows(
+        session: Session,
+        table: Table,
+        rows: List[Mapping[str, Any]],
+        index_elements: Sequence[str],
+        check_foreign_keys: bool = True,
+        known: Optional[Dict[Column, Set[Any]]] = None) -> Tuple[List[Mapping[str, Any]], List[RejectedRow]]:
+    """Splits a batch of upsert rows into the rows to send and the rows the database would refuse.
+
+    Args:
+        session (Session): Session used for the foreign key lookups.
+        table (Table): Target table, whose column types are checked.
+        rows (List[dict]): Rows keyed by column name. Every row must have the keys of the first one.
+        index_elements (Sequence[str]): Columns of the unique key used to dedupe the batch.
+        check_foreign_keys (bool): Looks the foreign keys up in the referenced tables.
+        known (Dict, optional): Referenced values already found, shared between the batches of one load.
+
+    Returns:
+        Tuple[List[dict], List[RejectedRow]]: Valid rows, deduplicated, and rejected rows with their reason.
+    """
+    if not rows:
+        return [], []
+    known = {} if known is None else known
+    reasons = np.full(len(rows), None, dtype=object)
+    columns = [table.c[name] for name in rows[0] if name in table.c]
+    values = {column.name: [row.get(column.name) for row in rows] for column in columns}
+
+    for column in columns:
+        _check_column(column, values[column.name], reasons)
+    if check_foreign_keys:
+        for column in columns:
+            if column.foreign_keys:
+                _check_foreign_keys(session, column, values[column.name], reasons, known)
+
+    # ON CONFLICT cannot touch the same row twice in one statement: the last occurrence wins.
+    if all(key in rows[0] for key in index_elements):
+        last: Dict[Tuple[Any, ...], int] = {}
+        for position in np.flatnonzero(np.equal(reasons, None)):
+            last[tuple(rows[position][key] for key in index_elements)] = position
+        superseded = np.equal(reasons, None)
+        superseded[list(last.values())] = False
+        key_names = ", ".join(index_elements)
+        _reject(reasons, superseded, f"duplicate ({key_names}) in the batch, superseded by a later row")
+
+    valid = [row for row, reason in zip(rows, reasons) if reason is None]
+    rejected = [RejectedRow(row=row, reason=reason) for row, reason in zip(rows, reasons) if reason is not None]
+    return valid, rejected
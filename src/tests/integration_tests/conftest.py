@@ -0,0 +1,33 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from stock_analyser_lib.models import Base, HistoricalData, Stock
+
+# Integration tests run against a real PostgreSQL, e.g.
+# TEST_DATABASE_URL=postgresql://postgres@localhost/stock_analyser_test
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+@pytest.fixture(scope="function")
+def pg_session():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.begin() as connection:
+        if Base.metadata.schema:
+            connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{Base.metadata.schema}"'))
+        Base.metadata.drop_all(bind=connection)
+        Base.metadata.create_all(bind=connection)
+
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
@@ -0,0 +1,19 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from stock_analyser_lib.models.engines import PRIMARY, EngineRegistry, EngineSettings
+from tests.integration_tests.conftest import TEST_DATABASE_URL
+
+
+def test_statement_timeout_cancels_long_queries():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    registry = EngineRegistry({PRIMARY: EngineSettings(url=TEST_DATABASE_URL, pool_size=1, statement_timeout=50)})
+    try:
+        with registry.get().connect() as connection:
+            assert connection.execute(text("SHOW statement_timeout")).scalar_one() == "50ms"
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT pg_sleep(1)"))
+    finally:
+        registry.dispose()
@@ -0,0 +1,170 @@
+from datetime import date, timedelta
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import event
+
+from stock_analyser_lib.calendars import NYSE
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+from stock_analyser_lib.repositories.stock_repo import StockRepository
+from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.models.stock import Stock
+
+
+def _bars(symbol, days, close=100.0):
+    start = date(2021, 1, 1)
+    for offset in range(days):
+        yield {
+            "symbol": symbol, "date": start + timedelta(days=offset),
+            "open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 1000 + offset,
+        }
+
+
+def test_copy_upsert_inserts_streamed_rows(pg_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=pg_session)
+    StockRepository.add_stock(symbol="AAPL", name="Apple Inc.")
+
+    report = HistoricalDataRepository.copy_upsert_historical_data(_bars("AAPL", 500))
+
+    assert report.inserted == 500
+    assert report.updated == 0
+    assert pg_session.query(HistoricalData).filter_by(symbol="AAPL").count() == 500
+
+
+def test_copy_upsert_updates_existing_rows(pg_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=pg_session)
+    StockRepository.add_stock(symbol="AAPL", name="Apple Inc.")
+    HistoricalDataRepository.copy_upsert_historical_data(_bars("AAPL", 10))
+
+    rows = [("AAPL", date(2021, 1, 1), 120.0), ("AAPL", date(2021, 1, 20), 130.0)]
+    report = HistoricalDataRepository.copy_upsert_historical_data(rows, columns=("symbol", "date", "close"))
+
+    assert (report.inserted, report.updated) == (1, 1)
+    data = pg_session.query(HistoricalData).filter_by(symbol="AAPL", date=date(2021, 1, 1)).one()
+    assert data.close == 120
+    assert data.volume == 1000
+
+
+def test_copy_upsert_invalidates_cached_windows(pg_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=pg_session)
+    StockRepository.add_stock(symbol="AAPL", name="Apple Inc.")
+    HistoricalDataRepository.copy_upsert_historical_data(_bars("AAPL", 10))
+    cache = HistoricalDataRepository.enable_cache()
+    try:
+        HistoricalDataRepository.get_historical_data("AAPL", date(2021, 1, 1), date(2021, 1, 5))
+        HistoricalDataRepository.get_historical_data("AAPL", date(2021, 1, 6), date(2021, 1, 10))
+
+        rows = [("AAPL", date(2021, 1, 8), 130.0)]
+        HistoricalDataRepository.copy_upsert_historical_data(rows, columns=("symbol", "date", "close"))
+
+        assert cache.stats()["invalidations"] == 1
+        data = HistoricalDataRepository.get_historical_data("AAPL", date(2021, 1, 8), date(2021, 1, 8))
+        assert [row.close for row in data] == [130]
+    finally:
+        HistoricalDataRepository.disable_cache()
+
+
+def test_copy_upsert_refreshes_latest_bars(pg_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=pg_session)
+    StockRepository.add_stock(symbol="AAPL", name="Apple Inc.")
+    HistoricalDataRepository.copy_upsert_historical_data(_bars("AAPL", 10))
+
+    latest = HistoricalDataRepository.get_latest_bars()
+
+    assert [(bar.symbol, bar.date) for bar in latest] == [("AAPL", date(2021, 1, 10))]
+
+
+def test_bulk_upsert_chunks_above_bind_parameter_limit(pg_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=pg_session)
+    StockRepository.add_stock(symbol="AAPL", name="Apple Inc.")
+
+    report = HistoricalDataRepository.bulk_upsert_historical_data(list(_bars("AAPL", 12000)))
+
+    assert report.inserted == 12000
+    assert pg_session.query(HistoricalData).count() == 12000
+
+
+def test_bulk_upsert_rejects_out_of_range_rows(pg_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=pg_session)
+    StockRepository.add_stock(symbol="AAPL", name="Apple Inc.")
+    rows = [dict(row, rsi=50) for row in _bars("AAPL", 100)]
+    rows[42]["rsi"] = 1000
+    rows[77]["symbol"] = "MSFT"
+
+    report = HistoricalDataRepository.bulk_upsert_historical_data(rows)
+
+    assert report.inserted == 98
+    assert sorted(rows.index(rejected.row) for rejected in report.rejected) == [42, 77]
+
+
+def test_iter_historical_arrays_streams_in_batches(pg_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=pg_session)
+    StockRepository.bulk_upsert_historical_data([{"symbol": "AAPL", "name": "Apple"}, {"symbol": "MSFT", "name": "Microsoft"}])
+    HistoricalDataRepository.copy_upsert_historical_data(chain(_bars("MSFT", 300), _bars("AAPL", 300)))
+
+    chunks = list(HistoricalDataRepository.iter_historical_arrays_by_date_range(
+        date(2021, 1, 1), date(2021, 12, 31), columns=("close", "volume"), batch_size=100
+    ))
+
+    assert all(len(chunk["date"]) == 100 for chunk in chunks)
+    symbols = np.concatenate([chunk["symbol"] for chunk in chunks])
+    assert symbols.tolist() == ["AAPL"] * 300 + ["MSFT"] * 300
+
+
+def test_deleting_a_stock_through_the_orm_cascades_in_the_database(pg_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=pg_session)
+    StockRepository.add_stock(symbol="AAPL", name="Apple Inc.")
+    HistoricalDataRepository.bulk_upsert_historical_data(list(_bars("AAPL", 50)))
+
+    # passive_deletes leaves the bars to ON DELETE CASCADE instead of loading and nulling them.
+    pg_session.delete(pg_session.get(Stock, "AAPL"))
+    pg_session.commit()
+
+    assert pg_session.query(HistoricalData).count() == 0
+    assert HistoricalDataRepository.get_latest_bars() == []
+
+
+def test_bulk_upsert_splits_inserted_and_updated_rows_from_returning(pg_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=pg_session)
+    StockRepository.add_stock(symbol="AAPL", name="Apple Inc.")
+    HistoricalDataRepository.bulk_upsert_historical_data(list(_bars("AAPL", 10)))
+    statements = []
+    event.listen(pg_session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    report = HistoricalDataRepository.bulk_upsert_historical_data(list(_bars("AAPL", 15, close=101.0)))
+
+    assert (report.inserted, report.updated) == (5, 10)
+    assert not any("count(" in statement.lower() for statement in statements)
+
+
+def test_bulk_update_joins_a_values_list(pg_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=pg_session)
+    StockRepository.add_stock(symbol="AAPL", name="Apple Inc.")
+    HistoricalDataRepository.bulk_upsert_historical_data(list(_bars("AAPL", 300)))
+    statements = []
+    event.listen(pg_session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    report = HistoricalDataRepository.bulk_update_historical_data([
+        {"symbol": "AAPL", "date": date(2021, 1, 1) + timedelta(days=offset), "rsi": None if offset % 2 else 55.5}
+        for offset in range(300)
+    ], chunk_size=100)
+
+    assert report.updated == 300
+    assert sum(statement.startswith("UPDATE") and "VALUES" in statement for statement in statements) == 3
+    bars = HistoricalDataRepository.get_historical_data("AAPL")
+    assert [float(bar.rsi) if bar.rsi is not None else None for bar in bars[:2]] == [55.5, None]
+    assert all(float(bar.close) == 100.0 for bar in bars)
+
+
+def test_find_gaps_against_the_trading_calendar(pg_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=pg_session)
+    StockRepository.add_stock(symbol="AAPL", name="Apple Inc.")
+    days = NYSE.trading_days(date(2024, 1, 1), date(2024, 6, 28)).tolist()
+    missing = days[10:13] + days[50:51]
+    HistoricalDataRepository.bulk_upsert_historical_data([
+        {"symbol": "AAPL", "date": day, "close": 100} for day in days if day not in missing
+    ])
+
+    gaps = HistoricalDataRepository.find_gaps(["AAPL"], end_date=date(2024, 7, 3))
+
+    assert gaps == {"AAPL": [(days[10], days[12]), (days[50], days[50]), (date(2024, 7, 1), date(2024, 7, 3))]}
@@ -0,0 +1,50 @@
+import multiprocessing
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+
+from stock_analyser_lib.models.engines import PRIMARY, engine_registry
+from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.models.stock import Stock
+from stock_analyser_lib.repositories.ingestion import ingest_historical_data
+from tests.integration_tests.conftest import TEST_DATABASE_URL
+
+SYMBOLS = [f"S{i:03d}" for i in range(12)]
+
+
+def load_bars(symbol):
+    for offset in range(50):
+        yield {"symbol": symbol, "date": date(2021, 1, 1) + timedelta(days=offset), "close": 100.0 + offset}
+
+
+def failing_load_bars(symbol):
+    raise RuntimeError(f"feed unavailable for {symbol}")
+
+
+@pytest.fixture
+def forked_engine(pg_session):
+    """Registers the test database as primary engine; forked workers inherit it."""
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("fork start method unavailable")
+    engine_registry.set_engine(PRIMARY, create_engine(TEST_DATABASE_URL))
+    pg_session.add_all([Stock(symbol=symbol, name=symbol) for symbol in SYMBOLS])
+    pg_session.commit()
+    yield multiprocessing.get_context("fork")
+    engine_registry.dispose()
+
+
+def test_ingest_historical_data_merges_worker_reports(pg_session, forked_engine):
+    report = ingest_historical_data(
+        SYMBOLS, load_bars, workers=3, symbols_per_task=2, max_in_flight=2, mp_context=forked_engine
+    )
+    rerun = ingest_historical_data(SYMBOLS[:4], load_bars, workers=2, mp_context=forked_engine)
+
+    assert (report.inserted, report.updated, report.rejected) == (600, 0, [])
+    assert (rerun.inserted, rerun.updated) == (0, 200)
+    assert pg_session.query(HistoricalData).count() == 600
+
+
+def test_ingest_historical_data_propagates_worker_errors(pg_session, forked_engine):
+    with pytest.raises(RuntimeError, match="feed unavailable"):
+        ingest_historical_data(SYMBOLS, failing_load_bars, workers=2, mp_context=forked_engine)
@@ -0,0 +1,31 @@
+from datetime import date, timedelta
+
+import pytest
+
+from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+from stock_analyser_lib.repositories.stock_repo import StockRepository
+
+pytest.importorskip("pyarrow")
+
+from stock_analyser_lib.repositories.parquet_io import export_parquet, import_parquet  # noqa: E402
+
+
+def test_parquet_round_trip_through_copy(pg_session, mocker, tmp_path):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=pg_session)
+    StockRepository.add_stock(symbol="AAPL", name="Apple Inc.")
+    start = date(2021, 12, 1)
+    HistoricalDataRepository.copy_upsert_historical_data(
+        {"symbol": "AAPL", "date": start + timedelta(days=offset), "close": 100 + offset / 100, "volume": offset}
+        for offset in range(400)
+    )
+
+    written = export_parquet(str(tmp_path), partition_by="year", batch_size=128)
+    pg_session.query(HistoricalData).delete()
+    pg_session.commit()
+    report = import_parquet(str(tmp_path), use_copy=True, batch_size=128)
+
+    assert written == 400
+    assert (report.inserted, report.updated) == (400, 0)
+    last = pg_session.query(HistoricalData).filter_by(symbol="AAPL", date=start + timedelta(days=399)).one()
+    assert float(last.close) == 103.99
@@ -0,0 +1,119 @@
+import logging
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from stock_analyser_lib.models import Base
+from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+from stock_analyser_lib.repositories.stock_repo import StockRepository
+
+
+@pytest.fixture
+def partitioned(pg_session, mocker):
+    """Rebuilds historical_data as a yearly partitioned table holding 2021 and a DEFAULT partition."""
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=pg_session)
+    schema = f'"{Base.metadata.schema}".' if Base.metadata.schema else ""
+    for statement in (
+        f"ALTER TABLE {schema}historical_data RENAME TO historical_data_plain",
+        f"DROP INDEX {schema}uq_historical_data_symbol_date",
+        f"DROP INDEX {schema}ix_historical_data_date",
+        f"CREATE TABLE {schema}historical_data (LIKE {schema}historical_data_plain INCLUDING DEFAULTS) PARTITION BY RANGE (date)",
+        f"ALTER TABLE {schema}historical_data ADD PRIMARY KEY (id, date)",
+        f"CREATE UNIQUE INDEX uq_historical_data_symbol_date ON {schema}historical_data (symbol, date)",
+        f"ALTER SEQUENCE {schema}historical_data_id_seq OWNED BY {schema}historical_data.id",
+        f"DROP TABLE {schema}historical_data_plain",
+        f"CREATE TABLE {schema}historical_data_y2021 PARTITION OF {schema}historical_data FOR VALUES FROM ('2021-01-01') TO ('2022-01-01')",
+        f"CREATE TABLE {schema}historical_data_default PARTITION OF {schema}historical_data DEFAULT",
+    ):
+        pg_session.execute(text(statement))
+    pg_session.commit()
+    StockRepository.add_stock(symbol="AAPL", name="Apple Inc.")
+    return schema
+
+
+def _partition_of(pg_session, schema, day):
+    return pg_session.execute(
+        text(f"SELECT tableoid::regclass::text FROM {schema}historical_data WHERE date = :day"), {"day": day}
+    ).scalar_one()
+
+
+def test_create_partition_moves_bars_out_of_default(pg_session, partitioned):
+    HistoricalDataRepository.bulk_upsert_historical_data([
+        {"symbol": "AAPL", "date": date(2021, 6, 1), "close": 100},
+        {"symbol": "AAPL", "date": date(2022, 6, 1), "close": 110},
+    ])
+    assert _partition_of(pg_session, partitioned, date(2022, 6, 1)).endswith("historical_data_default")
+
+    created = HistoricalDataRepository.ensure_partitions(years_ahead=1, today=date(2022, 3, 1))
+
+    assert created == ["historical_data_y2022", "historical_data_y2023"]
+    assert _partition_of(pg_session, partitioned, date(2022, 6, 1)).endswith("historical_data_y2022")
+    assert HistoricalDataRepository.list_partitions() == [
+        "historical_data_default", "historical_data_y2021", "historical_data_y2022", "historical_data_y2023",
+    ]
+    assert HistoricalDataRepository.ensure_partitions(years_ahead=1, today=date(2022, 3, 1)) == []
+
+
+def test_bulk_upsert_counts_updated_rows_of_a_partitioned_table(pg_session, partitioned):
+    HistoricalDataRepository.bulk_upsert_historical_data([{"symbol": "AAPL", "date": date(2021, 6, 1), "close": 100}])
+
+    report = HistoricalDataRepository.bulk_upsert_historical_data([
+        {"symbol": "AAPL", "date": date(2021, 6, 1), "close": 101},
+        {"symbol": "AAPL", "date": date(2022, 6, 1), "close": 110},
+    ])
+
+    assert (report.inserted, report.updated) == (1, 1)
+
+
+def test_copy_upsert_counts_updated_rows_of_a_partitioned_table(pg_session, partitioned):
+    HistoricalDataRepository.copy_upsert_historical_data([{"symbol": "AAPL", "date": date(2021, 6, 1), "close": 100}])
+
+    report = HistoricalDataRepository.copy_upsert_historical_data([
+        {"symbol": "AAPL", "date": date(2021, 6, 1), "close": 101},
+        {"symbol": "AAPL", "date": date(2022, 6, 1), "close": 110},
+    ])
+
+    assert (report.inserted, report.updated) == (1, 1)
+
+
+def test_date_range_queries_prune_partitions(pg_session, partitioned):
+    HistoricalDataRepository.create_partition(2022)
+    plan = "\n".join(pg_session.execute(text(
+        f"EXPLAIN SELECT * FROM {partitioned}historical_data WHERE date BETWEEN '2022-01-01' AND '2022-02-01'"
+    )).scalars())
+
+    assert "historical_data_y2022" in plan
+    assert "historical_data_y2021" not in plan
+
+
+def test_detach_partition_removes_its_bars_and_refreshes_latest_bars(pg_session, partitioned):
+    HistoricalDataRepository.create_partition(2022)
+    HistoricalDataRepository.bulk_upsert_historical_data([
+        {"symbol": "AAPL", "date": date(2021, 6, 1), "close": 100},
+        {"symbol": "AAPL", "date": date(2022, 6, 1), "close": 110},
+    ])
+
+    HistoricalDataRepository.detach_partition(2022, drop=True)
+
+    assert [bar.date for bar in HistoricalDataRepository.get_historical_data("AAPL")] == [date(2021, 6, 1)]
+    assert HistoricalDataRepository.get_latest_bars()[0].date == date(2021, 6, 1)
+    assert "historical_data_y2022" not in HistoricalDataRepository.list_partitions()
+
+
+def test_apply_retention_drops_expired_partitions_and_deletes_the_rest(pg_session, partitioned, caplog):
+    HistoricalDataRepository.create_partition(2022)
+    HistoricalDataRepository.bulk_upsert_historical_data([
+        {"symbol": "AAPL", "date": date(2021, 6, 1), "close": 100},
+        {"symbol": "AAPL", "date": date(2022, 2, 1), "close": 105},
+        {"symbol": "AAPL", "date": date(2022, 6, 1), "close": 110},
+    ])
+
+    with caplog.at_level(logging.INFO):
+        deleted = HistoricalDataRepository.apply_retention(1, today=date(2023, 3, 1))
+
+    assert deleted == 2
+    assert "Retention of 1 years: 2 bars before 2022-03-01 deleted." in caplog.text
+    assert "historical_data_y2021" not in HistoricalDataRepository.list_partitions()
+    assert [bar.date for bar in HistoricalDataRepository.get_historical_data("AAPL")] == [date(2022, 6, 1)]
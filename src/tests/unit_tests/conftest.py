@@ -2,8 +2,10 @@ import pytest
 from sqlalchemy import create_engine, MetaData
 from sqlalchemy.orm import sessionmaker
 from stock_analyser_lib.models.base import Base as RealBase
+from stock_analyser_lib.models.engines import enable_sqlite_savepoints
 from stock_analyser_lib.models.stock import Stock
 from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.repositories.stock_universe import stock_universe
 
 # Create a new Base for testing without schema
 from sqlalchemy.orm import declarative_base
@@ -17,11 +19,11 @@ HistoricalData.__table__.metadata = TestingBase.metadata
 @pytest.fixture(scope="function")
 def db_session():
     # Use an in-memory SQLite database
-    engine = create_engine("sqlite:///:memory:")
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine = enable_sqlite_savepoints(create_engine("sqlite:///:memory:"))
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)
 
     # Create tables without schema
-    TestingBase.metadata.create_all(bind=engine)
+    RealBase.metadata.create_all(bind=engine)
 
     # Provide a new Session for each test
     session = TestingSessionLocal()
@@ -29,3 +31,11 @@ def db_session():
         yield session
     finally:
         session.close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_stock_universe():
+    # The universe is process wide: a snapshot must not leak from one test database into the next.
+    stock_universe.invalidate()
+    yield
+    stock_universe.invalidate()
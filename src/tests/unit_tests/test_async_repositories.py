@@ -0,0 +1,103 @@
+import asyncio
+from datetime import date, timedelta
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from stock_analyser_lib.models.base import Base
+from stock_analyser_lib.repositories.async_historical_data_repo import AsyncHistoricalDataRepository
+from stock_analyser_lib.repositories.async_stock_repo import AsyncStockRepository
+
+
+def run_with_async_db(mocker, scenario):
+    """Runs `scenario` on an in-memory aiosqlite database patched in as the async session factory."""
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        mocker.patch(
+            "stock_analyser_lib.models.base.AsyncSessionLocal",
+            async_sessionmaker(engine, autoflush=False, expire_on_commit=False),
+        )
+        try:
+            return await scenario()
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+
+def test_async_stock_repository_crud(mocker):
+    async def scenario():
+        await AsyncStockRepository.add_stock("AAPL", "Apple Inc.", sector="Technology")
+        await AsyncStockRepository.update_stock("AAPL", name="Apple")
+        stock = await AsyncStockRepository.get_stock_by_sector("Technology")
+        await AsyncStockRepository.delete_stock("AAPL")
+        return stock, await AsyncStockRepository.get_all_stocks()
+
+    stock, remaining = run_with_async_db(mocker, scenario)
+
+    assert stock.name == "Apple"
+    assert remaining == []
+
+
+def test_async_bulk_upsert_and_concurrent_reads(mocker):
+    symbols = ["AAPL", "MSFT", "GOOG"]
+    rows = [
+        {"symbol": symbol, "date": date(2021, 1, 1) + timedelta(days=i), "close": 100.0 + i, "volume": 10}
+        for symbol in symbols for i in range(5)
+    ]
+
+    async def scenario():
+        await AsyncStockRepository.bulk_upsert_historical_data([{"symbol": s, "name": s} for s in symbols])
+        report = await AsyncHistoricalDataRepository.bulk_upsert_historical_data(rows)
+        updated = await AsyncHistoricalDataRepository.bulk_upsert_historical_data([dict(rows[0], close=150.0)])
+        histories = await asyncio.gather(*(
+            AsyncHistoricalDataRepository.get_historical_data(symbol, date(2021, 1, 2), date(2021, 1, 4))
+            for symbol in symbols
+        ))
+        arrays = await AsyncHistoricalDataRepository.get_historical_arrays("AAPL", columns=("close",))
+        return report, updated, histories, arrays
+
+    report, updated, histories, arrays = run_with_async_db(mocker, scenario)
+
+    assert (report.inserted, report.updated) == (15, 0)
+    assert (updated.inserted, updated.updated) == (0, 1)
+    assert [len(history) for history in histories] == [3, 3, 3]
+    assert arrays["close"].tolist() == [150.0, 101.0, 102.0, 103.0, 104.0]
+
+
+def test_async_iter_historical_data_by_date_range(mocker):
+    async def scenario():
+        await AsyncStockRepository.add_stock("AAPL", "Apple Inc.")
+        for i in range(5):
+            await AsyncHistoricalDataRepository.add_historical_data(
+                "AAPL", date(2021, 1, 1) + timedelta(days=i), 100, 110, 90, 105 + i, 1000
+            )
+        return [
+            data.close async for data in AsyncHistoricalDataRepository.iter_historical_data_by_date_range(
+                date(2021, 1, 2), date(2021, 1, 3), batch_size=1
+            )
+        ]
+
+    assert sorted(run_with_async_db(mocker, scenario)) == [106, 107]
+
+
+def test_async_deletes_are_set_based_and_counted(mocker):
+    rows = [
+        {"symbol": symbol, "date": date(2021, 1, 1) + timedelta(days=i), "close": 100.0 + i}
+        for symbol in ("AAPL", "MSFT") for i in range(5)
+    ]
+
+    async def scenario():
+        await AsyncStockRepository.bulk_upsert_historical_data([{"symbol": s, "name": s} for s in ("AAPL", "MSFT")])
+        await AsyncHistoricalDataRepository.bulk_upsert_historical_data(rows)
+        one = await AsyncHistoricalDataRepository.delete_historical_data("MSFT", date(2021, 1, 5))
+        stocks = await AsyncStockRepository.delete_stock("AAPL")
+        latest = await AsyncHistoricalDataRepository.get_latest_bars()
+        return one, stocks, latest, await AsyncHistoricalDataRepository.get_historical_data_by_symbol("AAPL")
+
+    one, stocks, latest, orphans = run_with_async_db(mocker, scenario)
+
+    assert (one, stocks) == (1, 1)
+    assert [(bar.symbol, bar.date) for bar in latest] == [("MSFT", date(2021, 1, 4))]
+    assert orphans == []
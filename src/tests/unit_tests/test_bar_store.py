@@ -0,0 +1,114 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from stock_analyser_lib.models.stock import Stock
+from stock_analyser_lib.repositories.bar_store import LocalBarStore, main
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+from stock_analyser_lib.repositories.stock_universe import stock_universe
+
+
+def _bars(symbol, first_day, days):
+    start = date(2021, 1, 1)
+    return [
+        {"symbol": symbol, "date": start + timedelta(days=offset), "close": 100 + offset, "volume": 1000 + offset}
+        for offset in range(first_day, first_day + days)
+    ]
+
+
+@pytest.fixture
+def stocks(db_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    db_session.add_all([Stock(symbol=symbol, name=symbol) for symbol in ("AAPL", "MSFT")])
+    db_session.commit()
+    HistoricalDataRepository.bulk_upsert_historical_data(_bars("AAPL", 0, 5) + _bars("MSFT", 2, 3))
+    stock_universe.invalidate()
+    yield
+    stock_universe.invalidate()
+
+
+def test_sync_stores_every_bar_and_sets_watermarks(stocks, tmp_path):
+    store = LocalBarStore(str(tmp_path), columns=("close", "volume"))
+
+    appended = store.sync()
+
+    assert appended == 8
+    assert store.symbols() == ["AAPL", "MSFT"]
+    assert store.watermark("AAPL") == date(2021, 1, 5)
+    assert store.watermark("TSLA") is None
+    bars = store.load("MSFT")
+    assert bars["date"].tolist() == [date(2021, 1, 3), date(2021, 1, 4), date(2021, 1, 5)]
+    assert bars["close"].tolist() == [102.0, 103.0, 104.0]
+    assert bars["volume"].dtype == np.int64
+
+
+def test_sync_only_fetches_bars_after_the_watermark(stocks, tmp_path, mocker):
+    store = LocalBarStore(str(tmp_path), columns=("close",))
+    store.sync(["AAPL"])
+    HistoricalDataRepository.bulk_upsert_historical_data(_bars("AAPL", 3, 4))
+    fetch = mocker.spy(HistoricalDataRepository, "iter_historical_arrays_since")
+
+    appended = store.sync(["AAPL"])
+
+    assert appended == 2
+    assert fetch.call_args.args[0] == {"AAPL": date(2021, 1, 5)}
+    assert store.load("AAPL")["close"].tolist() == [100.0, 101.0, 102.0, 103.0, 104.0, 105.0, 106.0]
+    assert store.sync(["AAPL"]) == 0
+
+
+def test_sync_writes_each_symbol_batch_before_fetching_the_next(stocks, tmp_path, mocker):
+    mocker.patch.object(HistoricalDataRepository, "SYMBOLS_PER_QUERY", 1)
+    store = LocalBarStore(str(tmp_path), columns=("close",))
+    append = mocker.spy(store, "_append_bars")
+    batches = []
+    iterate = HistoricalDataRepository.iter_historical_arrays_since
+
+    def record(*args, **kwargs):
+        for arrays in iterate(*args, **kwargs):
+            batches.append((arrays["symbol"].tolist(), append.call_count))
+            yield arrays
+
+    mocker.patch.object(HistoricalDataRepository, "iter_historical_arrays_since", side_effect=record)
+
+    assert store.sync() == 8
+    assert batches == [(["AAPL"] * 5, 0), (["MSFT"] * 3, 1)]
+
+
+def test_load_returns_read_only_memory_mapped_views(stocks, tmp_path):
+    store = LocalBarStore(str(tmp_path), columns=("close",))
+    store.sync()
+
+    bars = store.load("AAPL", start_date=date(2021, 1, 2), end_date=date(2021, 1, 3))
+
+    assert isinstance(bars["close"], np.memmap)
+    assert not bars["close"].flags.writeable
+    assert bars["close"].tolist() == [101.0, 102.0]
+    assert store.load("TSLA")["close"].size == 0
+    with pytest.raises(ValueError):
+        store.load("AAPL", columns=("rsi",))
+
+
+def test_load_ignores_the_tail_of_an_interrupted_sync(stocks, tmp_path):
+    store = LocalBarStore(str(tmp_path), columns=("close",))
+    store.sync(["AAPL"])
+    # A crash after the value columns but before the date column leaves the watermark unchanged.
+    np.save(tmp_path / "AAPL" / "close.npy", np.arange(7, dtype=np.float64))
+
+    assert store.load("AAPL")["close"].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert store.watermark("AAPL") == date(2021, 1, 5)
+
+
+def test_drop_then_sync_reloads_the_symbol(stocks, tmp_path):
+    store = LocalBarStore(str(tmp_path), columns=("close",))
+    store.sync()
+
+    store.drop("AAPL")
+
+    assert store.symbols() == ["MSFT"]
+    assert store.sync() == 5
+
+
+def test_main_syncs_the_given_symbols(stocks, tmp_path):
+    assert main([str(tmp_path), "MSFT"]) == 0
+    assert LocalBarStore(str(tmp_path)).symbols() == ["MSFT"]
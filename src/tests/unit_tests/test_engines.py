@@ -0,0 +1,65 @@
+import pytest
+
+from stock_analyser_lib.models.base import AsyncRoutingSession, RoutingSession
+from stock_analyser_lib.models.engines import PRIMARY, REPLICA, EngineRegistry, EngineSettings
+
+
+def test_engines_are_created_on_first_use():
+    registry = EngineRegistry({PRIMARY: EngineSettings(url="sqlite://"), REPLICA: EngineSettings(url=None)})
+
+    assert registry._engines == {}
+    engine = registry.get()
+
+    assert registry.get() is engine
+    assert registry.get(REPLICA) is engine
+
+
+def test_read_only_sessions_route_to_the_replica(mocker):
+    registry = EngineRegistry({PRIMARY: EngineSettings(url="sqlite://"), REPLICA: EngineSettings(url="sqlite://")})
+    mocker.patch("stock_analyser_lib.models.base.engine_registry", registry)
+
+    writer = RoutingSession()
+    reader = RoutingSession(info={"read_only": True})
+
+    assert writer.get_bind() is registry.get(PRIMARY)
+    assert reader.get_bind() is registry.get(REPLICA)
+    assert registry.get(PRIMARY) is not registry.get(REPLICA)
+
+
+def test_engine_options_apply_pool_and_statement_timeout():
+    settings = EngineSettings(url=None, pool_size=20, max_overflow=5, pool_recycle=1800, statement_timeout=30000)
+
+    options = settings.engine_options("postgresql+psycopg2://user@host/db")
+    async_options = settings.engine_options("postgresql+asyncpg://user@host/db")
+
+    assert (options["pool_size"], options["max_overflow"], options["pool_recycle"]) == (20, 5, 1800)
+    assert options["connect_args"] == {"options": "-c statement_timeout=30000"}
+    assert async_options["connect_args"] == {"server_settings": {"statement_timeout": "30000"}}
+    assert "pool_size" not in settings.engine_options("sqlite://")
+
+
+def test_configure_replaces_engines_of_a_role():
+    registry = EngineRegistry({PRIMARY: EngineSettings(url="sqlite://"), REPLICA: EngineSettings(url=None)})
+    engine = registry.get()
+
+    registry.configure(PRIMARY, pool_pre_ping=False)
+
+    assert registry.get() is not engine
+    with pytest.raises(ValueError):
+        registry.get("analytics")
+
+
+def test_async_sessions_route_through_the_current_registry(mocker):
+    registry = EngineRegistry({PRIMARY: EngineSettings(url="sqlite://"), REPLICA: EngineSettings(url="sqlite://")})
+    mocker.patch("stock_analyser_lib.models.base.engine_registry", registry)
+
+    writer = AsyncRoutingSession()
+    reader = AsyncRoutingSession(info={"read_only": True})
+
+    assert writer.get_bind() is registry.get_async(PRIMARY).sync_engine
+    assert reader.get_bind() is registry.get_async(REPLICA).sync_engine
+
+    engine = registry.get_async(PRIMARY)
+    registry.configure(PRIMARY, pool_pre_ping=False)
+
+    assert writer.get_bind() is not engine.sync_engine
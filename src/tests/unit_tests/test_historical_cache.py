@@ -0,0 +1,104 @@
+import pytest
+from datetime import date, timedelta
+
+from stock_analyser_lib.models.base import BaseModel
+from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.models.stock import Stock
+from stock_analyser_lib.repositories.historical_cache import (
+    ESTIMATED_ROW_BYTES, ESTIMATED_WINDOW_BYTES, HistoricalWindowCache,
+)
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+
+
+def _rows(symbol, days, start=date(2021, 1, 1)):
+    return [HistoricalData(symbol=symbol, date=start + timedelta(days=i), close=100 + i) for i in range(days)]
+
+
+@pytest.fixture
+def cache():
+    cache = HistoricalDataRepository.enable_cache()
+    yield cache
+    HistoricalDataRepository.disable_cache()
+
+
+def test_cache_serves_sub_range_from_superset():
+    cache = HistoricalWindowCache()
+    cache.put("AAPL", None, None, _rows("AAPL", 10))
+
+    rows = cache.get("AAPL", "2021-01-03", date(2021, 1, 5))
+
+    assert [row.date.day for row in rows] == [3, 4, 5]
+    assert cache.get("MSFT") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used_window():
+    window_size = ESTIMATED_WINDOW_BYTES + 5 * ESTIMATED_ROW_BYTES
+    cache = HistoricalWindowCache(max_bytes=2 * window_size)
+    cache.put("AAPL", None, None, _rows("AAPL", 5))
+    cache.put("MSFT", None, None, _rows("MSFT", 5))
+    cache.get("AAPL")
+    cache.put("GOOG", None, None, _rows("GOOG", 5))
+
+    assert cache.get("MSFT") is None
+    assert cache.get("AAPL") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_cache_invalidates_only_windows_containing_written_dates():
+    cache = HistoricalWindowCache()
+    cache.put("AAPL", "2021-01-01", "2021-01-05", _rows("AAPL", 5))
+    cache.put("AAPL", "2021-01-06", "2021-01-10", _rows("AAPL", 5, start=date(2021, 1, 6)))
+
+    cache.invalidate("AAPL", ["2021-01-07"])
+
+    assert cache.get("AAPL", "2021-01-01", "2021-01-05") is not None
+    assert cache.get("AAPL", "2021-01-06", "2021-01-10") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_repository_reads_through_cache_and_invalidates_on_write(db_session, cache, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    db_session.add(Stock(symbol="AAPL", name="Apple Inc."))
+    db_session.commit()
+    HistoricalDataRepository.add_historical_data("AAPL", date(2021, 1, 1), 100, 110, 90, 105, 1000)
+
+    first = HistoricalDataRepository.get_historical_data("AAPL")
+    second = HistoricalDataRepository.get_historical_data("AAPL")
+    assert [row.close for row in first] == [row.close for row in second] == [105]
+    assert cache.stats()["hits"] == 1
+
+    HistoricalDataRepository.bulk_upsert_historical_data([{"symbol": "AAPL", "date": date(2021, 1, 1), "close": 107}])
+
+    assert [row.close for row in HistoricalDataRepository.get_historical_data("AAPL")] == [107]
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_cache_drops_windows_read_before_an_invalidation():
+    cache = HistoricalWindowCache()
+    generation = cache.generation("AAPL")
+    cache.invalidate_range("AAPL", None, None)
+
+    cache.put("AAPL", None, None, _rows("AAPL", 5), generation)
+    cache.put("MSFT", None, None, _rows("MSFT", 5), cache.generation("MSFT"))
+
+    assert cache.get("AAPL") is None
+    assert cache.get("MSFT") is not None
+    assert cache.stats()["stale_puts"] == 1
+
+
+def test_repository_bypasses_cache_inside_unit_of_work(db_session, cache, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    db_session.add(Stock(symbol="AAPL", name="Apple Inc."))
+    db_session.commit()
+
+    with pytest.raises(RuntimeError):
+        with BaseModel.unit_of_work():
+            HistoricalDataRepository.add_historical_data("AAPL", date(2021, 1, 1), 100, 110, 90, 105, 1000)
+            assert len(HistoricalDataRepository.get_historical_data("AAPL")) == 1
+            raise RuntimeError("rolled back")
+
+    assert cache.stats()["entries"] == 0
+    assert HistoricalDataRepository.get_historical_data("AAPL") == []
@@ -1,8 +1,10 @@
+import numpy as np
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
 from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.models.stock import Stock
 
 @pytest.fixture
 def sample_historical_data():
@@ -48,3 +50,212 @@ def test_delete_historical_data(db_session, sample_historical_data, mocker):
     
     data = db_session.query(HistoricalData).filter_by(symbol="AAPL", date="2021-01-01").first()
     assert data is None
+
+def test_add_historical_data_twice_updates_the_bar(db_session, sample_historical_data, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+
+    HistoricalDataRepository.add_historical_data(**sample_historical_data)
+    HistoricalDataRepository.add_historical_data(**dict(sample_historical_data, close=107))
+
+    data = db_session.query(HistoricalData).filter_by(symbol="AAPL").all()
+    assert len(data) == 1
+    assert data[0].close == 107
+
+def test_bulk_upsert_is_idempotent(db_session, sample_historical_data, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+
+    first = HistoricalDataRepository.bulk_upsert_historical_data([sample_historical_data])
+    second = HistoricalDataRepository.bulk_upsert_historical_data([dict(sample_historical_data, close=107)])
+
+    assert (first.inserted, first.updated) == (1, 0)
+    assert (second.inserted, second.updated) == (0, 1)
+    assert db_session.query(HistoricalData).filter_by(symbol="AAPL").count() == 1
+
+def test_get_historical_arrays(db_session, sample_historical_data, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+
+    second_day = dict(sample_historical_data, date=datetime(2021, 1, 4).date(), close=107, rsi=None)
+    HistoricalDataRepository.bulk_upsert_historical_data([second_day, sample_historical_data])
+
+    arrays = HistoricalDataRepository.get_historical_arrays("AAPL", columns=("close", "rsi", "volume"))
+
+    assert arrays["date"].dtype == np.dtype("datetime64[D]")
+    assert arrays["date"].tolist() == [datetime(2021, 1, 1).date(), datetime(2021, 1, 4).date()]
+    assert arrays["close"].dtype == np.float64 and arrays["close"].tolist() == [105.0, 107.0]
+    assert arrays["rsi"][0] == 70.0 and np.isnan(arrays["rsi"][1])
+    assert arrays["volume"].dtype == np.int64
+
+def test_get_historical_arrays_rejects_unknown_columns():
+    with pytest.raises(ValueError):
+        HistoricalDataRepository.get_historical_arrays("AAPL", columns=("symbol",))
+
+def test_get_historical_panel_aligns_dates_across_symbols(db_session, sample_historical_data, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    db_session.add(Stock(symbol="MSFT", name="Microsoft"))
+    db_session.commit()
+
+    start = sample_historical_data["date"]
+    HistoricalDataRepository.bulk_upsert_historical_data([
+        dict(sample_historical_data, date=start + timedelta(days=offset), close=100 + offset) for offset in range(3)
+    ] + [dict(sample_historical_data, symbol="MSFT", date=start + timedelta(days=1), close=200)])
+
+    panel = HistoricalDataRepository.get_historical_panel(
+        ["MSFT", "AAPL", "GOOG"], start, start + timedelta(days=2), columns=("close", "volume")
+    )
+    filled = HistoricalDataRepository.get_historical_panel(["MSFT", "AAPL"], start, start + timedelta(days=2), fill="ffill")
+
+    assert panel["symbol"].tolist() == ["MSFT", "AAPL", "GOOG"]
+    assert len(panel["date"]) == 3
+    assert panel["close"].shape == (3, 3)
+    np.testing.assert_array_equal(panel["close"][:, 1], [100.0, 101.0, 102.0])
+    np.testing.assert_array_equal(panel["close"][:, 0], [np.nan, 200.0, np.nan])
+    assert np.isnan(panel["close"][:, 2]).all()
+    assert panel["volume"][1, 1] == 1000000
+    np.testing.assert_array_equal(filled["close"][:, 0], [np.nan, 200.0, 200.0])
+
+def test_get_historical_panel_rejects_unknown_fill_policy():
+    with pytest.raises(ValueError):
+        HistoricalDataRepository.get_historical_panel(["AAPL"], datetime(2021, 1, 1), datetime(2021, 1, 2), fill="bfill")
+
+def test_iter_historical_data_by_date_range(db_session, sample_historical_data, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+
+    start = sample_historical_data["date"]
+    HistoricalDataRepository.bulk_upsert_historical_data([
+        dict(sample_historical_data, date=start + timedelta(days=offset), close=100 + offset) for offset in range(5)
+    ])
+
+    rows = list(HistoricalDataRepository.iter_historical_data_by_date_range(start, start + timedelta(days=3), batch_size=2))
+    chunks = list(HistoricalDataRepository.iter_historical_arrays_by_date_range(
+        start, start + timedelta(days=3), columns=("close",), batch_size=3
+    ))
+
+    assert len(rows) == 4
+    assert [len(chunk["close"]) for chunk in chunks] == [3, 1]
+    assert np.concatenate([chunk["close"] for chunk in chunks]).tolist() == [100.0, 101.0, 102.0, 103.0]
+    assert chunks[0]["symbol"].tolist() == ["AAPL"] * 3
+
+def test_recompute_indicators_fills_indicator_columns(db_session, sample_historical_data, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+
+    start = sample_historical_data["date"]
+    db_session.add(Stock(symbol="AAPL", name="Apple Inc."))
+    db_session.commit()
+    bars = [
+        dict(sample_historical_data, date=start + timedelta(days=offset), close=100 + offset % 7, rsi=None, sma_50=None)
+        for offset in range(60)
+    ]
+    HistoricalDataRepository.bulk_upsert_historical_data(bars)
+
+    report = HistoricalDataRepository.recompute_indicators()
+
+    assert report.updated == 60
+    first = db_session.query(HistoricalData).filter_by(symbol="AAPL", date=start).one()
+    last = db_session.query(HistoricalData).filter_by(symbol="AAPL", date=start + timedelta(days=59)).one()
+    assert first.rsi is None and first.open == 100
+    assert last.rsi is not None
+    assert float(last.sma_50) == pytest.approx(np.mean([100 + offset % 7 for offset in range(10, 60)]), abs=0.01)
+
+def test_latest_bars_follow_upserts_updates_and_deletes(db_session, sample_historical_data, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    db_session.add(Stock(symbol="MSFT", name="Microsoft"))
+    db_session.commit()
+
+    start = sample_historical_data["date"]
+    HistoricalDataRepository.bulk_upsert_historical_data([
+        dict(sample_historical_data, date=start + timedelta(days=offset), close=100 + offset) for offset in range(3)
+    ] + [dict(sample_historical_data, symbol="MSFT", close=200)])
+    assert [(bar.symbol, bar.date, bar.close) for bar in HistoricalDataRepository.get_latest_bars()] == [
+        ("AAPL", start + timedelta(days=2), 102), ("MSFT", start, 200),
+    ]
+
+    HistoricalDataRepository.update_historical_data("AAPL", start + timedelta(days=2), close=150)
+    assert HistoricalDataRepository.get_latest_bars(["AAPL"])[0].close == 150
+
+    HistoricalDataRepository.delete_historical_data("AAPL", start + timedelta(days=2))
+    latest = HistoricalDataRepository.get_latest_bars(["AAPL"])[0]
+    assert (latest.date, latest.close) == (start + timedelta(days=1), 101)
+
+    HistoricalDataRepository.add_historical_data("MSFT", start + timedelta(days=5), 1, 1, 1, 210, 10)
+    assert HistoricalDataRepository.get_latest_bars(["MSFT"])[0].close == 210
+
+def test_bulk_delete_historical_data_in_batches(db_session, sample_historical_data, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    db_session.add(Stock(symbol="MSFT", name="Microsoft"))
+    db_session.commit()
+
+    start = sample_historical_data["date"]
+    HistoricalDataRepository.bulk_upsert_historical_data([
+        dict(sample_historical_data, symbol=symbol, date=start + timedelta(days=offset), close=100 + offset)
+        for symbol in ("AAPL", "MSFT") for offset in range(10)
+    ])
+
+    deleted = HistoricalDataRepository.bulk_delete_historical_data(
+        symbols=["AAPL"], start_date=start + timedelta(days=5), batch_size=2
+    )
+
+    assert deleted == 5
+    assert db_session.query(HistoricalData).filter_by(symbol="AAPL").count() == 5
+    assert db_session.query(HistoricalData).filter_by(symbol="MSFT").count() == 10
+    assert HistoricalDataRepository.get_latest_bars(["AAPL"])[0].date == start + timedelta(days=4)
+
+def test_bulk_delete_historical_data_requires_a_filter():
+    with pytest.raises(ValueError):
+        HistoricalDataRepository.bulk_delete_historical_data()
+
+def test_apply_retention_deletes_bars_older_than_the_cutoff(db_session, sample_historical_data, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    dates = [datetime(year, 3, 1).date() for year in (2018, 2019, 2020, 2021)]
+    HistoricalDataRepository.bulk_upsert_historical_data([dict(sample_historical_data, date=day) for day in dates])
+
+    deleted = HistoricalDataRepository.apply_retention(2, today=datetime(2022, 2, 28).date())
+
+    assert deleted == 2
+    assert [data.date for data in HistoricalDataRepository.get_historical_data("AAPL")] == dates[2:]
+
+def test_bulk_update_writes_only_the_given_columns(db_session, sample_historical_data, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    start = sample_historical_data["date"]
+    HistoricalDataRepository.bulk_upsert_historical_data([
+        dict(sample_historical_data, date=start + timedelta(days=offset)) for offset in range(5)
+    ])
+
+    report = HistoricalDataRepository.bulk_update_historical_data([
+        {"symbol": "AAPL", "date": start + timedelta(days=offset), "rsi": 40 + offset, "macd": None}
+        for offset in range(6)
+    ] + [{"symbol": "AAPL", "date": start, "rsi": 5000, "macd": 1}], chunk_size=2)
+
+    assert report.updated == 5
+    assert [rejected.row["rsi"] for rejected in report.rejected] == [5000]
+    data = HistoricalDataRepository.get_historical_data("AAPL")
+    assert [bar.rsi for bar in data] == [40, 41, 42, 43, 44]
+    assert all(bar.macd is None for bar in data)
+    assert all(bar.close == 105 and bar.sma_50 == 100 for bar in data)
+
+def test_bulk_update_rejects_unknown_columns(db_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+
+    with pytest.raises(ValueError):
+        HistoricalDataRepository.bulk_update_historical_data([{"symbol": "AAPL", "date": "2021-01-01", "rsx": 1}])
+
+def test_find_gaps_skips_weekends_and_holidays(db_session, sample_historical_data, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    db_session.add_all([Stock(symbol="AAPL", name="Apple"), Stock(symbol="MSFT", name="Microsoft")])
+    db_session.commit()
+    day = lambda text: datetime.strptime(text, "%Y-%m-%d").date()
+    # 2024-01-12 is a Friday, 2024-01-15 is Martin Luther King Jr. Day.
+    stored = ["2024-01-10", "2024-01-12", "2024-01-16", "2024-01-17", "2024-01-22"]
+    HistoricalDataRepository.bulk_upsert_historical_data([
+        dict(sample_historical_data, date=day(text)) for text in stored
+    ])
+
+    assert HistoricalDataRepository.find_gaps() == {
+        "AAPL": [(day("2024-01-11"), day("2024-01-11")), (day("2024-01-18"), day("2024-01-19"))],
+    }
+    assert HistoricalDataRepository.find_gaps(start_date=day("2024-01-06"), end_date=day("2024-01-24")) == {
+        "AAPL": [
+            (day("2024-01-08"), day("2024-01-09")), (day("2024-01-11"), day("2024-01-11")),
+            (day("2024-01-18"), day("2024-01-19")), (day("2024-01-23"), day("2024-01-24")),
+        ],
+        "MSFT": [(day("2024-01-08"), day("2024-01-24"))],
+    }
@@ -0,0 +1,87 @@
+from datetime import date, timedelta
+
+import pytest
+
+from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.models.indicator_state import IndicatorState
+from stock_analyser_lib.models.stock import Stock
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+from stock_analyser_lib.repositories.indicator_state_repo import IndicatorStateRepository
+
+START = date(2021, 1, 1)
+
+
+@pytest.fixture
+def history(db_session):
+    db_session.add(Stock(symbol="AAPL", name="Apple Inc."))
+    db_session.commit()
+    return [
+        {"symbol": "AAPL", "date": START + timedelta(days=offset), "close": 100 + (offset * 7) % 11, "volume": 1000}
+        for offset in range(80)
+    ]
+
+
+def test_append_bars_matches_full_recompute(db_session, history, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+
+    HistoricalDataRepository.bulk_upsert_historical_data(history[:60])
+    assert IndicatorStateRepository.rebuild_indicator_states() == 1
+    for bar in history[60:]:
+        IndicatorStateRepository.append_bars([bar])
+    columns = ("rsi", "macd", "sma_50", "bollinger_upper", "bollinger_lower")
+    appended = {
+        row.date: tuple(getattr(row, column) for column in columns)
+        for row in db_session.query(HistoricalData).filter(HistoricalData.date >= history[60]["date"])
+    }
+
+    HistoricalDataRepository.recompute_indicators()
+    db_session.expire_all()
+    recomputed = db_session.query(HistoricalData).filter(HistoricalData.date >= history[60]["date"]).all()
+    assert len(recomputed) == 20
+    for row in recomputed:
+        assert appended[row.date] == tuple(getattr(row, column) for column in columns)
+        assert row.rsi is not None and row.sma_50 is not None
+    assert db_session.get(IndicatorState, "AAPL").last_date == history[-1]["date"]
+
+
+def test_append_bars_seeds_missing_state_and_rejects_stale_bars(db_session, history, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+
+    HistoricalDataRepository.bulk_upsert_historical_data(history[:30])
+    report = IndicatorStateRepository.append_bars([history[30], history[10]])
+
+    assert report.inserted == 1
+    assert [rejected.row["date"] for rejected in report.rejected] == [history[10]["date"]]
+    state = db_session.get(IndicatorState, "AAPL")
+    assert state.observations == 31
+    assert state.closes[-1] == history[30]["close"]
+
+
+def test_append_bars_keeps_rejected_bars_out_of_the_state(db_session, history, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+
+    HistoricalDataRepository.bulk_upsert_historical_data(history[:30])
+    # The spike makes macd overflow its NUMERIC(5, 3) column.
+    spike = dict(history[30], close=100000)
+    report = IndicatorStateRepository.append_bars([spike, history[31]])
+
+    assert report.inserted == 1
+    assert [rejected.row["date"] for rejected in report.rejected] == [history[30]["date"]]
+    state = db_session.get(IndicatorState, "AAPL")
+    assert state.observations == 31 and state.last_date == history[31]["date"]
+    assert 100000 not in state.closes
+
+    assert IndicatorStateRepository.append_bars([history[30]]).rejected[0].reason.startswith("bar is not after")
+
+
+def test_states_are_seeded_and_loaded_symbols_per_query_at_a_time(db_session, history, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    mocker.patch.object(HistoricalDataRepository, "SYMBOLS_PER_QUERY", 1)
+    db_session.add(Stock(symbol="MSFT", name="Microsoft"))
+    db_session.commit()
+    HistoricalDataRepository.bulk_upsert_historical_data(history + [dict(bar, symbol="MSFT") for bar in history])
+    fetch = mocker.spy(HistoricalDataRepository, "_fetch_arrays")
+
+    assert IndicatorStateRepository.rebuild_indicator_states(symbols_per_batch=2) == 2
+    assert fetch.call_count == 2
+    assert sorted(IndicatorStateRepository.get_indicator_states(["AAPL", "MSFT"])) == ["AAPL", "MSFT"]
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from stock_analyser_lib.indicators import bollinger_bands, ema, macd, rsi, sma
+
+# Wilder's RSI worked example (14 periods).
+CLOSES = np.array([
+    44.34, 44.09, 44.15, 43.61, 44.33, 44.83, 45.10, 45.42, 45.84, 46.08,
+    45.89, 46.03, 45.61, 46.28, 46.28, 46.00, 46.03, 46.41, 46.22, 45.64,
+])
+
+
+def test_rsi_matches_reference_values():
+    values = rsi(CLOSES)
+
+    assert np.isnan(values[:14]).all()
+    assert np.round(values[14:], 2).tolist() == [70.46, 66.25, 66.48, 69.35, 66.29, 57.92]
+
+
+def test_sma_and_bollinger_bands():
+    middle = sma(CLOSES, 5)
+    upper, lower = bollinger_bands(CLOSES, period=5, num_std=2)
+
+    assert np.isnan(middle[:4]).all()
+    assert middle[4] == pytest.approx(CLOSES[:5].mean())
+    assert upper[9] == pytest.approx(CLOSES[5:10].mean() + 2 * CLOSES[5:10].std())
+    assert lower[9] == pytest.approx(CLOSES[5:10].mean() - 2 * CLOSES[5:10].std())
+
+
+def test_ema_matches_recursive_definition():
+    alpha = 2 / (10 + 1)
+    expected = [CLOSES[0]]
+    for close in CLOSES[1:]:
+        expected.append(expected[-1] + alpha * (close - expected[-1]))
+
+    assert ema(CLOSES, 10) == pytest.approx(expected)
+
+
+def test_batch_matches_single_series_with_late_listing():
+    late = np.concatenate([np.full(5, np.nan), CLOSES[:15]])
+    batch = np.vstack([CLOSES, late])
+
+    assert np.allclose(rsi(batch)[1, 5:], rsi(CLOSES[:15]), equal_nan=True)
+    assert np.allclose(macd(batch, 3, 6)[1, 5:], macd(CLOSES[:15], 3, 6), equal_nan=True)
+    assert np.allclose(sma(batch, 5)[1, 5:], sma(CLOSES[:15], 5), equal_nan=True)
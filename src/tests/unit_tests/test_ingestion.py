@@ -0,0 +1,40 @@
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+
+from stock_analyser_lib.models import base
+from stock_analyser_lib.models.engines import PRIMARY, EngineRegistry
+from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.models.stock import Stock
+from stock_analyser_lib.repositories.ingestion import ingest_symbol_batch
+
+
+def load_bars(symbol):
+    for offset in range(3):
+        yield {"symbol": symbol, "date": date(2021, 1, 1) + timedelta(days=offset), "close": 100 + offset}
+
+
+def test_ingest_symbol_batch_streams_every_symbol(db_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    db_session.add_all([Stock(symbol="AAPL", name="Apple"), Stock(symbol="MSFT", name="Microsoft")])
+    db_session.commit()
+
+    report = ingest_symbol_batch(load_bars, ["AAPL", "MSFT"])
+
+    assert (report.inserted, report.updated) == (6, 0)
+    assert db_session.query(HistoricalData).count() == 6
+
+
+def test_reset_engine_after_fork_forgets_inherited_connections(mocker):
+    # A throwaway registry keeps the test independent of the configured database.
+    registry = EngineRegistry()
+    registry.set_engine(PRIMARY, create_engine("sqlite://"))
+    mocker.patch.object(base, "engine_registry", registry)
+    dispose = mocker.spy(registry.get(), "dispose")
+    inherited = base.SessionLocal()
+
+    base.reset_engine_after_fork()
+
+    dispose.assert_called_once_with(close=False)
+    assert base.SessionLocal() is not inherited
+    base.SessionLocal.remove()
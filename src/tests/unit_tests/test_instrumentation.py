@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from stock_analyser_lib.models.instrumentation import InMemorySink, instrumentation, instrumented, prometheus_text
+from stock_analyser_lib.models.stock import Stock
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+from stock_analyser_lib.repositories.stock_repo import StockRepository
+
+
+@pytest.fixture
+def sink():
+    sink = instrumentation.enable(InMemorySink())
+    yield sink
+    instrumentation.disable()
+
+
+@pytest.fixture
+def aapl(db_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    db_session.add(Stock(symbol="AAPL", name="Apple Inc."))
+    db_session.commit()
+
+
+def _bars(days):
+    return [{"symbol": "AAPL", "date": date(2021, 1, day), "close": 100 + day} for day in range(1, days + 1)]
+
+
+def test_repository_calls_are_not_recorded_when_disabled(aapl):
+    sink = InMemorySink()
+    instrumentation.disable()
+
+    HistoricalDataRepository.bulk_upsert_historical_data(_bars(3))
+
+    assert not sink.counters and not sink.histograms
+
+
+def test_repository_calls_record_latency_and_rows(aapl, sink):
+    HistoricalDataRepository.bulk_upsert_historical_data(_bars(3))
+    HistoricalDataRepository.get_historical_data("AAPL")
+    HistoricalDataRepository.get_historical_arrays("AAPL", columns=("close",))
+    rows = list(HistoricalDataRepository.iter_historical_data_by_date_range(date(2021, 1, 2), date(2021, 1, 3)))
+
+    assert sink.counter("repository_rows_written_total", method="HistoricalDataRepository.bulk_upsert_historical_data") == 3
+    assert sink.counter("repository_rows_returned_total", method="HistoricalDataRepository.get_historical_data") == 3
+    assert sink.counter("repository_rows_returned_total", method="HistoricalDataRepository.get_historical_arrays") == 3
+    assert sink.counter("repository_rows_returned_total", method="HistoricalDataRepository.iter_historical_data_by_date_range") == len(rows) == 2
+    histogram = sink.histogram("repository_call_duration_seconds", method="HistoricalDataRepository.get_historical_data")
+    assert histogram.count == 1 and histogram.sum > 0
+
+
+def test_repository_errors_are_counted(aapl, sink, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", side_effect=RuntimeError("no database"))
+
+    with pytest.raises(RuntimeError):
+        StockRepository.get_stock_by_symbol("AAPL")
+
+    assert sink.counter("repository_errors_total", method="StockRepository.get_stock_by_symbol") == 1
+
+
+def test_engine_events_record_queries_rows_and_pool_wait(sink):
+    engine = instrumentation.instrument_engine(create_engine("sqlite://"), "primary")
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE t (x INTEGER)"))
+        connection.execute(text("INSERT INTO t VALUES (1), (2)"))
+        connection.execute(text("SELECT x FROM t")).all()
+
+    assert sink.histogram("db_query_duration_seconds", role="primary").count == 3
+    assert sink.counter("db_rows_affected_total", role="primary") == 2
+    assert sink.histogram("db_pool_wait_seconds", role="primary").count == 1
+
+
+def test_slow_queries_are_logged_with_their_sql(caplog):
+    sink = instrumentation.enable(InMemorySink(), slow_query_threshold=0)
+    engine = instrumentation.instrument_engine(create_engine("sqlite://"), "replica")
+    try:
+        with caplog.at_level(logging.WARNING, logger="stock_analyser_lib.models.instrumentation"):
+            with engine.connect() as connection:
+                connection.execute(text("SELECT  1\n  AS one"))
+    finally:
+        instrumentation.disable()
+
+    assert "Slow query on replica" in caplog.text
+    assert "SELECT 1 AS one" in caplog.text
+    assert sink.counter("db_slow_queries_total", role="replica") == 1
+
+
+def test_prometheus_text_renders_counters_and_cumulative_buckets():
+    sink = InMemorySink(buckets=(0.1, 1.0, float("inf")))
+    sink.increment("repository_errors_total", method='Repo."get"')
+    sink.observe("db_query_duration_seconds", 0.05, role="primary")
+    sink.observe("db_query_duration_seconds", 0.5, role="primary")
+
+    lines = prometheus_text(sink).splitlines()
+
+    assert lines == [
+        "# TYPE stock_analyser_repository_errors_total counter",
+        'stock_analyser_repository_errors_total{method="Repo.\\"get\\""} 1',
+        "# TYPE stock_analyser_db_query_duration_seconds histogram",
+        'stock_analyser_db_query_duration_seconds_bucket{role="primary",le="0.1"} 1',
+        'stock_analyser_db_query_duration_seconds_bucket{role="primary",le="1"} 2',
+        'stock_analyser_db_query_duration_seconds_bucket{role="primary",le="+Inf"} 2',
+        'stock_analyser_db_query_duration_seconds_sum{role="primary"} 0.55',
+        'stock_analyser_db_query_duration_seconds_count{role="primary"} 2',
+    ]
+    assert sink.snapshot()["counters"][0]["value"] == 1
+
+
+def test_failed_queries_are_timed_and_release_their_start_time(caplog):
+    sink = instrumentation.enable(InMemorySink(), slow_query_threshold=0)
+    engine = instrumentation.instrument_engine(create_engine("sqlite://"), "primary")
+    try:
+        with caplog.at_level(logging.WARNING, logger="stock_analyser_lib.models.instrumentation"):
+            with engine.connect() as connection:
+                for _ in range(3):
+                    with pytest.raises(Exception):
+                        connection.execute(text("SELECT * FROM missing_table"))
+                assert connection.info.get("query_started") == []
+    finally:
+        instrumentation.disable()
+
+    assert sink.counter("db_query_errors_total", role="primary") == 3
+    assert sink.histogram("db_query_duration_seconds", role="primary").count == 3
+    assert "failed): SELECT * FROM missing_table" in caplog.text
+
+
+def test_async_generators_are_measured_over_the_whole_iteration(sink):
+    @instrumented
+    class Streams:
+        @staticmethod
+        async def stream(count):
+            for value in range(count):
+                await asyncio.sleep(0.01)
+                yield value
+
+    async def consume():
+        return [value async for value in Streams.stream(3)]
+
+    assert asyncio.run(consume()) == [0, 1, 2]
+    assert sink.counter("repository_rows_returned_total", method="Streams.stream") == 3
+    assert sink.histogram("repository_call_duration_seconds", method="Streams.stream").sum >= 0.03
@@ -0,0 +1,75 @@
+import os
+from datetime import date, timedelta
+
+import pytest
+
+from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.models.stock import Stock
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+
+pytest.importorskip("pyarrow")
+
+from stock_analyser_lib.repositories.parquet_io import export_parquet, import_parquet  # noqa: E402
+
+
+@pytest.fixture
+def bars(db_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    db_session.add_all([Stock(symbol=symbol, name=symbol) for symbol in ("AAPL", "MSFT", "123")])
+    db_session.commit()
+    rows = []
+    for symbol in ("AAPL", "MSFT", "123"):
+        for offset in range(0, 500, 50):
+            day = date(2020, 12, 1) + timedelta(days=offset)
+            rows.append({"symbol": symbol, "date": day, "close": 100 + offset, "volume": offset, "rsi": None if offset else 30})
+    HistoricalDataRepository.bulk_upsert_historical_data(rows)
+    return rows
+
+
+def _stored(db_session):
+    return sorted(
+        (row.symbol, row.date, float(row.close), row.volume, None if row.rsi is None else float(row.rsi))
+        for row in db_session.query(HistoricalData).all()
+    )
+
+
+def _empty_table(db_session):
+    db_session.query(HistoricalData).delete()
+    db_session.commit()
+
+
+@pytest.mark.parametrize("partition_by", [None, "symbol", "year"])
+def test_export_then_import_round_trips(db_session, bars, tmp_path, partition_by):
+    path = str(tmp_path / ("bars.parquet" if partition_by is None else "bars"))
+    expected = _stored(db_session)
+
+    written = export_parquet(path, partition_by=partition_by, batch_size=7)
+    _empty_table(db_session)
+    report = import_parquet(path, batch_size=7)
+
+    assert written == len(bars)
+    assert (report.inserted, report.updated) == (len(bars), 0)
+    assert _stored(db_session) == expected
+
+
+def test_export_writes_hive_directories(db_session, bars, tmp_path):
+    export_parquet(str(tmp_path / "by_symbol"), partition_by="symbol")
+    export_parquet(str(tmp_path / "by_year"), partition_by="year", symbols=["AAPL"], start_date=date(2021, 1, 1))
+
+    assert sorted(os.listdir(tmp_path / "by_symbol")) == ["symbol=123", "symbol=AAPL", "symbol=MSFT"]
+    assert sorted(os.listdir(tmp_path / "by_year")) == ["year=2021", "year=2022"]
+    assert os.listdir(tmp_path / "by_year" / "year=2021") == ["data.parquet"]
+
+
+def test_import_of_an_existing_export_updates_the_bars(db_session, bars, tmp_path):
+    path = str(tmp_path / "bars.parquet")
+    export_parquet(path, symbols=["MSFT"])
+
+    report = import_parquet(path)
+
+    assert (report.inserted, report.updated) == (0, len(bars) // 3)
+
+
+def test_export_rejects_unknown_layouts(tmp_path):
+    with pytest.raises(ValueError):
+        export_parquet(str(tmp_path / "bars"), partition_by="month")
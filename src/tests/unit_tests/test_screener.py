@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+import pytest
+
+from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.models.stock import Stock
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+from stock_analyser_lib.repositories.screener import Screener, close_above, close_below, min_volume, rsi_below
+
+
+@pytest.fixture
+def bars(db_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    db_session.add_all([Stock(symbol=symbol, name=symbol) for symbol in ("AAPL", "MSFT", "TSLA")])
+    db_session.commit()
+    start = date(2021, 1, 1)
+    HistoricalDataRepository.bulk_upsert_historical_data([
+        # AAPL was oversold on the first day only.
+        {"symbol": "AAPL", "date": start, "close": 90, "volume": 5000, "rsi": 25, "sma_200": 100, "bollinger_lower": 95},
+        {"symbol": "AAPL", "date": start + timedelta(days=1), "close": 110, "volume": 5000, "rsi": 60, "sma_200": 100, "bollinger_lower": 95},
+        # MSFT is oversold on its latest bar.
+        {"symbol": "MSFT", "date": start, "close": 210, "volume": 8000, "rsi": 55, "sma_200": 200, "bollinger_lower": 190},
+        {"symbol": "MSFT", "date": start + timedelta(days=1), "close": 180, "volume": 8000, "rsi": 22, "sma_200": 200, "bollinger_lower": 190},
+        # TSLA is oversold but illiquid.
+        {"symbol": "TSLA", "date": start + timedelta(days=1), "close": 50, "volume": 10, "rsi": 20, "sma_200": 80, "bollinger_lower": 60},
+    ])
+    return start
+
+
+def test_screener_composes_range_and_column_predicates(bars):
+    oversold = Screener().where(rsi_below(30), close_below("bollinger_lower"), min_volume(1000))
+
+    assert oversold.symbols() == ["AAPL", "MSFT"]
+    assert oversold.count() == 2
+    assert Screener().where(close_above("sma_200")).between(bars + timedelta(days=1)).symbols() == ["AAPL"]
+
+
+def test_screener_on_latest_bar_screens_only_the_last_bar_of_each_symbol(bars):
+    oversold = Screener().where(rsi_below(30), min_volume(1000)).on_latest_bar()
+
+    rows = oversold.rows()
+
+    assert [(row.symbol, row.date) for row in rows] == [("MSFT", bars + timedelta(days=1))]
+    assert oversold.on_latest_bar(as_of=bars).symbols() == ["AAPL"]
+
+
+def test_screener_orders_limits_and_restricts_symbols(bars):
+    screen = Screener().where(HistoricalData.rsi < 30).order_by(HistoricalData.rsi).limit(2)
+
+    assert [row.symbol for row in screen.rows()] == ["TSLA", "MSFT"]
+    assert screen.for_symbols(["AAPL"]).symbols() == ["AAPL"]
@@ -1,5 +1,10 @@
 import pytest
+from datetime import date
+
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
 from stock_analyser_lib.repositories.stock_repo import StockRepository
+from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.models.latest_bar import LatestBar
 from stock_analyser_lib.models.stock import Stock
 
 @pytest.fixture
@@ -32,6 +37,22 @@ def test_get_stock_by_symbol(db_session, sample_stock, mocker):
     assert stock is not None
     assert stock.name == "Apple Inc."
 
+def test_get_stock_by_sector_and_industry_return_every_member(db_session, sample_stock, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    StockRepository.bulk_upsert_historical_data([
+        sample_stock,
+        dict(sample_stock, symbol="MSFT", name="Microsoft", industry="Software"),
+        dict(sample_stock, symbol="TSLA", name="Tesla", sector="Automotive", industry="Electric Vehicles"),
+    ])
+    session = mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+
+    assert [stock.symbol for stock in StockRepository.get_stock_by_sector("Technology")] == ["AAPL", "MSFT"]
+    assert [stock.symbol for stock in StockRepository.get_stock_by_industry("Software")] == ["MSFT"]
+    assert StockRepository.get_stock_by_sector("Energy") == []
+    assert StockRepository.get_stock_by_symbol("TSLA").name == "Tesla"
+    # One load of the universe serves every lookup.
+    assert session.call_count == 1
+
 def test_update_stock(db_session, sample_stock, mocker):
     mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
     
@@ -49,3 +70,46 @@ def test_delete_stock(db_session, sample_stock, mocker):
     
     stock = StockRepository.get_stock_by_symbol("AAPL")
     assert stock is None
+
+def test_delete_stocks_removes_their_bars(db_session, sample_stock, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+
+    StockRepository.bulk_upsert_historical_data([
+        sample_stock, dict(sample_stock, symbol="MSFT", name="Microsoft"), dict(sample_stock, symbol="TSLA", name="Tesla"),
+    ])
+    HistoricalDataRepository.bulk_upsert_historical_data([
+        {"symbol": symbol, "date": date(2021, 1, day), "close": 100 + day}
+        for symbol in ("AAPL", "MSFT", "TSLA") for day in range(1, 6)
+    ])
+
+    deleted = StockRepository.delete_stocks(["AAPL", "MSFT", "NFLX"], batch_size=3)
+
+    assert deleted == 2
+    assert [stock.symbol for stock in StockRepository.get_all_stocks()] == ["TSLA"]
+    assert {data.symbol for data in db_session.query(HistoricalData)} == {"TSLA"}
+    assert [bar.symbol for bar in db_session.query(LatestBar)] == ["TSLA"]
+
+def test_bulk_upsert_reports_inserted_and_updated(db_session, sample_stock, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+
+    StockRepository.add_stock(**sample_stock)
+    report = StockRepository.bulk_upsert_historical_data([
+        {"symbol": "AAPL", "name": "Apple Corporation"},
+        {"symbol": "MSFT", "name": "Microsoft Corporation"},
+        {"symbol": "TSLA", "name": "Tesla Inc."},
+    ], chunk_size=2)
+
+    assert (report.inserted, report.updated, report.rejected) == (2, 1, [])
+    assert StockRepository.get_stock_by_symbol("AAPL").name == "Apple Corporation"
+
+def test_bulk_upsert_isolates_rejected_rows(db_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+
+    rows = [{"symbol": f"S{index}", "name": f"Stock {index}"} for index in range(8)]
+    rows[5]["name"] = None
+
+    report = StockRepository.bulk_upsert_historical_data(rows)
+
+    assert report.inserted == 7
+    assert [rejected.row["symbol"] for rejected in report.rejected] == ["S5"]
+    assert db_session.query(Stock).count() == 7
@@ -0,0 +1,64 @@
+import pytest
+
+from stock_analyser_lib.repositories.stock_repo import StockRepository
+from stock_analyser_lib.repositories.stock_universe import StockUniverse, stock_universe
+
+
+@pytest.fixture
+def universe(db_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    StockRepository.bulk_upsert_historical_data([
+        {"symbol": "AAPL", "name": "Apple Inc.", "sector": "Technology", "industry": "Consumer Electronics", "market_cap": 3000},
+        {"symbol": "MSFT", "name": "Microsoft", "sector": "Technology", "industry": "Software", "market_cap": 2500},
+        {"symbol": "ORCL", "name": "Oracle", "sector": "Technology", "industry": "Software", "market_cap": 400},
+        {"symbol": "TSLA", "name": "Tesla Inc.", "sector": "Automotive", "industry": "Electric Vehicles", "market_cap": None},
+    ])
+    return StockUniverse()
+
+
+def test_lookups_are_served_from_one_load(universe, mocker):
+    load = mocker.spy(StockUniverse, "_load")
+
+    assert universe.get("MSFT").name == "Microsoft"
+    assert universe.get("NOPE") is None
+    assert universe.sector_members("Technology") == {"AAPL", "MSFT", "ORCL"}
+    assert universe.industry_members("Software") == {"MSFT", "ORCL"}
+    assert load.call_count == 1
+
+
+def test_top_by_market_cap(universe):
+    assert [stock.symbol for stock in universe.top_by_market_cap()] == ["AAPL", "MSFT", "ORCL", "TSLA"]
+    assert [stock.symbol for stock in universe.top_by_market_cap(1, industry="Software")] == ["MSFT"]
+
+
+def test_repository_writes_invalidate_the_shared_universe(universe):
+    assert stock_universe.get("AAPL").name == "Apple Inc."
+
+    StockRepository.update_stock("AAPL", name="Apple Corporation")
+    assert stock_universe.get("AAPL").name == "Apple Corporation"
+
+    StockRepository.delete_stock("TSLA")
+    assert stock_universe.get("TSLA") is None
+
+
+def test_ttl_bounds_staleness(universe, mocker):
+    universe.ttl = 0
+    load = mocker.spy(StockUniverse, "_load")
+
+    universe.get("AAPL")
+    universe.get("AAPL")
+
+    assert load.call_count == 2
+
+
+def test_load_racing_an_invalidation_is_not_kept(universe, mocker):
+    load = StockUniverse._load
+
+    def racing_load():
+        snapshot = load()
+        universe.invalidate()  # A write commits while the table is being read.
+        return snapshot
+    mocker.patch.object(StockUniverse, "_load", side_effect=racing_load)
+
+    assert universe.get("AAPL") is not None
+    assert universe._snapshot is None
@@ -0,0 +1,52 @@
+from datetime import date
+
+import numpy as np
+import pendulum
+
+from stock_analyser_lib.calendars import NYSE, easter_sunday, nyse_holidays
+
+
+def test_easter_sunday():
+    assert [easter_sunday(year) for year in (2000, 2008, 2019, 2024, 2038)] == [
+        date(2000, 4, 23), date(2008, 3, 23), date(2019, 4, 21), date(2024, 3, 31), date(2038, 4, 25),
+    ]
+
+
+def test_nyse_holidays_2024():
+    assert nyse_holidays(2024) == [
+        date(2024, 1, 1), date(2024, 1, 15), date(2024, 2, 19), date(2024, 3, 29), date(2024, 5, 27),
+        date(2024, 6, 19), date(2024, 7, 4), date(2024, 9, 2), date(2024, 11, 28), date(2024, 12, 25),
+    ]
+
+
+def test_nyse_holidays_before_1998_have_no_martin_luther_king_day():
+    assert nyse_holidays(1994) == [
+        date(1994, 2, 21), date(1994, 4, 1), date(1994, 4, 27), date(1994, 5, 30),
+        date(1994, 7, 4), date(1994, 9, 5), date(1994, 11, 24), date(1994, 12, 26),
+    ]
+    assert NYSE.is_trading_day(date(1997, 1, 20)) and not NYSE.is_trading_day(date(1998, 1, 19))
+
+
+def test_nyse_holidays_observed_rules():
+    holidays_2022 = nyse_holidays(2022)
+    # New Year's Day on a Saturday is not observed, Sunday holidays move to the Monday.
+    assert date(2021, 12, 31) not in nyse_holidays(2021) and date(2022, 1, 3) not in holidays_2022
+    assert date(2022, 6, 20) in holidays_2022 and date(2022, 12, 26) in holidays_2022
+    assert not any(day.month == 6 and day.day in (18, 19, 20) for day in nyse_holidays(2021))
+    assert date(2012, 10, 29) in nyse_holidays(2012)
+
+
+def test_trading_days_and_counts():
+    assert NYSE.count(date(2024, 1, 1), date(2024, 12, 31)) == 252
+    assert NYSE.trading_days(date(2024, 3, 28), date(2024, 4, 2)).tolist() == [
+        date(2024, 3, 28), date(2024, 4, 1), date(2024, 4, 2),
+    ]
+    counts = NYSE.count(np.array(["2024-01-13", "2024-01-13"], "datetime64[D]"), np.array(["2024-01-15", "2024-01-16"], "datetime64[D]"))
+    assert counts.tolist() == [0, 1]
+    assert NYSE.is_trading_day(date(2024, 7, 5)) and not NYSE.is_trading_day(date(2024, 7, 4))
+
+
+def test_last_closed_session_waits_for_the_close():
+    assert NYSE.last_closed_session(pendulum.datetime(2024, 7, 5, 10, tz="America/New_York")) == date(2024, 7, 3)
+    assert NYSE.last_closed_session(pendulum.datetime(2024, 7, 5, 20, 30, tz="UTC")) == date(2024, 7, 5)
+    assert NYSE.last_closed_session(pendulum.datetime(2024, 7, 7, 12, tz="America/New_York")) == date(2024, 7, 5)
@@ -0,0 +1,65 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from stock_analyser_lib.models.base import BaseModel
+from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.models.stock import Stock
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+from stock_analyser_lib.repositories.stock_repo import StockRepository
+
+
+def test_unit_of_work_commits_joined_calls_once(db_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    commit = mocker.spy(db_session, "commit")
+
+    with BaseModel.unit_of_work():
+        StockRepository.add_stock("AAPL", "Apple Inc.")
+        StockRepository.add_stock("MSFT", "Microsoft")
+        assert StockRepository.get_stock_by_symbol("AAPL") is not None
+        HistoricalDataRepository.add_historical_data("AAPL", date(2021, 1, 1), 100, 110, 90, 105, 1000)
+
+    assert commit.call_count == 1
+    assert db_session.query(Stock).count() == 2
+    assert db_session.query(HistoricalData).count() == 1
+
+
+def test_unit_of_work_rolls_back_every_call_on_error(db_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+
+    with pytest.raises(RuntimeError):
+        with BaseModel.unit_of_work():
+            StockRepository.add_stock("AAPL", "Apple Inc.")
+            with BaseModel.unit_of_work():
+                StockRepository.add_stock("MSFT", "Microsoft")
+            raise RuntimeError("abort")
+
+    assert db_session.query(Stock).count() == 0
+
+
+def test_unit_of_work_keeps_earlier_calls_when_a_joined_update_fails(db_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+
+    with BaseModel.unit_of_work():
+        StockRepository.add_stock("AAPL", "Apple Inc.")
+        HistoricalDataRepository.add_historical_data("AAPL", date(2021, 1, 1), 100, 110, 90, 105, 1000)
+        HistoricalDataRepository.add_historical_data("AAPL", date(2021, 1, 4), 105, 115, 95, 110, 1000)
+        first_id = db_session.query(HistoricalData.id).filter_by(date=date(2021, 1, 1)).scalar()
+        # Giving a bar the primary key of another one fails with an IntegrityError.
+        HistoricalDataRepository.update_historical_data("AAPL", date(2021, 1, 4), id=first_id)
+        StockRepository.add_stock("MSFT", "Microsoft")
+
+    assert sorted(db_session.scalars(select(Stock.symbol))) == ["AAPL", "MSFT"]
+    assert sorted(db_session.scalars(select(HistoricalData.date))) == [date(2021, 1, 1), date(2021, 1, 4)]
+
+
+def test_unit_of_work_defers_cache_invalidation_until_commit(db_session, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=db_session)
+    invalidate = mocker.patch("stock_analyser_lib.repositories.stock_repo.stock_universe.invalidate")
+
+    with BaseModel.unit_of_work():
+        StockRepository.add_stock("AAPL", "Apple Inc.")
+        assert invalidate.call_count == 0
+
+    assert invalidate.call_count == 1
@@ -0,0 +1,124 @@
+from datetime import date
+
+import pytest
+
+from stock_analyser_lib.models.historical_data import HistoricalData
+from stock_analyser_lib.models.stock import Stock
+from stock_analyser_lib.repositories import bulk
+from stock_analyser_lib.repositories.historical_data_repo import HistoricalDataRepository
+from stock_analyser_lib.repositories.validation import validate_rows
+
+TABLE = HistoricalData.__table__
+KEY = ("symbol", "date")
+
+
+@pytest.fixture
+def stocks(db_session):
+    db_session.add_all([Stock(symbol="AAPL", name="Apple Inc."), Stock(symbol="MSFT", name="Microsoft")])
+    db_session.commit()
+    return db_session
+
+
+def _bar(day, **values):
+    return dict({"symbol": "AAPL", "date": date(2021, 1, day), "close": 100.0, "volume": 1000, "rsi": 50.0, "macd": 0.5}, **values)
+
+
+def test_validate_rows_rejects_values_the_columns_cannot_hold(stocks):
+    rows = [
+        _bar(1),
+        _bar(2, rsi=1000),
+        _bar(3, rsi=999.994),
+        _bar(4, macd=-99.9996),
+        _bar(5, volume=2**31),
+        _bar(6, close="n/a"),
+        _bar(7, close=float("inf")),
+        _bar(8, symbol="TOOLONGSYMBOL"),
+        _bar(9, date=None),
+        _bar(10, volume=-2**31),
+    ]
+
+    valid, rejected = validate_rows(stocks, TABLE, rows, KEY)
+
+    assert valid == [rows[0], rows[2], rows[9]]
+    assert [(rows.index(rejected_row.row), rejected_row.reason) for rejected_row in rejected] == [
+        (1, "rsi=1000 overflows NUMERIC(5, 2)"),
+        (3, "macd=-99.9996 overflows NUMERIC(5, 3)"),
+        (4, "volume=2147483648 is out of range [-2147483648, 2147483647]"),
+        (5, "close='n/a' is not a number"),
+        (6, "close=inf is not finite"),
+        (7, "symbol is longer than 10 characters"),
+        (8, "date is NULL"),
+    ]
+
+
+def test_validate_rows_looks_symbols_up_once_per_batch(stocks, mocker):
+    rows = [_bar(1), _bar(2, symbol="TSLA"), _bar(1, symbol="MSFT"), _bar(3, symbol="TSLA")]
+    execute = mocker.spy(stocks, "execute")
+    known = {}
+
+    valid, rejected = validate_rows(stocks, TABLE, rows, KEY, known=known)
+    validate_rows(stocks, TABLE, [_bar(4), _bar(4, symbol="MSFT")], KEY, known=known)
+
+    assert valid == [rows[0], rows[2]]
+    assert [rejected_row.reason for rejected_row in rejected] == ["symbol='TSLA' not found in stocks.symbol"] * 2
+    assert execute.call_count == 1
+
+
+def test_validate_rows_keeps_the_last_duplicate_of_a_key(stocks):
+    rows = [_bar(1, close=1.0), _bar(2), _bar(1, close=2.0), _bar(1, close=3.0, rsi=5000)]
+
+    valid, rejected = validate_rows(stocks, TABLE, rows, KEY)
+
+    assert valid == [rows[1], rows[2]]
+    assert [rows.index(rejected_row.row) for rejected_row in rejected] == [0, 3]
+    assert rejected[0].reason == "duplicate (symbol, date) in the batch, superseded by a later row"
+
+
+def test_bulk_upsert_sends_no_sql_for_rejected_rows(stocks, mocker):
+    mocker.patch("stock_analyser_lib.models.base.SessionLocal", return_value=stocks)
+    upsert_chunk = mocker.spy(bulk, "_upsert_chunk")
+
+    report = HistoricalDataRepository.bulk_upsert_historical_data([_bar(1, rsi=1000), _bar(2, volume=2**40)])
+
+    assert (report.inserted, len(report.rejected)) == (0, 2)
+    assert upsert_chunk.call_count == 0
+    assert stocks.query(HistoricalData).count() == 0
+
+
+def _stocks(count, **values):
+    return [dict({"symbol": f"S{number}", "name": f"Stock {number}"}, **values) for number in range(count)]
+
+
+def test_chunked_upsert_bisects_a_chunk_the_database_refuses(stocks):
+    rows = _stocks(6)
+    rows[4]["name"] = None
+
+    report = bulk.chunked_upsert(stocks, Stock.__table__, rows, ("symbol",), chunk_size=3, validate=False)
+
+    assert (report.inserted, report.updated) == (5, 0)
+    assert [rejected_row.row for rejected_row in report.rejected] == [rows[4]]
+    assert sorted(stocks.query(Stock.symbol).filter(Stock.symbol.like("S%")).all()) == [
+        ("S0",), ("S1",), ("S2",), ("S3",), ("S5",),
+    ]
+
+
+def test_chunked_update_bisects_a_chunk_the_database_refuses(stocks):
+    bulk.chunked_upsert(stocks, Stock.__table__, _stocks(6), ("symbol",))
+    rows = _stocks(6, sector="Technology")
+    rows[4]["name"] = None
+
+    report = bulk.chunked_update(stocks, Stock.__table__, rows, ("symbol",), chunk_size=3, validate=False)
+
+    assert report.updated == 5
+    assert [rejected_row.row for rejected_row in report.rejected] == [rows[4]]
+    assert dict(stocks.query(Stock.symbol, Stock.sector).filter(Stock.symbol.like("S%")).all()) == {
+        "S0": "Technology", "S1": "Technology", "S2": "Technology", "S3": "Technology", "S4": None, "S5": "Technology",
+    }
+
+
+def test_chunked_upsert_counts_rows_left_alone_by_do_nothing_as_skipped(stocks):
+    bulk.chunked_upsert(stocks, TABLE, [_bar(1)], KEY)
+
+    report = bulk.chunked_upsert(stocks, TABLE, [{"symbol": "AAPL", "date": date(2021, 1, day)} for day in (1, 2)], KEY)
+
+    assert (report.inserted, report.updated, report.skipped) == (1, 0, 1)